@@ -2,6 +2,10 @@
 Service de chargement des données ANStat OpenData (format SDMX XML).
 Parse les 18 fichiers XML du portail nso-cotedivoire.opendataforafrica.org
 et expose les séries annualisées dans un format compatible NationalDataService.
+Les observations d'origine (mensuelles, trimestrielles, annuelles) sont conservées
+en tableaux compacts et ré-échantillonnées à la demande (resample). Toutes les séries
+brutes, avec toutes leurs dimensions SDMX, restent accessibles via l'index (sdmx_index).
+Chaque fichier (thème) est une partition anstat.<thème>, lue au premier accès (partitions).
 
 Source: Page Nationale Récapitulative des Données (PNRD) - ANStat / FMI
 """
@@ -10,8 +14,17 @@ import os
 import glob
 import math
 import logging
+import re
+import threading
 from pathlib import Path
 from collections import defaultdict
+from collections.abc import Mapping
+from functools import lru_cache, partial
+
+import numpy as np
+
+from .partitions import partition_store
+from .sdmx_index import SdmxIndex, THEME_DIMENSION
 
 logger = logging.getLogger('api')
 
@@ -93,11 +106,20 @@ AGG_OVERRIDE = {
 }
 
 
+# All override patterns compiled into one scan: the lookahead reports, at every
+# position of the code, the first pattern (in AGG_OVERRIDE order) starting there
+_OVERRIDE_RE = re.compile('(?=(' + '|'.join(map(re.escape, AGG_OVERRIDE)) + '))')
+_OVERRIDE_RANK = {prefix: rank for rank, prefix in enumerate(AGG_OVERRIDE)}
+
+
 def _get_agg_strategy(code, theme):
-    """Determine aggregation strategy for a given indicator code and theme."""
-    for prefix, strat in AGG_OVERRIDE.items():
-        if prefix in code:
-            return strat
+    """
+    Determine aggregation strategy for a given indicator code and theme.
+    The first AGG_OVERRIDE entry (in declaration order) found in the code wins.
+    """
+    matches = _OVERRIDE_RE.findall(code)
+    if matches:
+        return AGG_OVERRIDE[min(matches, key=_OVERRIDE_RANK.__getitem__)]
     return AGG_STRATEGY_BY_THEME.get(theme, 'avg')
 
 
@@ -114,6 +136,7 @@ def _safe_float(val):
         return None
 
 
+@lru_cache(maxsize=None)
 def _parse_time_period(tp):
     """
     Parse SDMX TIME_PERIOD into (year, sub_period).
@@ -121,6 +144,7 @@ def _parse_time_period(tp):
       - None for annual ('2020')
       - month int for monthly ('2020-01' → 1)
       - quarter int for quarterly ('2020-Q1' → 1)
+    Memoized: all files share a few hundred distinct labels.
     """
     tp = str(tp).strip()
     if '-Q' in tp:
@@ -133,32 +157,81 @@ def _parse_time_period(tp):
         return int(tp), None
 
 
-def _aggregate_to_annual(observations, strategy):
+# ─────────────────────────────────────────────────────
+# ORIGINAL-FREQUENCY OBSERVATIONS
+# Periods are stored as integer indexes counted from year 0 at the series'
+# frequency (2020 → 2020, 2020-Q2 → 2020*4 + 1, 2020-03 → 2020*12 + 2), so that
+# downsampling is an integer division followed by a group-by.
+# ─────────────────────────────────────────────────────
+PERIODS_PER_YEAR = {'A': 1, 'Q': 4, 'M': 12}
+RESAMPLE_FREQS = tuple(PERIODS_PER_YEAR)
+AGG_STRATEGIES = ('avg', 'sum', 'last')
+
+
+def _parse_values(raw_values):
+    """OBS_VALUE strings → float64 array (NaN where invalid), in one NumPy conversion when possible."""
+    try:
+        return np.array(raw_values, dtype=np.float64)
+    except (ValueError, TypeError):
+        return np.array([np.nan if v is None else v for v in map(_safe_float, raw_values)], dtype=np.float64)
+
+
+def _observation_arrays(observations, freq):
+    """(years, sub_periods, values) arrays → (periods int32, values float64), sorted by period."""
+    years, subs, values = observations
+    periods = years * PERIODS_PER_YEAR[freq] + np.maximum(subs, 1) - 1
+    order = np.argsort(periods, kind='stable')
+    return periods[order].astype(np.int32), values[order]
+
+
+def _resample_arrays(periods, values, src_freq, freq, strategy):
+    """
+    Downsample sorted (periods, values) from src_freq to freq with 'avg', 'sum' or 'last'.
+    Returns (target periods, values).
     """
-    Aggregate sub-annual observations to annual values.
-    observations: list of (year, sub_period, value)
-    strategy: 'avg', 'sum', or 'last'
-    Returns: dict {year: value}
+    ratio = PERIODS_PER_YEAR[src_freq] // PERIODS_PER_YEAR[freq]
+    if ratio == 1:
+        return periods, values
+    target, starts, counts = np.unique(periods // ratio, return_index=True, return_counts=True)
+    if strategy == 'last':
+        return target, values[starts + counts - 1]
+    sums = np.add.reduceat(values, starts)
+    if strategy == 'sum':
+        return target, np.round(sums, 6)
+    return target, np.round(sums / counts, 6)
+
+
+def _format_period(index, freq):
+    """Period index → SDMX TIME_PERIOD label ('2020', '2020-Q2', '2020-03')."""
+    year, sub = divmod(int(index), PERIODS_PER_YEAR[freq])
+    if freq == 'Q':
+        return f'{year}-Q{sub + 1}'
+    if freq == 'M':
+        return f'{year}-{sub + 1:02d}'
+    return str(year)
+
+
+def _aggregate_to_annual(observations, strategy, decimals=6):
     """
-    by_year = defaultdict(list)
-    for year, sub, val in observations:
-        by_year[year].append((sub or 0, val))
-
-    result = {}
-    for year, entries in by_year.items():
-        if not entries:
-            continue
-        values = [v for _, v in entries]
-        if strategy == 'sum':
-            result[year] = round(sum(values), 6)
-        elif strategy == 'last':
-            # Sort by sub-period, take last
-            entries.sort(key=lambda x: x[0])
-            result[year] = round(entries[-1][1], 6)
-        else:  # avg
-            result[year] = round(sum(values) / len(values), 6)
-
-    return result
+    Aggregate sub-annual observations to annual values (group-by over the year array).
+    observations: (years, sub_periods, values) arrays, sub_period 0 for annual data
+    strategy: 'avg', 'sum', or 'last' (last sub-period of the year; for duplicates,
+    the last one in document order)
+    Returns: (years, values) arrays, sorted by year
+    """
+    years, subs, values = observations
+    order = np.lexsort((subs, years))
+    years, values = years[order], values[order]
+    annual_years, starts, counts = np.unique(years, return_index=True, return_counts=True)
+    if strategy == 'last':
+        annual = values[starts + counts - 1]
+    else:
+        annual = np.add.reduceat(values, starts)
+        if strategy != 'sum':  # avg
+            annual = annual / counts
+    if decimals is not None:
+        annual = np.round(annual, decimals)
+    return annual_years, annual
 
 
 # ─────────────────────────────────────────────────────
@@ -166,6 +239,10 @@ def _aggregate_to_annual(observations, strategy):
 # These SDMX codes overlap with existing data sources
 # ─────────────────────────────────────────────────────
 SKIP_CODES = set()
+
+# Series attributes that are not key dimensions (labels, scale...); every other
+# Series attribute (INDICATOR, FREQ, REF_AREA, COUNTERPART...) is indexed as a dimension
+SERIES_ATTRIBUTES = {'UNIT_MULT', 'DECIMALS', 'TIME_FORMAT', 'COMMENT'}
 # We'll skip series with only 1 annual obs (not useful for trends)
 MIN_ANNUAL_OBS = 2
 
@@ -173,8 +250,28 @@ MIN_ANNUAL_OBS = 2
 # ─────────────────────────────────────────────────────
 # MAIN PARSER
 # ─────────────────────────────────────────────────────
+class _SeriesView(Mapping):
+    """Read-only mapping key (theme.CODE) → series, backed by the theme partitions."""
+
+    def __init__(self, service):
+        self._service = service
+
+    def __getitem__(self, key):
+        partition = self._service._theme(key.split('.', 1)[0])
+        if partition is None:
+            raise KeyError(key)
+        return partition['series'][key]
+
+    def __iter__(self):
+        for theme in self._service.get_themes():
+            yield from self._service._theme(theme)['series']
+
+    def __len__(self):
+        return sum(len(self._service._theme(theme)['series']) for theme in self._service.get_themes())
+
+
 class AnstatSdmxService:
-    """Parse and serve ANStat SDMX XML data."""
+    """Parse and serve ANStat SDMX XML data, one partition per theme (see partitions)."""
 
     _instance = None
 
@@ -182,6 +279,8 @@ class AnstatSdmxService:
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._loaded = False
+            cls._instance._resampled = {}  # (key, freq, agg) → resampled series
+            cls._instance._lock = threading.Lock()
         return cls._instance
 
     def __init__(self):
@@ -190,9 +289,9 @@ class AnstatSdmxService:
             self._loaded = True
 
     def _load_all(self):
-        """Parse all XML files and build the data store."""
-        self.series = {}  # key → {years, values, name, code, theme, unit_mult, freq_orig}
-        self.themes = defaultdict(list)  # theme → [key, ...]
+        """Register one partition per XML file present (anstat.<theme>), parsed on first access."""
+        self.series = _SeriesView(self)  # key → {years, values, name, code, theme, unit_mult, freq_orig, rows}
+        self.files = {}  # theme → XML file
 
         xml_dir = BASE_DIR
         xml_files = glob.glob(str(xml_dir / '*.xml'))
@@ -202,47 +301,59 @@ class AnstatSdmxService:
             self._loaded = True
             return
 
-        total_raw = 0
-        total_kept = 0
-
         for filepath in sorted(xml_files):
-            fname = os.path.basename(filepath)
-            theme = FILE_THEMES.get(fname)
+            theme = FILE_THEMES.get(os.path.basename(filepath))
             if theme is None:
                 continue  # Unknown XML file, skip
+            self.files[theme] = filepath
+            partition_store.register(f'anstat.{theme}', partial(self._load_theme, theme))
 
-            try:
-                series_from_file = self._parse_xml_file(filepath, theme)
-                total_raw += len(series_from_file)
-
-                for key, data in series_from_file.items():
-                    if key not in self.series:
-                        self.series[key] = data
-                        self.themes[theme].append(key)
-                        total_kept += 1
-            except Exception as e:
-                logger.warning("Erreur parsing %s: %s", fname, e)
+        logger.info("✓ ANStat SDMX: %d thèmes en partitions (%d fichiers XML)",
+                    len(self.files), len(xml_files))
+        self._loaded = True
 
+    def _load_theme(self, theme):
+        """
+        Parse the XML file of a theme: {'series': {key: annual series}, 'index': SdmxIndex}
+        (every raw series of the file, all dimensions).
+        """
+        index = SdmxIndex()
+        filepath = self.files[theme]
+        try:
+            series = self._parse_xml_file(filepath, theme, index)
+        except Exception as e:
+            logger.warning("Erreur parsing %s: %s", os.path.basename(filepath), e)
+            series = {}
+        index.freeze()
         logger.info(
-            "✓ ANStat SDMX chargé: %d séries annualisées à partir de %d séries brutes (%d fichiers XML)",
-            total_kept, total_raw, len(xml_files)
+            "✓ ANStat %s: %d séries annualisées (index: %d séries × %d dimensions)",
+            theme, len(series), len(index), len(index.dimensions)
         )
-        self._loaded = True
+        return {'series': series, 'index': index}
 
-    def _parse_xml_file(self, filepath, theme):
-        """Parse a single SDMX XML file and return aggregated annual series."""
+    def _theme(self, theme):
+        """Partition of a theme, loaded on first access; None if no file for it."""
+        if theme not in self.files:
+            return None
+        return partition_store.get(f'anstat.{theme}')
+
+    def _parse_xml_file(self, filepath, theme, index):
+        """Parse a single SDMX XML file into `index` and return aggregated annual series."""
         tree = ET.parse(filepath)
         root = tree.getroot()
 
         # Collect all series, preferring annual > quarterly > monthly
         # For same code, we keep the highest-frequency data and aggregate
-        raw_by_code = defaultdict(list)  # code → [(freq, name, unit_mult, observations)]
+        raw_by_code = defaultdict(list)  # code → [(freq, name, unit_mult, observations, index row)]
 
-        for elem in root.iter():
-            tag = elem.tag
-            if not (tag.endswith('}Series') or tag == 'Series'):
-                continue
+        # Resolve the (namespaced) Series / Obs tags once, then let ElementTree
+        # filter elements by exact tag instead of testing every element in Python
+        series_tag = next((e.tag for e in root.iter() if e.tag.endswith('}Series') or e.tag == 'Series'), None)
+        if series_tag is None:
+            return {}
+        obs_tag = series_tag[:-len('Series')] + 'Obs'
 
+        for elem in root.iter(series_tag):
             attrs = dict(elem.attrib)
             code = attrs.get('INDICATOR', '')
             name = attrs.get('NOMFR_INDICATOR', attrs.get('NOM_INDICATOR', ''))
@@ -252,21 +363,42 @@ class AnstatSdmxService:
             if not code or code in SKIP_CODES:
                 continue
 
-            # Parse observations
-            observations = []
-            for child in elem:
-                if child.tag.endswith('}Obs') or child.tag == 'Obs':
-                    tp = child.attrib.get('TIME_PERIOD', '')
-                    val = _safe_float(child.attrib.get('OBS_VALUE'))
-                    if tp and val is not None:
-                        try:
-                            year, sub = _parse_time_period(tp)
-                            observations.append((year, sub, val))
-                        except (ValueError, IndexError):
-                            continue
-
-            if observations:
-                raw_by_code[code].append((freq, name, unit_mult, observations))
+            # Key dimensions (labels such as NOMFR_* / NOM_* and SERIES_ATTRIBUTES excluded)
+            dimensions = {THEME_DIMENSION: theme, 'FREQ': freq}
+            dimensions.update(
+                (k, v) for k, v in attrs.items()
+                if k not in SERIES_ATTRIBUTES and not k.startswith('NOM')
+            )
+
+            # Parse observations into parallel year / sub-period / value columns
+            years, subs, raw_values = [], [], []
+            for child in elem.iter(obs_tag):
+                tp = child.get('TIME_PERIOD', '')
+                raw = child.get('OBS_VALUE')
+                if tp and raw:
+                    try:
+                        year, sub = _parse_time_period(tp)
+                    except (ValueError, IndexError):
+                        continue
+                    years.append(year)
+                    subs.append(sub or 0)
+                    raw_values.append(raw)
+
+            values = _parse_values(raw_values)
+            valid = np.isfinite(values)
+            if valid.any():
+                observations = (
+                    np.array(years, dtype=np.int32)[valid],
+                    np.array(subs, dtype=np.int16)[valid],
+                    values[valid],
+                )
+                row = None
+                if freq in PERIODS_PER_YEAR:
+                    row = index.add(
+                        dimensions, {'name': name, 'unit_mult': unit_mult},
+                        *_observation_arrays(observations, freq),
+                    )
+                raw_by_code[code].append((freq, name, unit_mult, observations, row))
 
         # Now aggregate each code to annual
         result = {}
@@ -276,35 +408,39 @@ class AnstatSdmxService:
             freq_order = {'A': 0, 'Q': 1, 'M': 2}
             freq_variants.sort(key=lambda x: freq_order.get(x[0], 3))
 
-            best_freq, best_name, best_unit_mult, best_obs = freq_variants[0]
+            best_freq, best_name, best_unit_mult, best_obs, _ = freq_variants[0]
 
             # If annual data exists but has very few obs, try to use sub-annual
-            if best_freq == 'A' and len(best_obs) < MIN_ANNUAL_OBS and len(freq_variants) > 1:
+            if best_freq == 'A' and len(best_obs[2]) < MIN_ANNUAL_OBS and len(freq_variants) > 1:
                 # Try the next variant (quarterly or monthly)
-                _, best_name_alt, best_unit_mult_alt, best_obs_alt = freq_variants[1]
+                _, best_name_alt, best_unit_mult_alt, best_obs_alt, _ = freq_variants[1]
                 strategy = _get_agg_strategy(code, theme)
-                annual_vals = _aggregate_to_annual(best_obs_alt, strategy)
-                if len(annual_vals) >= MIN_ANNUAL_OBS:
+                annual_years, _ = _aggregate_to_annual(best_obs_alt, strategy)
+                if len(annual_years) >= MIN_ANNUAL_OBS:
                     best_obs = best_obs_alt
                     best_freq = freq_variants[1][0]
                     best_name = best_name_alt or best_name
                     best_unit_mult = best_unit_mult_alt
 
+            # Index rows of the original observations (first variant of each frequency)
+            rows = {}
+            for freq, _, _, _, row in freq_variants:
+                if row is not None and freq not in rows:
+                    rows[freq] = row
+
             # Aggregate to annual
             if best_freq == 'A':
-                # Already annual
-                annual_vals = {year: val for year, _, val in best_obs}
+                # Already annual (duplicate years: last one wins, values kept as is)
+                annual_years, annual_values = _aggregate_to_annual(best_obs, 'last', decimals=None)
             else:
                 strategy = _get_agg_strategy(code, theme)
-                annual_vals = _aggregate_to_annual(best_obs, strategy)
+                annual_years, annual_values = _aggregate_to_annual(best_obs, strategy)
 
-            if len(annual_vals) < MIN_ANNUAL_OBS:
+            if len(annual_years) < MIN_ANNUAL_OBS:
                 continue
 
-            # Sort by year
-            sorted_years = sorted(annual_vals.keys())
-            years = sorted_years
-            values = [annual_vals[y] for y in sorted_years]
+            years = annual_years.tolist()
+            values = annual_values.tolist()
 
             # Build unique key: theme.code
             key = f"{theme}.{code}"
@@ -317,6 +453,7 @@ class AnstatSdmxService:
                 'theme': theme,
                 'unit_mult': best_unit_mult,
                 'freq_orig': best_freq,
+                'rows': rows,  # freq → index row (original observations)
             }
 
         return result
@@ -331,16 +468,105 @@ class AnstatSdmxService:
             return {'years': [], 'values': [], 'name': key}
         return {'years': s['years'], 'values': s['values'], 'name': s['name']}
 
+    def get_frequencies(self, key):
+        """Original frequencies available for a series, coarsest first (e.g. ['A', 'M'])."""
+        s = self.series.get(key)
+        if not s:
+            return []
+        return [freq for freq in RESAMPLE_FREQS if freq in s['rows']]
+
+    def resample(self, key, freq, agg=None):
+        """
+        Series `key` at frequency `freq` ('A', 'Q' or 'M'). The native variant is used
+        when it exists, otherwise the closest finer one is aggregated with `agg`
+        ('avg', 'sum', 'last'; default: the series' annual strategy).
+        Returns {'freq', 'agg', 'freq_orig', 'periods', 'values'} (periods as SDMX labels,
+        agg None for a native variant),
+        None if the key is unknown. Raises ValueError if only coarser data exists.
+        Results are cached per (key, freq, agg).
+        """
+        s = self.series.get(key)
+        if not s:
+            return None
+        if agg is None:
+            agg = _get_agg_strategy(s['code'], s['theme'])
+        cache_key = (key, freq, agg)
+        cached = self._resampled.get(cache_key)
+        if cached is not None:
+            return cached
+
+        rows = s['rows']
+        index = self._theme(s['theme'])['index']
+        candidates = [f for f in RESAMPLE_FREQS
+                      if f in rows and PERIODS_PER_YEAR[f] % PERIODS_PER_YEAR[freq] == 0]
+        if not candidates:
+            raise ValueError(f'pas d\'observations {freq} ou plus fines pour {key} '
+                             f'(disponibles : {", ".join(self.get_frequencies(key))})')
+        src_freq = candidates[0]
+        periods, values = _resample_arrays(*index.observations(rows[src_freq]), src_freq, freq, agg)
+
+        result = {
+            'freq': freq,
+            'agg': agg if src_freq != freq else None,  # native variant: no aggregation
+            'freq_orig': src_freq,
+            'periods': [_format_period(p, freq) for p in periods.tolist()],
+            'values': values.tolist(),
+        }
+        with self._lock:
+            self._resampled[cache_key] = result
+        return result
+
+    def find_series(self, **filters):
+        """
+        Raw series matching SDMX dimension filters, resolved through the index postings
+        of each theme (e.g. find_series(THEME='ipc', FREQ='M'), find_series(INDICATOR=['ENDA_XDC_USD_RATE'])).
+        A THEME filter only loads the partitions of those themes.
+        Returns [{'theme', 'row', 'dimensions', 'name', 'unit_mult'}] (row: within its theme's index).
+        """
+        themes = filters.get(THEME_DIMENSION, self.get_themes())
+        themes = [themes] if isinstance(themes, str) else themes
+        found = []
+        for theme in themes:
+            partition = self._theme(theme)
+            if partition is None:
+                continue
+            index = partition['index']
+            found.extend(
+                {'theme': theme, 'row': row, 'dimensions': index.dims(row), **index.attributes[row]}
+                for row in index.select(**filters).tolist()
+            )
+        return found
+
+    def get_raw_series(self, theme, row):
+        """
+        Original observations of a row of a theme's index:
+        {'dimensions', 'name', 'unit_mult', 'periods', 'values'}.
+        """
+        index = self._theme(theme)['index']
+        dims = index.dims(row)
+        periods, values = index.observations(row)
+        return {
+            'dimensions': dims,
+            **index.attributes[row],
+            'periods': [_format_period(p, dims['FREQ']) for p in periods.tolist()],
+            'values': values.tolist(),
+        }
+
+    def get_themes(self):
+        """Themes with an XML file (partitions anstat.<theme>)."""
+        return list(self.files)
+
     def get_all_series_keys(self):
-        """Return all series keys."""
+        """Return all series keys (loads every theme)."""
         return list(self.series.keys())
 
     def get_series_by_theme(self, theme):
         """Return all series keys for a given theme."""
-        return self.themes.get(theme, [])
+        partition = self._theme(theme)
+        return list(partition['series']) if partition is not None else []
 
     def get_series_count(self):
-        """Return total number of loaded series."""
+        """Return total number of series (loads every theme)."""
         return len(self.series)
 
 
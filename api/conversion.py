@@ -0,0 +1,128 @@
+"""
+Conversion des séries entre devises et échelles (XOF ↔ USD, Millions ↔ Mds…).
+
+L'unité de chaque ligne de la matrice alignée (series_matrix) est lue une fois par
+version des données (voir units.parse_unit) ; le taux XOF par USD est la série ANStat
+taux_change (moyenne de période), complétée par PA.NUS.FCRF (Banque Mondiale) pour
+les années qu'elle ne couvre pas. Les conversions sont des opérations NumPy sur
+l'axe d'années complet ; seuls les montants à prix courants sont convertibles d'une
+devise à l'autre (un montant à prix constants n'a pas de taux de l'année).
+"""
+import threading
+
+import numpy as np
+
+from .national_data_service import national_data_service as nds
+from .series_matrix import series_matrix
+from .units import CURRENCIES, PRICES_CURRENT, USD, XOF, format_unit, parse_unit
+
+# Sources du taux XOF par USD, par ordre de priorité
+FX_CODES = (
+    'NAT.anstat.taux_change.ENDA_XDC_USD_RATE',
+    'PA.NUS.FCRF',
+)
+
+
+class CurrencyConverter:
+    """Singleton : unités des séries et taux de change pour la version courante des données"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._version = None
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    def _ensure(self):
+        series_matrix.ensure()
+        if self._version != series_matrix.version:
+            with self._lock:
+                if self._version != series_matrix.version:
+                    self._build()
+                    self._version = series_matrix.version
+
+    def _build(self):
+        specs = [parse_unit(unit, self._unit_mult(code))
+                 for code, unit in zip(series_matrix.codes, series_matrix.units)]
+        self.currencies = np.array([currency or '' for currency, _, _ in specs])
+        self.scales = np.array([scale for _, scale, _ in specs], dtype=np.float64)
+        self.prices = np.array([prices or '' for _, _, prices in specs])
+
+        rate = np.full(len(series_matrix.years), np.nan)
+        for code in FX_CODES:
+            i = series_matrix.index.get(code)
+            if i is not None:
+                rate = np.where(np.isnan(rate), series_matrix.values[i], rate)
+        self.xof_per_usd = rate
+
+    @staticmethod
+    def _unit_mult(code):
+        """Attribut SDMX UNIT_MULT d'une série ANStat (None pour les autres sources)."""
+        if not code.startswith('NAT.anstat.'):
+            return None
+        return nds.anstat.series.get(code[len('NAT.anstat.'):], {}).get('unit_mult')
+
+    # ─────────────────────────────────────────────────
+    # Accès
+    # ─────────────────────────────────────────────────
+    def unit_of(self, code):
+        """(devise, échelle, prix) de la série `code`, None si le code est inconnu."""
+        self._ensure()
+        i = series_matrix.index.get(code)
+        if i is None:
+            return None
+        return self.currencies[i] or None, float(self.scales[i]), self.prices[i] or None
+
+    def factors(self, currency, scale, prices, target, target_scale=None):
+        """
+        Facteurs (un par année) qui expriment un montant (devise, échelle, prix) dans la
+        devise `target` à l'échelle `target_scale` (par défaut, l'échelle d'origine).
+        Lève ValueError si la conversion est impossible.
+        """
+        self._ensure()
+        if target not in CURRENCIES:
+            raise ValueError(f'devise inconnue "{target}" (disponibles : {", ".join(CURRENCIES)})')
+        if currency not in CURRENCIES:
+            raise ValueError('la série n\'est pas un montant en XOF ou en USD')
+        if target_scale is None:
+            target_scale = scale
+        factor = np.full(len(series_matrix.years), scale / target_scale)
+        if currency == target:
+            return factor
+        if prices != PRICES_CURRENT:
+            raise ValueError('conversion de devise possible uniquement pour les montants à prix courants')
+        return factor / self.xof_per_usd if target == USD else factor * self.xof_per_usd
+
+    def convert(self, values, unit, target, target_scale=None):
+        """
+        (valeurs converties, nouvelle unité) d'une série alignée sur series_matrix.years
+        exprimée dans `unit`. Les années sans taux de change deviennent NaN.
+        """
+        currency, scale, prices = parse_unit(unit)
+        factor = self.factors(currency, scale, prices, target, target_scale)
+        new_unit = format_unit(target, scale if target_scale is None else target_scale, prices)
+        return values * factor, new_unit
+
+    def convert_rows(self, rows, target, target_scale=1.0):
+        """
+        Lignes `rows` de la matrice alignée exprimées dans une même devise et une même
+        échelle (calcul vectorisé sur toutes les lignes) ; les lignes qui ne sont pas
+        des montants convertibles sont à NaN.
+        """
+        self._ensure()
+        if target not in CURRENCIES:
+            raise ValueError(f'devise inconnue "{target}" (disponibles : {", ".join(CURRENCIES)})')
+        rows = np.asarray(rows, dtype=np.int64)
+        currencies = self.currencies[rows]
+        same = currencies == target
+        other = (currencies == (XOF if target == USD else USD)) & (self.prices[rows] == PRICES_CURRENT)
+        fx = 1.0 / self.xof_per_usd if target == USD else self.xof_per_usd
+        factor = np.where(same[:, None], 1.0, np.where(other[:, None], fx[None, :], np.nan))
+        factor *= (self.scales[rows] / target_scale)[:, None]
+        return series_matrix.values[rows] * factor
+
+
+# Singleton
+currency_converter = CurrencyConverter()
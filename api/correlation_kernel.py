@@ -0,0 +1,112 @@
+"""
+Noyau de calcul des corrélations (Pearson / Spearman) entre toutes les séries,
+sur la matrice alignée indicateurs × années, avec suppression par paire des
+années manquantes et un recouvrement minimal.
+
+Module volontairement limité à NumPy : il est importé par les processus du pool
+(voir correlation_service), qui ne doivent pas charger les données ni Django.
+"""
+import numpy as np
+
+METHODS = ('pearson', 'spearman')
+
+# État des processus du pool, initialisé une fois par processus (init_worker)
+_state = {}
+
+
+def init_worker(values, min_overlap, top_k):
+    """Prépare les tableaux partagés par tous les blocs de lignes d'un processus."""
+    mask = ~np.isnan(values)
+    counts = mask.sum(axis=1)
+    filled = np.where(mask, values, 0.0)
+
+    # Pearson : séries centrées-réduites (la corrélation est invariante par transformation affine)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = filled.sum(axis=1) / counts
+        std = np.sqrt((np.where(mask, values - mean[:, None], 0.0) ** 2).sum(axis=1) / counts)
+        z = np.where(mask & (std[:, None] > 0), (values - mean[:, None]) / std[:, None], 0.0)
+
+    # Spearman : comparaisons deux à deux des années de chaque série,
+    # cmp[j, s, t] = 1 si x_j[s] < x_j[t], 0.5 si égalité (s ≠ t) — le rang de t
+    # parmi les années d'un masque m vaut alors m @ cmp[j][:, t] (+1, rangs moyens)
+    x_s = filled[:, :, None]
+    x_t = filled[:, None, :]
+    both = mask[:, :, None] & mask[:, None, :]
+    cmp = np.where(both, (x_s < x_t) + 0.5 * (x_s == x_t), 0.0)
+    idx = np.arange(values.shape[1])
+    cmp[:, idx, idx] = 0.0
+
+    _state.update(
+        mask=mask.astype(np.float64), z=z, cmp=cmp,
+        min_overlap=min_overlap, top_k=top_k,
+    )
+
+
+def _pearson_block(rows):
+    """Corrélations de Pearson (recouvrement par paire) des lignes `rows` avec toutes les séries."""
+    m, z = _state['mask'], _state['z']
+    mb, zb = m[rows], z[rows]
+    n = mb @ m.T
+    sx = zb @ m.T
+    sy = mb @ z.T
+    sxx = (zb ** 2) @ m.T
+    syy = mb @ (z ** 2).T
+    sxy = zb @ z.T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sxy - sx * sy / n
+        vx = sxx - sx ** 2 / n
+        vy = syy - sy ** 2 / n
+        r = cov / np.sqrt(vx * vy)
+    r[(n < _state['min_overlap']) | (vx <= 1e-12) | (vy <= 1e-12)] = np.nan
+    return r, n
+
+
+def _spearman_row(i):
+    """Corrélations de Spearman exactes de la ligne i : rangs recalculés sur chaque recouvrement."""
+    m, cmp = _state['mask'], _state['cmp']
+    overlap = m * m[i]                                       # (n, T)
+    rank_x = overlap @ cmp[i]                                # rangs de x_i dans chaque recouvrement
+    rank_y = np.einsum('js,jst->jt', overlap, cmp)           # rangs de x_j dans le même recouvrement
+    n = overlap.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mx = (rank_x * overlap).sum(axis=1) / n
+        my = (rank_y * overlap).sum(axis=1) / n
+        dx = (rank_x - mx[:, None]) * overlap
+        dy = (rank_y - my[:, None]) * overlap
+        vx = (dx ** 2).sum(axis=1)
+        vy = (dy ** 2).sum(axis=1)
+        r = (dx * dy).sum(axis=1) / np.sqrt(vx * vy)
+    r[(n < _state['min_overlap']) | (vx <= 1e-12) | (vy <= 1e-12)] = np.nan
+    return r
+
+
+def _top_k(r, n, row):
+    """Indices, coefficients et recouvrements des k meilleurs partenaires (|r| décroissant)."""
+    k = _state['top_k']
+    r = r.copy()
+    r[row] = np.nan
+    valid = np.nonzero(~np.isnan(r))[0]
+    order = valid[np.argsort(-np.abs(r[valid]), kind='stable')][:k]
+    idx = np.full(k, -1, dtype=np.int64)
+    coef = np.full(k, np.nan)
+    overlap = np.zeros(k, dtype=np.int64)
+    idx[:len(order)] = order
+    coef[:len(order)] = r[order]
+    overlap[:len(order)] = n[order]
+    return idx, coef, overlap
+
+
+def correlate_rows(start, stop):
+    """
+    Top-k des partenaires des lignes [start, stop) pour chaque méthode :
+    {méthode: (indices (B, k), coefficients (B, k), recouvrements (B, k))}.
+    """
+    rows = np.arange(start, stop)
+    pearson, counts = _pearson_block(rows)
+    result = {method: ([], [], []) for method in METHODS}
+    for offset, row in enumerate(rows):
+        n = counts[offset]
+        for method, r in (('pearson', pearson[offset]), ('spearman', _spearman_row(row))):
+            for acc, part in zip(result[method], _top_k(r, n, row)):
+                acc.append(part)
+    return start, {method: tuple(np.array(part) for part in parts) for method, parts in result.items()}
@@ -0,0 +1,206 @@
+"""
+Corrélations précalculées entre toutes les séries (Banque Mondiale, nationales, ANStat).
+
+Les corrélations de Pearson et de Spearman de chaque paire de séries (années communes
+uniquement, au moins MIN_OVERLAP) sont calculées par blocs de lignes dans un pool de
+processus (voir correlation_kernel) ; seuls les TOP_K meilleurs partenaires de chaque
+série sont conservés. Le résultat est la partition 'correlations' (voir partitions) :
+calculé une fois par version des données par `python manage.py build_partitions`, puis
+relu depuis son instantané par chaque worker (chargement en arrière-plan au démarrage,
+askfordata/wsgi.py, qui ne calcule jamais). Sans instantané, la première requête
+/api/correlations le fait calculer par un seul processus, les autres l'attendent.
+
+À la taille actuelle de la matrice, le calcul en série est plus rapide que le pool
+(démarrage des processus spawn, copie de la matrice dans chacun) : le pool n'est
+utilisé qu'à partir de PARALLEL_MIN_ROWS séries.
+Une question « qu'est-ce qui est corrélé à X » se résout ensuite par une simple lecture.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from django.conf import settings
+
+from . import correlation_kernel
+from .correlation_kernel import METHODS
+from .dataset_version import get_dataset_version
+from .partitions import partition_store
+from .series_matrix import series_matrix
+
+logger = logging.getLogger('api')
+
+# Années communes minimales : en deçà, Spearman donne de nombreux r = ±1 fortuits
+# (deux tendances monotones sur 6 ans). Les séries nationales les plus courtes (5 à 9 ans)
+# n'ont donc pas de partenaires ; le nombre d'années communes est renvoyé avec chaque coefficient
+MIN_OVERLAP = 10
+TOP_K = 20
+DEFAULT_TOP = 10
+
+# Lignes par tâche envoyée au pool
+ROWS_PER_TASK = 64
+
+# Nombre de séries à partir duquel le pool de processus est plus rapide que le calcul en série
+PARALLEL_MIN_ROWS = 10000
+
+
+class CorrelationService:
+    """Singleton : top-k des partenaires corrélés de chaque série, chargé en arrière-plan"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._version = None    # version des données des résultats disponibles
+            cls._instance._pending = None    # version en cours de calcul
+            cls._instance._result = None     # {'codes', 'index', 'partners': {méthode: (idx, r, n)}}
+            cls._instance._lock = threading.Lock()
+            cls._instance._done = threading.Event()
+            partition_store.register('correlations', cls._instance._compute)
+        return cls._instance
+
+    # ─────────────────────────────────────────────────
+    # Calcul
+    # ─────────────────────────────────────────────────
+    @staticmethod
+    def _workers():
+        workers = getattr(settings, 'CORRELATION_WORKERS', None)
+        if workers is None:
+            workers = min(4, os.cpu_count() or 1)
+        return int(workers)
+
+    def _compute(self):
+        """Partition 'correlations' : {'codes', 'index', 'partners'} pour la matrice courante."""
+        series_matrix.ensure()
+        start = time.perf_counter()
+        values = series_matrix.values.copy()
+        codes = list(series_matrix.codes)
+        n_rows = len(codes)
+        bounds = [(lo, min(lo + ROWS_PER_TASK, n_rows)) for lo in range(0, n_rows, ROWS_PER_TASK)]
+        workers = self._workers() if n_rows >= PARALLEL_MIN_ROWS else 0
+
+        blocks = {}
+        if workers > 0:
+            try:
+                # spawn : les processus n'importent que correlation_kernel (ni Django ni les données)
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=correlation_kernel.init_worker,
+                    initargs=(values, MIN_OVERLAP, TOP_K),
+                ) as pool:
+                    for lo, block in pool.map(correlation_kernel.correlate_rows, *zip(*bounds)):
+                        blocks[lo] = block
+            except (OSError, RuntimeError, BrokenProcessPool) as e:
+                logger.warning(f"Pool de processus indisponible pour les corrélations ({e}) : calcul local")
+                workers = 0
+        if workers == 0:
+            correlation_kernel.init_worker(values, MIN_OVERLAP, TOP_K)
+            for lo, hi in bounds:
+                blocks[lo] = correlation_kernel.correlate_rows(lo, hi)[1]
+
+        ordered = [blocks[lo] for lo, _ in bounds]
+        partners = {
+            method: tuple(np.concatenate([block[method][part] for block in ordered]) for part in range(3))
+            for method in METHODS
+        }
+        logger.info("✓ Corrélations: %d séries, top %d (%d processus, %.1fs)",
+                    n_rows, TOP_K, workers, time.perf_counter() - start)
+        return {
+            'codes': codes,
+            'index': {code: i for i, code in enumerate(codes)},
+            'partners': partners,
+        }
+
+    def _run(self, version, build):
+        try:
+            series_matrix.ensure()  # noms, unités et sources des partenaires
+            result = partition_store.get('correlations', build=build)
+            if result is None:
+                logger.info("Corrélations : pas d'instantané (manage.py build_partitions), "
+                            "calculées à la première requête")
+                return
+            self._result = result
+            self._version = version
+        except Exception as e:
+            logger.error(f"Erreur chargement des corrélations: {e}")
+        finally:
+            with self._lock:
+                self._pending = None
+            self._done.set()
+
+    def start(self, build=True):
+        """
+        Charge les résultats en arrière-plan s'ils ne sont pas à jour (non bloquant) ;
+        sans instantané, les calcule si `build` est vrai.
+        """
+        version = get_dataset_version()['version']
+        with self._lock:
+            if self._version == version or self._pending == version:
+                return
+            self._pending = version
+            self._done.clear()
+        threading.Thread(target=self._run, args=(version, build), name='correlations', daemon=True).start()
+
+    def wait(self, timeout=None):
+        """Attend la fin du calcul en cours. Retourne True si des résultats à jour sont disponibles."""
+        self.start()
+        self._done.wait(timeout)
+        return self.is_ready()
+
+    def is_ready(self):
+        return self._result is not None and self._version == get_dataset_version()['version']
+
+    # ─────────────────────────────────────────────────
+    # Accès
+    # ─────────────────────────────────────────────────
+    def get_partners(self, code, method='pearson', top=DEFAULT_TOP, source=None):
+        """
+        Séries les plus corrélées à `code` (|r| décroissant) :
+        [{'code', 'name', 'unit', 'source', 'r', 'overlap'}].
+        Retourne None si le code est inconnu ; lève RuntimeError si le calcul n'est pas terminé.
+        """
+        self.start()
+        if not self.is_ready():
+            raise RuntimeError('corrélations en cours de calcul')
+        result = self._result
+        row = result['index'].get(code)
+        if row is None:
+            return None
+
+        idx, coef, overlap = (part[row] for part in result['partners'][method])
+        partners = []
+        for j, r, n in zip(idx.tolist(), coef.tolist(), overlap.tolist()):
+            if j < 0:
+                break
+            partner = result['codes'][j]
+            if source is not None and series_matrix.families[j] != source:
+                continue
+            partners.append({
+                'code': partner,
+                'name': series_matrix.names[j],
+                'unit': series_matrix.units[j],
+                'source': series_matrix.sources[j],
+                'r': round(r, 4),
+                'overlap': n,
+            })
+            if len(partners) >= top:
+                break
+        return partners
+
+    def describe(self, code, top=5):
+        """Corrélations de `code` sous forme de lignes de texte (prompts), [] si indisponibles."""
+        try:
+            partners = self.get_partners(code, 'pearson', top)
+        except RuntimeError:
+            return []
+        return [f"{p['name']} : r = {p['r']:+.2f} ({p['overlap']} années communes)" for p in partners or []]
+
+
+# Singleton
+correlation_service = CorrelationService()
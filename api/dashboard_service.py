@@ -0,0 +1,569 @@
+"""
+Payload du dashboard (/api/dashboard-data) précalculé une fois par version des données.
+Les données sont découpées en sections indépendantes (kpis, macro, tofe, anstat.monetary, ...) :
+chaque section est sérialisée une seule fois, et chaque combinaison demandée est stockée
+compressée (gzip + brotli) avec son ETag.
+"""
+import hashlib
+import logging
+import threading
+
+from django.utils.safestring import mark_safe
+
+from .data_service import data_service
+from .national_data_service import national_data_service as nds, TOP_PRODUCTS
+from .anstat_sdmx_service import anstat_sdmx_service as anstat
+from .dataset_version import get_dataset_version
+from .http_cache import serialize_json, precompress
+from .movers_service import movers_service
+
+logger = logging.getLogger('api')
+
+
+# ─────────────────────────────────────────────────────
+# SÉRIES DU DASHBOARD
+# ─────────────────────────────────────────────────────
+# Banque Mondiale : section → [(clé, code)] — 10 dernières valeurs
+DASHBOARD_WB_SECTIONS = {
+    'macro': [  # Macro
+        ('gdp_nominal', 'NY.GDP.MKTP.CD'),
+        ('gdp_growth', 'NY.GDP.MKTP.KD.ZG'),
+        ('gdp_per_capita', 'NY.GDP.PCAP.CD'),
+        ('inflation', 'FP.CPI.TOTL.ZG'),
+        ('exports_pct', 'NE.EXP.GNFS.ZS'),
+        ('imports_pct', 'NE.IMP.GNFS.ZS'),
+        ('fdi_pct', 'BX.KLT.DINV.WD.GD.ZS'),
+    ],
+    'demo': [  # Démographie
+        ('population', 'SP.POP.TOTL'),
+        ('pop_growth', 'SP.POP.GROW'),
+        ('urban_pct', 'SP.URB.TOTL.IN.ZS'),
+        ('fertility', 'SP.DYN.TFRT.IN'),
+        ('birth_rate', 'SP.DYN.CBRT.IN'),
+        ('death_rate', 'SP.DYN.CDRT.IN'),
+    ],
+    'sante': [  # Santé
+        ('life_expectancy', 'SP.DYN.LE00.IN'),
+        ('infant_mortality', 'SP.DYN.IMRT.IN'),
+        ('health_expenditure', 'SH.XPD.CHEX.GD.ZS'),
+        ('physicians', 'SH.MED.PHYS.ZS'),
+    ],
+    'education': [  # Éducation
+        ('primary_enroll', 'SE.PRM.ENRR'),
+        ('secondary_enroll', 'SE.SEC.ENRR'),
+        ('tertiary_enroll', 'SE.TER.ENRR'),
+        ('literacy', 'SE.ADT.LITR.ZS'),
+    ],
+    'emploi': [  # Emploi
+        ('unemployment', 'SL.UEM.TOTL.ZS'),
+        ('labor_force', 'SL.TLF.TOTL.IN'),
+    ],
+    'infra': [  # Infrastructure
+        ('electricity_access', 'EG.ELC.ACCS.ZS'),
+        ('electricity_consumption', 'EG.USE.ELEC.KH.PC'),
+        ('internet_users', 'IT.NET.USER.ZS'),
+        ('mobile_subscriptions', 'IT.CEL.SETS.P2'),
+    ],
+    'environnement': [  # Environnement
+        ('forest_pct', 'AG.LND.FRST.ZS'),
+        ('arable_land_pct', 'AG.LND.ARBL.ZS'),
+    ],
+    'pauvrete': [  # Pauvreté
+        ('poverty', 'SI.POV.NAHC'),
+        ('gini', 'SI.POV.GINI'),
+    ],
+}
+
+# Données nationales (TOFE, Douanes, Base Éco, Financements) : section → [(clé, source, clé source)]
+# (les top produits douaniers forment la section dynamique "produits")
+DASHBOARD_NATIONAL_SECTIONS = {
+    'pib_structure': [  # Structure PIB par secteur (% du PIB)
+        ('pib_primaire_pct', 'base_eco', 'pib_primaire_pct'),
+        ('pib_secondaire_pct', 'base_eco', 'pib_secondaire_pct'),
+        ('pib_tertiaire_pct', 'base_eco', 'pib_tertiaire_pct'),
+        ('pib_manufacturier_pct', 'base_eco', 'pib_manufacturier_pct'),
+        ('pib_btp_pct', 'base_eco', 'pib_btp_pct'),
+        ('pib_extractives_pct', 'base_eco', 'pib_extractives_pct'),
+        ('pib_commerce_pct', 'base_eco', 'pib_commerce_pct'),
+        ('pib_transports_pct', 'base_eco', 'pib_transports_pct'),
+    ],
+    'dette': [  # Dette publique (Base éco)
+        ('dette_pct_pib', 'base_eco', 'dette_pct_pib'),
+        ('dette_stock_total', 'base_eco', 'dette_stock_total'),
+        ('dette_exterieure_mds', 'base_eco', 'dette_exterieure_mds'),
+        ('dette_interieure_mds', 'base_eco', 'dette_interieure_mds'),
+    ],
+    'financements': [  # Ratios et service de la dette (Financements)
+        ('dette_pct_pib_fin', 'financements', 'dette_pct_pib'),
+        ('interets_pct_recettes', 'financements', 'interets_pct_recettes'),
+        ('interets_pct_pib', 'financements', 'interets_pct_pib'),
+        ('taux_interet_moyen', 'financements', 'taux_interet_moyen'),
+        ('duree_vie_moyenne', 'financements', 'duree_vie_moyenne'),
+        ('dette_ct_pct', 'financements', 'dette_ct_pct'),
+        ('dette_devises_pct', 'financements', 'dette_devises_pct'),
+        ('service_dette_total', 'financements', 'service_dette_total'),
+        ('remboursement_principal', 'financements', 'remboursement_principal'),
+        ('paiement_interets', 'financements', 'paiement_interets'),
+        ('service_ext_bilateral', 'financements', 'service_ext_bilateral'),
+        ('service_ext_multilateral', 'financements', 'service_ext_multilateral'),
+        ('service_ext_obligations', 'financements', 'service_ext_obligations'),
+    ],
+    'tofe': [  # TOFE + pression fiscale & solde calculés
+        ('recettes_et_dons', 'tofe', 'recettes_et_dons'),
+        ('recettes_fiscales', 'tofe', 'recettes_fiscales'),
+        ('depenses_totales', 'tofe', 'depenses_totales'),
+        ('solde_budgetaire', 'tofe', 'solde_budgetaire'),
+        ('depenses_investissement', 'tofe', 'depenses_investissement'),
+        ('remuneration_salaries', 'tofe', 'remuneration_salaries'),
+        ('interets_dette', 'tofe', 'interets_dette'),
+        ('dons', 'tofe', 'dons'),
+        ('impots_directs', 'tofe', 'impots_directs'),
+        ('impots_biens_services', 'tofe', 'impots_biens_services'),
+        ('droits_importation', 'tofe', 'droits_importation'),
+        ('taxes_exportation', 'tofe', 'taxes_exportation'),
+        ('subventions_transferts', 'tofe', 'subventions_transferts'),
+        ('depenses_fonctionnement', 'tofe', 'depenses_fonctionnement'),
+        ('financement_interieur', 'tofe', 'financement_interieur'),
+        ('financement_exterieur', 'tofe', 'financement_exterieur'),
+        ('pression_fiscale', 'tofe', 'pression_fiscale'),
+        ('solde_budgetaire_pct_pib', 'tofe', 'solde_budgetaire_pct_pib'),
+    ],
+    'douanes': [  # Commerce extérieur (Douanes)
+        ('imports_caf', 'douanes', 'imports_caf'),
+        ('exports_fob', 'douanes', 'exports_fob'),
+        ('solde_commercial', 'douanes', 'solde_commercial'),
+        ('taux_couverture', 'douanes', 'taux_couverture'),
+        ('export_europe', 'douanes', 'export_europe'),
+        ('export_afrique', 'douanes', 'export_afrique'),
+        ('export_asie', 'douanes', 'export_asie'),
+        ('export_amerique', 'douanes', 'export_amerique'),
+        ('export_agri_industrielle', 'douanes', 'export_agri_industrielle'),
+        ('export_premiere_transfo', 'douanes', 'export_premiere_transfo'),
+        ('export_manufactures', 'douanes', 'export_manufactures'),
+        ('export_miniers', 'douanes', 'export_miniers'),
+        ('recettes_douanieres_brutes', 'douanes', 'recettes_brutes'),
+    ],
+    'agro': [  # Agro-industrie
+        ('cacao_production', 'base_eco', 'cacao_production'),
+        ('cacao_transforme', 'base_eco', 'cacao_transforme'),
+        ('cacao_taux_transfo', 'base_eco', 'cacao_taux_transfo'),
+    ],
+    'pib': [  # PIB & investissement
+        ('pib_nominal_mxof', 'base_eco', 'pib_nominal_mxof'),
+        ('croissance_pib_reel', 'base_eco', 'croissance_pib_reel'),
+        ('taux_investissement', 'base_eco', 'taux_investissement'),
+        ('ide_total_mds', 'base_eco', 'ide_total_mds'),
+    ],
+    'emploi_secteurs': [  # Emploi par secteur
+        ('emploi_primaire', 'base_eco', 'emploi_primaire'),
+        ('emploi_secondaire', 'base_eco', 'emploi_secondaire'),
+        ('emploi_tertiaire', 'base_eco', 'emploi_tertiaire'),
+        ('emploi_total', 'base_eco', 'emploi_total'),
+    ],
+}
+
+# ANStat SDMX : section → [(clé, theme.CODE)]
+DASHBOARD_ANSTAT_SECTIONS = {
+    'anstat.production': [  # Production industrielle
+        ('ipi_total', 'production.AIP_IX'),
+        ('ipi_food', 'production.AIP_ISIC4_C10_IX'),
+        ('ipi_mining', 'production.AIP_ISIC4_B07_IX'),
+        ('ipi_refinery', 'production.AIP_ISIC4_C19_IX'),
+    ],
+    'anstat.prix': [  # Prix à la production et à la consommation
+        ('ippi_total', 'ipp.PPPI_IX'),
+        ('ipc_global', 'ipc.PCPI_IX'),
+        ('ipc_food', 'ipc.PCPI_CP_01_IX'),
+        ('ipc_transport', 'ipc.PCPI_CP_07_IX'),
+    ],
+    'anstat.monetary': [  # Monétaire
+        ('base_monetaire', 'banque_centrale.FASMB_XDC'),
+        ('masse_monetaire_m2', 'institutions_depot.FDSB_XDC'),
+        ('credit_economie', 'institutions_depot.FDSAO_XDC'),
+        ('actifs_ext_nets_bc', 'banque_centrale.FASF_XDC'),
+        ('creances_etat_bc', 'banque_centrale.FASG_XDC'),
+    ],
+    'anstat.taux': [  # Taux d'intérêt
+        ('taux_directeur', 'taux_interet.FPOLM_MIN_PA'),
+        ('taux_pret_marginal', 'taux_interet.FPOLM_MAR_PA'),
+        ('taux_debiteur', 'taux_interet.FILR_PA'),
+        ('taux_crediteur', 'taux_interet.FIDR_PA'),
+    ],
+    'anstat.change': [  # Taux de change
+        ('taux_change_usd_avg', 'taux_change.ENDA_XDC_USD_RATE'),
+        ('taux_change_usd_end', 'taux_change.ENDE_XDC_USD_RATE'),
+    ],
+    'anstat.reserves': [  # Réserves
+        ('reserves_officielles', 'reserves.MAU_RAFA_XDC'),
+    ],
+    'anstat.bdp': [  # Balance des paiements
+        ('compte_courant_bdp', 'balance_paiements.BCA_BP6_XDC'),
+        ('balance_biens_bdp', 'balance_paiements.BG_BP6_XDC'),
+        ('exports_biens_bdp', 'balance_paiements.BXG_BP6_XDC'),
+        ('imports_biens_bdp', 'balance_paiements.BMG_BP6_XDC'),
+        ('ide_nets_bdp', 'balance_paiements.BFDA_BP6_XDC'),
+    ],
+    'anstat.dette_ext': [  # Dette extérieure
+        ('dette_ext_brute', 'dette_ext.D_BP6_XDC'),
+        ('dette_ext_admin', 'dette_ext.DG_BP6_XDC'),
+    ],
+    'anstat.population': [  # Population ANStat
+        ('pop_anstat_total', 'population.P3'),
+        ('pop_anstat_homme', 'population.P1'),
+        ('pop_anstat_femme', 'population.P2'),
+    ],
+    'anstat.social': [  # Social
+        ('scolarisation_primaire', 'social.I3'),
+        ('scolarisation_secondaire', 'social.I2'),
+        ('esperance_vie_anstat', 'social.I9'),
+        ('mortalite_infantile_anstat', 'social.I16'),
+        ('taux_croissance_demo', 'social.I7'),
+        ('fecondite_anstat', 'social.I12'),
+        ('taux_natalite', 'social.I14'),
+        ('taux_mortalite', 'social.I15'),
+    ],
+    'anstat.emploi': [  # Emploi
+        ('immatriculations_cnps', 'emploi.LENE_VS_PE_NUM'),
+        ('immatriculations_cgreae', 'emploi.LENE_PS_PE_NUM'),
+    ],
+    'anstat.tofe': [  # TOFE SDMX (séries mensuelles agrégées à l'année, plus longues que TOFE Excel)
+        ('tofe_sdmx_recettes', 'tofe_sdmx.CIV_CGO_R_XDC'),
+        ('tofe_sdmx_recettes_fiscales', 'tofe_sdmx.CIV_CGO_RF_XDC'),
+        ('tofe_sdmx_depenses', 'tofe_sdmx.CIV_CGO_DL_XDC'),
+        ('tofe_sdmx_solde', 'tofe_sdmx.CIV_CGO_SB_XDC'),
+        ('tofe_sdmx_solde_pib', 'tofe_sdmx.CIV_CGO_SB_GDP'),
+        ('tofe_sdmx_investissement', 'tofe_sdmx.CIV_CGO_DI_XDC'),
+        ('tofe_sdmx_personnel', 'tofe_sdmx.CIV_CGO_DCP_XDC'),
+        ('tofe_sdmx_interets', 'tofe_sdmx.CIV_CGO_IDP_XDC'),
+        ('tofe_sdmx_dgi', 'tofe_sdmx.CIV_CGO_RFI_XDC'),
+        ('tofe_sdmx_dgd', 'tofe_sdmx.CIV_CGO_RFC_XDC'),
+    ],
+}
+
+WB_SERIES_POINTS = 10
+KPI_CODES = ['NY.GDP.MKTP.CD', 'NY.GDP.MKTP.KD.ZG', 'FP.CPI.TOTL.ZG', 'SP.POP.TOTL',
+             'SP.POP.GROW', 'SP.DYN.LE00.IN', 'SL.UEM.TOTL.ZS']
+
+# Blocs du payload, dans l'ordre de sérialisation
+PAYLOAD_BLOCKS = ['kpis', 'series', 'national', 'anstat', 'insights']
+
+# Section → bloc du payload
+SECTION_BLOCKS = {'kpis': 'kpis'}
+SECTION_BLOCKS.update({name: 'series' for name in DASHBOARD_WB_SECTIONS})
+SECTION_BLOCKS.update({name: 'national' for name in DASHBOARD_NATIONAL_SECTIONS})
+SECTION_BLOCKS['produits'] = 'national'
+SECTION_BLOCKS.update({name: 'anstat' for name in DASHBOARD_ANSTAT_SECTIONS})
+# Faits marquants (movers_service) : phrases prêtes à afficher
+SECTION_BLOCKS['notable'] = 'insights'
+
+DASHBOARD_SECTIONS = list(SECTION_BLOCKS)
+
+# Nombre maximal de combinaisons de sections gardées pré-compressées
+MAX_CACHED_COMBINATIONS = 64
+
+# Sections de /api/dashboard-data nécessaires à chaque onglet du dashboard, transmises
+# à static/js/dashboard-v3.js dans la page (<script id="dashboard-tabs">, voir la vue dashboard)
+DASHBOARD_TABS = {
+    'section-overview': ['macro', 'demo', 'sante', 'education', 'emploi', 'infra', 'environnement',
+                         'pib_structure', 'financements', 'tofe', 'douanes', 'agro',
+                         'anstat.production', 'anstat.prix', 'anstat.monetary', 'anstat.taux',
+                         'anstat.change', 'anstat.social', 'anstat.tofe'],
+    'section-macro': ['macro', 'pib_structure', 'financements', 'tofe', 'douanes', 'anstat.tofe'],
+    'section-finance': ['dette', 'financements', 'tofe', 'anstat.tofe'],
+    'section-demo': ['demo', 'sante', 'anstat.population', 'anstat.social'],
+    'section-sec-primary': ['pib_structure', 'agro', 'emploi_secteurs'],
+    'section-sec-secondary': ['anstat.production', 'anstat.prix', 'anstat.emploi'],
+    'section-sec-tertiary': ['infra', 'anstat.monetary'],
+    'section-education': ['education', 'anstat.social'],
+    'section-emploi': ['emploi', 'anstat.emploi'],
+    'section-sante': ['sante', 'anstat.social'],
+    'section-territory': ['macro', 'demo', 'education', 'emploi', 'infra'],
+    'section-inter': ['macro', 'tofe', 'financements', 'douanes', 'pib', 'produits',
+                      'anstat.change', 'anstat.bdp'],
+}
+
+# Données intégrées dans la page /dashboard/ : les KPIs, et un aperçu des sections de
+# l'onglet d'ouverture réduit aux BOOTSTRAP_POINTS dernières valeurs de chaque série, sans
+# noms ni années (ce que tracent ses mini-graphiques) ; les sections complètes suivent par l'API
+BOOTSTRAP_SECTIONS = ['kpis']
+PREVIEW_SECTIONS = DASHBOARD_TABS['section-overview']
+BOOTSTRAP_POINTS = 6
+BOOTSTRAP_ELEMENT_ID = 'dashboard-bootstrap'
+
+# Échappements de django.utils.html.json_script, appliqués une fois aux octets JSON
+_JSON_SCRIPT_ESCAPES = ((b'&', b'\\u0026'), (b'<', b'\\u003C'), (b'>', b'\\u003E'))
+
+
+class DashboardService:
+    """Construit et garde en mémoire le payload du dashboard pour la version courante des données."""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._version = None
+            cls._instance._fragments = {}  # section → octets JSON du contenu du bloc (sans accolades)
+            cls._instance._previews = {}   # section → fragment réduit aux BOOTSTRAP_POINTS dernières valeurs
+            cls._instance._blobs = {}      # tuple de sections → représentations pré-compressées
+            cls._instance._manifest = {}   # section → {'block', 'hash', 'keys'} (cache navigateur)
+            cls._instance._bootstrap = (None, None)  # (version des données, balise <script>)
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    # ─────────────────────────────────────────────────
+    # Construction
+    # ─────────────────────────────────────────────────
+    @staticmethod
+    def _wb_values(code):
+        """Valeurs {year, value} d'un indicateur Banque Mondiale (une seule lecture par code)."""
+        detail = data_service.get_indicator_detail(code)
+        if not detail or not detail.get('values'):
+            return None, []
+        return detail['name'], detail['values']
+
+    @staticmethod
+    def _point(values, offset):
+        """Retourne la valeur à la position `offset` depuis la fin (-1 = dernière)."""
+        if len(values) < -offset:
+            return {'year': None, 'value': None}
+        v = values[offset]
+        return {'year': v['year'], 'value': round(v['value'], 4)}
+
+    def _build_kpis(self, cache):
+        def latest(code):
+            return self._point(cache[code][1], -1)
+
+        def prev(code):
+            return self._point(cache[code][1], -2)
+
+        gdp = latest('NY.GDP.MKTP.CD')
+        gdp_growth = latest('NY.GDP.MKTP.KD.ZG')
+        inflation = latest('FP.CPI.TOTL.ZG')
+        inflation_prev = prev('FP.CPI.TOTL.ZG')
+        pop = latest('SP.POP.TOTL')
+        pop_growth = latest('SP.POP.GROW')
+        life_exp = latest('SP.DYN.LE00.IN')
+        life_exp_prev = prev('SP.DYN.LE00.IN')
+        unemp = latest('SL.UEM.TOTL.ZS')
+
+        return {
+            'gdp': {
+                'value': f"${gdp['value']/1e9:.1f} Mrd" if gdp['value'] else 'N/A',
+                'year': gdp['year'],
+                'trend': f"+{gdp_growth['value']:.1f}% vs n-1" if gdp_growth['value'] and gdp_growth['value'] > 0 else f"{gdp_growth['value']:.1f}% vs n-1" if gdp_growth['value'] else '',
+                'dir': 'up' if gdp_growth['value'] and gdp_growth['value'] > 0 else 'down',
+            },
+            'inflation': {
+                'value': f"{inflation['value']:.1f}%" if inflation['value'] else 'N/A',
+                'year': inflation['year'],
+                'trend': 'En baisse' if inflation_prev['value'] and inflation['value'] and inflation['value'] < inflation_prev['value'] else 'En hausse',
+                'dir': 'up' if inflation_prev['value'] and inflation['value'] and inflation['value'] < inflation_prev['value'] else 'down',
+            },
+            'pop': {
+                'value': f"{pop['value']/1e6:.1f} M" if pop['value'] else 'N/A',
+                'year': pop['year'],
+                'trend': f"+{pop_growth['value']:.1f}% an" if pop_growth['value'] else '',
+                'dir': 'neutral',
+            },
+            'life': {
+                'value': f"{life_exp['value']:.1f} Ans" if life_exp['value'] else 'N/A',
+                'year': life_exp['year'],
+                'trend': f"+{life_exp['value'] - life_exp_prev['value']:.1f}" if life_exp['value'] and life_exp_prev['value'] else '',
+                'dir': 'up' if life_exp['value'] and life_exp_prev['value'] and life_exp['value'] > life_exp_prev['value'] else 'neutral',
+            },
+            'unemp': {
+                'value': f"{unemp['value']:.1f}%" if unemp['value'] else 'N/A',
+                'year': unemp['year'],
+                'trend': 'Au sens BIT',
+                'dir': 'neutral',
+            },
+        }
+
+    @staticmethod
+    def _wb_series(code, name, values, n_last=WB_SERIES_POINTS):
+        """Les n dernières valeurs d'un indicateur : {years, values, name}."""
+        if not values:
+            return {'years': [], 'values': [], 'name': code}
+        vals = values[-n_last:]
+        return {
+            'years': [v['year'] for v in vals],
+            'values': [round(v['value'], 4) for v in vals],
+            'name': name,
+        }
+
+    @staticmethod
+    def _national_series(source, key):
+        """Série nationale {years, values, name} (y compris les ratios calculés)."""
+        if source == 'tofe' and key == 'pression_fiscale':
+            return nds.get_pression_fiscale()
+        if source == 'tofe' and key == 'solde_budgetaire_pct_pib':
+            return nds.get_solde_budgetaire_pct_pib()
+        s = nds.get_series(source, key)
+        return {'years': s.get('years', []), 'values': s.get('values', []), 'name': s.get('name', key)}
+
+    @staticmethod
+    def _anstat_series(key):
+        """Série ANStat {years, values, name}."""
+        s = anstat.get_series(key)
+        return {'years': s.get('years', []), 'values': s.get('values', []), 'name': s.get('name', key)}
+
+    @staticmethod
+    def _top_products():
+        """Top produits exportés/importés (section dynamique 'produits')."""
+        data = {}
+        for i in range(TOP_PRODUCTS):
+            for key in (f'top_export_{i}', f'top_import_{i}'):
+                s = nds.get_series('douanes', key)
+                if s.get('values'):
+                    data[key] = {'years': s['years'], 'values': s['values'], 'name': s['name']}
+        return data
+
+    def build_sections(self):
+        """Construit le contenu de chaque section : {section: dict}."""
+        # Une seule lecture par code Banque Mondiale, partagée entre KPIs et séries
+        cache = {}
+        wb_codes = KPI_CODES + [code for entries in DASHBOARD_WB_SECTIONS.values() for _, code in entries]
+        for code in wb_codes:
+            if code not in cache:
+                cache[code] = self._wb_values(code)
+
+        sections = {'kpis': self._build_kpis(cache)}
+        for name, entries in DASHBOARD_WB_SECTIONS.items():
+            sections[name] = {key: self._wb_series(code, *cache[code]) for key, code in entries}
+        for name, entries in DASHBOARD_NATIONAL_SECTIONS.items():
+            sections[name] = {key: self._national_series(source, source_key) for key, source, source_key in entries}
+        sections['produits'] = self._top_products()
+        for name, entries in DASHBOARD_ANSTAT_SECTIONS.items():
+            sections[name] = {key: self._anstat_series(series_key) for key, series_key in entries}
+        sections['notable'] = {'notable': movers_service.notable()}
+        return sections
+
+    # ─────────────────────────────────────────────────
+    # Accès
+    # ─────────────────────────────────────────────────
+    @staticmethod
+    def normalize_sections(sections):
+        """
+        Valide et ordonne une liste de sections. None / vide → toutes les sections.
+        Lève ValueError pour une section inconnue.
+        """
+        if not sections:
+            return None
+        unknown = [s for s in sections if s not in SECTION_BLOCKS]
+        if unknown:
+            raise ValueError(', '.join(unknown))
+        requested = set(sections)
+        return tuple(name for name in DASHBOARD_SECTIONS if name in requested)
+
+    def _ensure_fragments(self, version):
+        """(Re)sérialise chaque section si la version des données a changé. Appelé sous verrou."""
+        if self._version == version:
+            return
+        fragments = {}
+        previews = {}
+        manifest = {}
+        for name, content in self.build_sections().items():
+            # Contenu du bloc sans les accolades, pour assembler plusieurs sections par concaténation
+            fragments[name] = serialize_json(content)[1:-1]
+            if name in PREVIEW_SECTIONS:
+                previews[name] = serialize_json({key: _tail(series, BOOTSTRAP_POINTS)
+                                                 for key, series in content.items()})[1:-1]
+            manifest[name] = {
+                'block': SECTION_BLOCKS[name],
+                'hash': hashlib.sha1(fragments[name]).hexdigest()[:12],
+                'keys': list(content),
+            }
+        self._fragments = fragments
+        self._previews = previews
+        self._manifest = manifest
+        self._blobs = {}
+        self._version = version
+
+    def _assemble(self, sections, fragments=None):
+        """Assemble le JSON d'une combinaison de sections à partir des fragments pré-sérialisés."""
+        fragments = fragments or self._fragments
+        parts = {block: [] for block in PAYLOAD_BLOCKS}
+        for name in sections:
+            fragment = fragments[name]
+            if fragment:
+                parts[SECTION_BLOCKS[name]].append(fragment)
+        requested_blocks = {SECTION_BLOCKS[name] for name in sections}
+
+        body = []
+        for block in PAYLOAD_BLOCKS:
+            if block in requested_blocks:
+                body.append(b'"' + block.encode() + b'":{' + b','.join(parts[block]) + b'}')
+        return b'{' + b','.join(body) + b'}'
+
+    def get_section_manifest(self):
+        """
+        Empreinte et clés de chaque section pour la version courante des données :
+        {section: {'block': str, 'hash': str, 'keys': [...]}}
+        """
+        dataset = get_dataset_version()
+        with self._lock:
+            self._ensure_fragments(dataset['version'])
+            return self._manifest
+
+    def get_bootstrap_script(self):
+        """
+        Balise <script type="application/json"> à insérer telle quelle dans dashboard_v3.html :
+        {"sections": BOOTSTRAP_SECTIONS, "data": {payload de ces sections},
+         "preview": {payload réduit de PREVIEW_SECTIONS}}. Rendue une fois par version des données.
+        """
+        dataset = get_dataset_version()
+        with self._lock:
+            self._ensure_fragments(dataset['version'])
+            version, script = self._bootstrap
+            if version == dataset['version']:
+                return script
+
+            body = (b'{"sections":' + serialize_json(BOOTSTRAP_SECTIONS)
+                    + b',"data":' + self._assemble(BOOTSTRAP_SECTIONS)
+                    + b',"preview":' + self._assemble(PREVIEW_SECTIONS, self._previews) + b'}')
+            for char, escaped in _JSON_SCRIPT_ESCAPES:
+                body = body.replace(char, escaped)
+            script = mark_safe(
+                f'<script id="{BOOTSTRAP_ELEMENT_ID}" type="application/json">{body.decode("utf-8")}</script>'
+            )
+            self._bootstrap = (dataset['version'], script)
+            return script
+
+    def get_payload(self, sections=None):
+        """
+        Retourne le payload sérialisé et pré-compressé pour la version courante des données :
+        {'identity', 'gzip', 'br', 'etag', 'last_modified'}
+        `sections` : tuple normalisé (voir normalize_sections) ou None pour le payload complet.
+        """
+        dataset = get_dataset_version()
+        combination = sections or tuple(DASHBOARD_SECTIONS)
+
+        blob = self._blobs.get(combination) if self._version == dataset['version'] else None
+        if blob is not None:
+            return blob
+
+        with self._lock:
+            self._ensure_fragments(dataset['version'])
+            blob = self._blobs.get(combination)
+            if blob is None:
+                suffix = hashlib.sha1(','.join(combination).encode()).hexdigest()[:8]
+                blob = precompress(self._assemble(combination),
+                                   etag=f"dash-{dataset['version']}-{suffix}",
+                                   last_modified=dataset['last_modified'])
+                if len(self._blobs) >= MAX_CACHED_COMBINATIONS:
+                    self._blobs.clear()
+                self._blobs[combination] = blob
+                logger.info("✓ Payload dashboard précalculé (%d sections): %d octets (gzip %d, br %s)",
+                            len(combination), len(blob['identity']), len(blob['gzip']),
+                            len(blob['br']) if blob['br'] is not None else '-')
+            return blob
+
+
+def _tail(series, points):
+    """Aperçu d'une série {years, values, ...} : ses `points` dernières valeurs seulement."""
+    return {'values': series['values'][-points:]}
+
+
+# Singleton
+dashboard_service = DashboardService()
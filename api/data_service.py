@@ -1,12 +1,16 @@
 """
 Service pour charger et gérer les données Excel
 """
+import numpy as np
 import pandas as pd
 import os
 import json
 from typing import Dict, List, Optional, Tuple
 from functools import lru_cache
 
+from .series_format import series_layout
+from .spreadsheet import read_frame, resolve_engine
+
 
 class DataService:
     """Service singleton pour gérer les données de la Côte d'Ivoire"""
@@ -15,6 +19,9 @@ class DataService:
     _data_df = None
     _excel_path = None
     _desc_cache = None
+    _code_index = None
+    _years = None
+    _matrix = None
     
     def __new__(cls):
         if cls._instance is None:
@@ -31,9 +38,21 @@ class DataService:
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self._excel_path = os.path.join(base_dir, 'data.xlsx')
         
-        print(f"Chargement des données depuis: {self._excel_path}")
-        self._data_df = pd.read_excel(self._excel_path, sheet_name='Data')
+        print(f"Chargement des données depuis: {self._excel_path} (lecteur {resolve_engine()})")
+        self._data_df = read_frame(self._excel_path, sheet_name='Data')
         print(f"✓ Données chargées: {len(self._data_df)} indicateurs")
+
+        # Index code → position de ligne (première occurrence, comme l'ancien filtre)
+        self._code_index = {}
+        for pos, code in enumerate(self._data_df['Series Code']):
+            if pd.notna(code):
+                self._code_index.setdefault(str(code), pos)
+
+        # Matrice indicateurs × années (NaN = pas de valeur) : les séries sont
+        # servies directement depuis ces tableaux, sans repasser par le DataFrame
+        year_columns = sorted(col for col in self._data_df.columns if isinstance(col, int))
+        self._years = np.array(year_columns, dtype=np.int64)
+        self._matrix = self._data_df[year_columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
         
         # Load French description cache
         cache_path = os.path.join(base_dir, 'descriptions_fr_cache.json')
@@ -132,28 +151,40 @@ class DataService:
             return ''
         return unit.replace('\xa0', ' ').strip()
 
-    def get_indicator_detail(self, code: str) -> Optional[Dict]:
-        """Retourne les détails complets d'un indicateur avec toutes ses valeurs"""
-        # Chercher l'indicateur dans les données
-        indicator_data = self._data_df[self._data_df['Series Code'] == code]
-        
-        if indicator_data.empty:
+    def _series_at(self, pos: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Années et valeurs renseignées (ordre chronologique) de la ligne `pos`."""
+        row = self._matrix[pos]
+        mask = ~np.isnan(row)
+        return self._years[mask], row[mask]
+
+    def get_series_arrays(self, code: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Retourne (années, valeurs) d'un indicateur sous forme de tableaux numpy"""
+        pos = self._code_index.get(str(code))
+        if pos is None:
+            return None
+        return self._series_at(pos)
+
+    def get_indicator_label(self, code: str) -> Optional[Tuple[str, str]]:
+        """Retourne (nom, unité) d'un indicateur, sans construire son détail"""
+        pos = self._code_index.get(str(code))
+        if pos is None:
+            return None
+        name = str(self._data_df['Indicateur'].iat[pos])
+        return name, self._clean_unit(self._infer_unit(name))
+
+    def get_indicator_detail(self, code: str, layout: str = 'records') -> Optional[Dict]:
+        """
+        Retourne les détails complets d'un indicateur avec toutes ses valeurs.
+        layout='records'  → values: [{'year', 'value'}, ...]
+        layout='columnar' → years: [...], values: [...]
+        """
+        # Chercher l'indicateur via l'index des codes (pas de scan du DataFrame)
+        pos = self._code_index.get(str(code))
+        if pos is None:
             return None
         
-        indicator_row = indicator_data.iloc[0]
-        
-        # Extraire les valeurs par année
-        year_columns = [col for col in self._data_df.columns if isinstance(col, int)]
-        year_columns.sort()  # Ensure chronological order
-        values = []
-        
-        for year in year_columns:
-            value = indicator_row[year]
-            if pd.notna(value):
-                values.append({
-                    'year': int(year),
-                    'value': float(value)
-                })
+        indicator_row = self._data_df.iloc[pos]
+        years, vals = self._series_at(pos)
         
         # Extraire les métadonnées directement depuis la feuille Data
         source_link = indicator_row.get('Liens', '')
@@ -179,7 +210,7 @@ class DataService:
             'source': 'Banque Mondiale (World Development Indicators)',
             'source_link': str(source_link) if pd.notna(source_link) else '',
             'methodology': methodo_str,
-            'values': values
+            **series_layout(years.tolist(), vals.tolist(), layout),
         }
     
     def search_indicators(self, query: str) -> List[Dict]:
@@ -0,0 +1,77 @@
+"""
+Version du jeu de données chargé en mémoire.
+L'identifiant est dérivé des empreintes SHA-256 des fichiers sources (data.xlsx,
+classeurs nationaux, XML ANStat, traductions, panel multi-pays) : il change dès qu'un fichier est remplacé.
+"""
+import hashlib
+import logging
+import os
+from pathlib import Path
+
+logger = logging.getLogger('api')
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Fichiers lus par data_service / national_data_service / anstat_sdmx_service / panel_store
+DATA_FILE_PATTERNS = [
+    'data.xlsx',
+    'descriptions_fr_cache.json',
+    'TOFE.xlsx',
+    'douanes.xlsx',
+    'Données de la base éco.xlsx',
+    'financements.xlsx',
+    '*.xml',
+    'panel/*.xlsx',
+]
+
+_current = None
+
+
+def _file_digest(path):
+    """SHA-256 d'un fichier, lu par blocs."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def compute_dataset_version():
+    """
+    Calcule la version à partir des fichiers présents sur disque.
+    Retourne {'version': str, 'last_modified': float (timestamp), 'files': {nom: sha256}}
+    """
+    files = {}
+    last_modified = 0.0
+    for pattern in DATA_FILE_PATTERNS:
+        for path in sorted(BASE_DIR.glob(pattern)):
+            if not path.is_file():
+                continue
+            files[path.relative_to(BASE_DIR).as_posix()] = _file_digest(path)
+            last_modified = max(last_modified, os.path.getmtime(path))
+
+    h = hashlib.sha256()
+    for name in sorted(files):
+        h.update(f"{name}:{files[name]}\n".encode())
+
+    return {
+        'version': h.hexdigest()[:20],
+        'last_modified': int(last_modified),
+        'files': files,
+    }
+
+
+def get_dataset_version():
+    """Version courante (calculée une fois par processus, comme le chargement des données)."""
+    global _current
+    if _current is None:
+        _current = compute_dataset_version()
+        logger.info("✓ Version des données: %s (%d fichiers)", _current['version'], len(_current['files']))
+    return _current
+
+
+def refresh_dataset_version():
+    """Recalcule la version après un rechargement des données."""
+    global _current
+    _current = None
+    return get_dataset_version()
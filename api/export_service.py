@@ -0,0 +1,150 @@
+"""
+Export CSV / XLSX d'un ensemble d'indicateurs (Banque Mondiale + nationaux).
+Les séries sont lues une à une depuis les tableaux en mémoire et écrites ligne
+par ligne : la mémoire utilisée ne dépend pas du nombre d'indicateurs exportés.
+"""
+import csv
+import tempfile
+
+from .data_service import data_service
+from .national_data_service import national_data_service as nds
+
+WB_SOURCE = 'Banque Mondiale (World Development Indicators)'
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+EXPORT_LAYOUTS = ('wide', 'long')
+EXPORT_SOURCES = ('wb', 'national')
+
+# Séparateur et BOM identiques à l'export CSV du front (compatibilité Excel FR)
+CSV_DELIMITER = ';'
+CSV_BOM = '\ufeff'
+
+META_HEADER = ['Code', 'Indicateur', 'Unité', 'Source']
+
+
+def resolve_export_codes(codes=None, search=None, source=None):
+    """
+    Codes à exporter : liste explicite, sinon tous les indicateurs (filtrés par
+    `search` sur nom / code / description, comme /api/indicators?search=).
+    `source` : 'wb' ou 'national' pour se limiter à une famille.
+    """
+    if codes:
+        selected = list(codes)
+    else:
+        indicators = []
+        if source in (None, 'wb'):
+            indicators.extend(data_service.get_all_indicators())
+        if source in (None, 'national'):
+            indicators.extend(nds.get_all_indicators_for_explorer())
+        if search:
+            search = search.lower()
+            indicators = [
+                ind for ind in indicators
+                if search in str(ind.get('name', '')).lower() or search in str(ind.get('code', '')).lower()
+                or search in str(ind.get('description', '')).lower()
+            ]
+        selected = [ind['code'] for ind in indicators]
+
+    if source == 'wb':
+        selected = [c for c in selected if not c.startswith('NAT.')]
+    elif source == 'national':
+        selected = [c for c in selected if c.startswith('NAT.')]
+    return selected
+
+
+def _load_series(code):
+    """(code, nom, unité, source, années, valeurs) d'un indicateur, ou None."""
+    if code.startswith('NAT.'):
+        detail = nds.get_indicator_detail_by_code(code, layout='columnar')
+        if detail is None:
+            return None
+        return (code, detail['name'], detail.get('unit', ''), detail.get('source', ''),
+                detail['years'], detail['values'])
+
+    label = data_service.get_indicator_label(code)
+    if label is None:
+        return None
+    years, values = data_service.get_series_arrays(code)
+    return code, label[0], label[1], WB_SOURCE, years.tolist(), values.tolist()
+
+
+def iter_export_series(codes, start_year=None, end_year=None):
+    """Produit les séries une par une (codes inconnus ignorés), restreintes à la période."""
+    for code in codes:
+        series = _load_series(code)
+        if series is None:
+            continue
+        code, name, unit, source, years, values = series
+        if start_year is not None or end_year is not None:
+            pairs = [(y, v) for y, v in zip(years, values)
+                     if (start_year is None or y >= start_year) and (end_year is None or y <= end_year)]
+            years = [y for y, _ in pairs]
+            values = [v for _, v in pairs]
+        yield code, name, unit, source, years, values
+
+
+def export_year_columns(codes, start_year=None, end_year=None):
+    """
+    Colonnes années du format large : la période demandée, sinon l'étendue des
+    séries sélectionnées (un premier passage qui ne lit que les années).
+    """
+    if start_year is not None and end_year is not None:
+        return list(range(start_year, end_year + 1))
+    low = high = None
+    for _, _, _, _, years, _ in iter_export_series(codes, start_year, end_year):
+        if years:
+            low = years[0] if low is None else min(low, years[0])
+            high = years[-1] if high is None else max(high, years[-1])
+    if low is None:
+        return []
+    return list(range(low, high + 1))
+
+
+def iter_export_rows(codes, layout='wide', start_year=None, end_year=None):
+    """Lignes du tableau exporté (en-tête compris), générées à la demande."""
+    if layout == 'long':
+        yield META_HEADER + ['Année', 'Valeur']
+        for code, name, unit, source, years, values in iter_export_series(codes, start_year, end_year):
+            for year, value in zip(years, values):
+                yield [code, name, unit, source, year, value]
+        return
+
+    year_columns = export_year_columns(codes, start_year, end_year)
+    yield META_HEADER + year_columns
+    for code, name, unit, source, years, values in iter_export_series(codes, start_year, end_year):
+        by_year = dict(zip(years, values))
+        yield [code, name, unit, source] + [by_year.get(y) for y in year_columns]
+
+
+class _Echo:
+    """Pseudo-fichier : csv.writer renvoie la ligne formatée au lieu de l'écrire."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    """Générateur de lignes CSV encodées en UTF-8 (BOM en tête)."""
+    writer = csv.writer(_Echo(), delimiter=CSV_DELIMITER)
+    yield CSV_BOM.encode('utf-8')
+    for row in rows:
+        yield writer.writerow(['' if v is None else v for v in row]).encode('utf-8')
+
+
+def write_xlsx(rows, title='Données'):
+    """
+    Écrit les lignes dans un classeur openpyxl en mode write_only (lignes
+    envoyées sur disque au fil de l'eau) et retourne le fichier temporaire,
+    repositionné au début, prêt à être streamé.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title)
+    for row in rows:
+        sheet.append(row)
+
+    tmp = tempfile.TemporaryFile(suffix='.xlsx')
+    workbook.save(tmp)
+    tmp.seek(0)
+    return tmp
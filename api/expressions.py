@@ -0,0 +1,369 @@
+"""
+Évaluateur d'expressions sur les indicateurs (/api/compute, calculs des requêtes IA).
+
+    NAT.tofe.recettes_fiscales / NAT.base_eco.pib_nominal_mxof * 100   (Mds / Millions FCFA : en %)
+    cagr(NY.GDP.MKTP.CD, 2010, 2023)
+    mean(FP.CPI.TOTL.ZG, 2015, 2024)
+    yoy(NY.GDP.MKTP.CD) - SP.POP.GROW
+    xof(NY.GDP.MKTP.CD) - NAT.base_eco.pib_nominal_mxof              (en FCFA)
+
+Les codes (qui contiennent des points) sont remplacés par des noms de variables
+avant l'analyse par `ast` ; seuls les nombres, les opérateurs arithmétiques et les
+fonctions listées dans FUNCTIONS sont acceptés (pas d'attribut, d'indice ni de nom
+libre). Une série est un tableau NumPy sur l'axe d'années contigu de la matrice
+alignée (NaN = pas de valeur) : les opérations entre séries sont vectorisées et
+alignées par année ; usd() et xof() convertissent un indicateur (montant à prix
+courants) en unités de la devise au taux de change de chaque année (voir conversion.py).
+
+Chaque indicateur garde son unité (devise, échelle, prix : voir conversion.unit_of) :
+- la somme ou la différence de deux séries avec unité est exprimée à l'échelle de
+  la première (Mds FCFA + Millions FCFA → Mds FCFA) ;
+- leur produit ou leur quotient est calculé en unités (FCFA, $) et n'a plus d'unité ;
+- deux devises différentes ne se combinent pas : convertir d'abord avec usd() ou xof().
+Un résultat multiplié ou divisé par un nombre, ou transformé (yoy, cagr...), n'a plus
+d'unité et n'est plus remis à l'échelle.
+Les résultats sont mémorisés par expression pour la version courante des données.
+"""
+import ast
+import operator
+import re
+import threading
+
+import numpy as np
+
+from .conversion import currency_converter
+from .series_matrix import series_matrix
+from .transforms import OPERATIONS
+from .units import USD, XOF
+
+MAX_EXPRESSION_LENGTH = 500
+MAX_NODES = 200
+MAX_POWER = 10
+
+# Nombre maximal de résultats gardés en mémoire
+MAX_CACHED_RESULTS = 1024
+
+# Code d'indicateur : au moins un point, commence par une lettre (1.5 n'en est pas un)
+_CODE_RE = re.compile(r'\b[A-Za-z][A-Za-z0-9_]*(?:\.[A-Za-z0-9_]+)+')
+
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+}
+_UNARY_OPS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+
+class ExpressionError(ValueError):
+    """Expression invalide ou impossible à évaluer (message destiné à l'utilisateur)."""
+
+
+# ─────────────────────────────────────────────────────
+# Fonctions disponibles
+# ─────────────────────────────────────────────────────
+def _series(value, name):
+    if not isinstance(value, np.ndarray):
+        raise ExpressionError(f'{name}() attend une série en premier argument')
+    return value
+
+
+def _year(value, name):
+    if isinstance(value, np.ndarray) or float(value) != int(value):
+        raise ExpressionError(f'{name}() attend des années entières')
+    return int(value)
+
+
+def _window(series, name, start=None, end=None):
+    """Valeurs de la série entre start et end (inclus), NaN exclus."""
+    years = series_matrix.years
+    mask = ~np.isnan(series)
+    if start is not None:
+        mask &= years >= _year(start, name)
+    if end is not None:
+        mask &= years <= _year(end, name)
+    return years[mask], series[mask]
+
+
+def _reduction(func):
+    def reduce(name, series, start=None, end=None):
+        _, values = _window(_series(series, name), name, start, end)
+        if len(values) == 0:
+            raise ExpressionError(f'{name}() : aucune valeur sur la période')
+        return float(func(values))
+    return reduce
+
+
+def _value(name, series, year):
+    years, values = _window(_series(series, name), name, year, year)
+    if len(values) == 0:
+        raise ExpressionError(f'{name}() : pas de valeur en {int(year)}')
+    return float(values[0])
+
+
+def _endpoints(name, series, start, end):
+    years, values = _window(_series(series, name), name, start, end)
+    if len(values) < 2:
+        raise ExpressionError(f'{name}() : au moins deux valeurs nécessaires sur la période')
+    return years[0], values[0], years[-1], values[-1]
+
+
+def _cagr(name, series, start=None, end=None):
+    y0, v0, y1, v1 = _endpoints(name, series, start, end)
+    if v0 <= 0 or v1 <= 0:
+        raise ExpressionError(f'{name}() : valeurs strictement positives requises')
+    return float(((v1 / v0) ** (1.0 / (y1 - y0)) - 1) * 100)
+
+
+def _change_pct(name, series, start=None, end=None):
+    _, v0, _, v1 = _endpoints(name, series, start, end)
+    if v0 == 0:
+        raise ExpressionError(f'{name}() : valeur initiale nulle')
+    return float((v1 - v0) / abs(v0) * 100)
+
+
+def _series_op(op_name, with_arg=False):
+    def apply(name, series, arg=None):
+        series = _series(series, name)
+        if with_arg:
+            if arg is None:
+                raise ExpressionError(f'{name}() attend un deuxième argument')
+            arg = _year(arg, name)
+        try:
+            return OPERATIONS[op_name](series, series_matrix.years, arg)
+        except ValueError as e:
+            raise ExpressionError(f'{name}() : {e}')
+    return apply
+
+
+def _to_currency(currency):
+    def convert(name, code):
+        i = series_matrix.index[code]
+        currency_from, scale, prices = currency_converter.unit_of(code)
+        try:
+            factors = currency_converter.factors(currency_from, scale, prices, currency, 1.0)
+        except ValueError as e:
+            raise ExpressionError(f'{name}({code}) : {e}')
+        return series_matrix.values[i] * factors
+    return convert
+
+
+# nom → (fonction, nombre minimal d'arguments, nombre maximal d'arguments)
+FUNCTIONS = {
+    # Série → nombre (période optionnelle : f(x, début, fin))
+    'mean': (_reduction(np.mean), 1, 3),
+    'median': (_reduction(np.median), 1, 3),
+    'sum': (_reduction(np.sum), 1, 3),
+    'min': (_reduction(np.min), 1, 3),
+    'max': (_reduction(np.max), 1, 3),
+    'std': (_reduction(lambda v: np.std(v, ddof=1) if len(v) > 1 else np.nan), 1, 3),
+    'first': (_reduction(lambda v: v[0]), 1, 3),
+    'last': (_reduction(lambda v: v[-1]), 1, 3),
+    'value': (_value, 2, 2),
+    'cagr': (_cagr, 1, 3),
+    'change_pct': (_change_pct, 1, 3),
+    # Série → série
+    'yoy': (_series_op('yoy'), 1, 1),
+    'diff': (_series_op('diff'), 1, 1),
+    'log': (_series_op('log'), 1, 1),
+    'rebase': (_series_op('rebase', with_arg=True), 2, 2),
+    'rolling_mean': (_series_op('rolling_mean', with_arg=True), 2, 2),
+    # Code d'indicateur → série en unités de la devise
+    'usd': (_to_currency(USD), 1, 1),
+    'xof': (_to_currency(XOF), 1, 1),
+}
+# Fonctions qui reçoivent le code de l'indicateur (il faut son unité), pas ses valeurs : devise du résultat
+CODE_FUNCTIONS = {'usd': USD, 'xof': XOF}
+# Fonctions dont le résultat est dans l'unité de la série (les autres n'ont plus d'unité)
+UNIT_FUNCTIONS = {'mean', 'median', 'sum', 'min', 'max', 'std', 'first', 'last', 'value',
+                  'diff', 'rolling_mean'}
+
+
+# ─────────────────────────────────────────────────────
+# Analyse
+# ─────────────────────────────────────────────────────
+def parse_expression(expression):
+    """
+    Analyse une expression : retourne (arbre ast, {variable: code}, expression normalisée).
+    Lève ExpressionError si l'expression est invalide ou cite un code inconnu.
+    """
+    expression = (expression or '').strip()
+    if not expression:
+        raise ExpressionError('expression vide')
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f'expression trop longue (maximum {MAX_EXPRESSION_LENGTH} caractères)')
+
+    series_matrix.ensure()
+    variables = {}
+    by_code = {}
+
+    def substitute(match):
+        code = match.group(0)
+        if code not in series_matrix.index:
+            raise ExpressionError(f'indicateur inconnu : {code}')
+        if code not in by_code:
+            by_code[code] = f'_s{len(by_code)}'
+            variables[by_code[code]] = code
+        return by_code[code]
+
+    try:
+        tree = ast.parse(_CODE_RE.sub(substitute, expression), mode='eval')
+    except SyntaxError:
+        raise ExpressionError('syntaxe invalide')
+
+    nodes = list(ast.walk(tree))
+    if len(nodes) > MAX_NODES:
+        raise ExpressionError('expression trop complexe')
+    for node in nodes:
+        if isinstance(node, (ast.Expression, ast.Load, ast.operator, ast.unaryop)):
+            continue
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+            continue
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+            continue
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            continue
+        if isinstance(node, ast.Name) and (node.id in variables or node.id in FUNCTIONS):
+            continue
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS \
+                and not node.keywords:
+            continue
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id not in FUNCTIONS:
+            raise ExpressionError(f'fonction inconnue : {node.func.id} (disponibles : {", ".join(FUNCTIONS)})')
+        if isinstance(node, ast.Name):
+            raise ExpressionError(f'nom inconnu : {node.id}')
+        raise ExpressionError(f'élément non autorisé : {type(node).__name__}')
+
+    normalized = ' '.join(expression.split())
+    return tree, variables, normalized
+
+
+# ─────────────────────────────────────────────────────
+# Évaluation
+# ─────────────────────────────────────────────────────
+def _rescaled(value, unit, scale):
+    """Valeur exprimée dans `unit` (devise, échelle, prix), ramenée à l'échelle `scale`."""
+    return value if unit[1] == scale else value * (unit[1] / scale)
+
+
+def _combine(op, left, right):
+    """
+    (valeur, unité) de `left op right` : deux opérandes avec unité sont ramenés à une
+    échelle commune (celle de gauche pour + et -, l'unité pour * et /).
+    """
+    (lvalue, lunit), (rvalue, runit) = left, right
+    if isinstance(op, ast.Pow) and (isinstance(rvalue, np.ndarray) or abs(rvalue) > MAX_POWER):
+        raise ExpressionError(f'exposant limité à un nombre entre -{MAX_POWER} et {MAX_POWER}')
+    func = _BINARY_OPS[type(op)]
+    if lunit is None or runit is None or isinstance(op, ast.Pow):
+        # Un nombre sans unité : l'opération porte sur les valeurs telles quelles
+        unit = (lunit or runit) if isinstance(op, (ast.Add, ast.Sub)) else None
+        return func(lvalue, rvalue), unit
+    if lunit[0] and runit[0] and lunit[0] != runit[0]:
+        raise ExpressionError(
+            f'opération entre montants en {lunit[0]} et en {runit[0]} : convertir avec usd() ou xof()'
+        )
+    if isinstance(op, (ast.Add, ast.Sub)):
+        return func(lvalue, _rescaled(rvalue, runit, lunit[1])), lunit
+    return func(_rescaled(lvalue, lunit, 1.0), _rescaled(rvalue, runit, 1.0)), None
+
+
+def _evaluate(node, variables):
+    """
+    (valeur, unité) d'un nœud : valeur scalaire ou série, unité (devise, échelle, prix)
+    d'un indicateur ou None pour un nombre sans unité.
+    """
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body, variables)
+    if isinstance(node, ast.Constant):
+        # Scalaires NumPy : division par zéro → inf / NaN (pas d'exception), pas de nombres complexes
+        return np.float64(node.value), None
+    if isinstance(node, ast.Name):
+        if node.id not in variables:
+            raise ExpressionError(f'{node.id} est une fonction : {node.id}(...)')
+        code = variables[node.id]
+        return series_matrix.values[series_matrix.index[code]], currency_converter.unit_of(code)
+    if isinstance(node, ast.UnaryOp):
+        value, unit = _evaluate(node.operand, variables)
+        return _UNARY_OPS[type(node.op)](value), unit
+    if isinstance(node, ast.BinOp):
+        return _combine(node.op, _evaluate(node.left, variables), _evaluate(node.right, variables))
+    if isinstance(node, ast.Call):
+        name = node.func.id
+        func, min_args, max_args = FUNCTIONS[name]
+        if not min_args <= len(node.args) <= max_args:
+            raise ExpressionError(f'{name}() attend entre {min_args} et {max_args} arguments')
+        if name in CODE_FUNCTIONS:
+            arg = node.args[0]
+            if not isinstance(arg, ast.Name) or arg.id not in variables:
+                raise ExpressionError(f'{name}() attend un code d\'indicateur')
+            _, _, prices = currency_converter.unit_of(variables[arg.id])
+            return func(name, variables[arg.id]), (CODE_FUNCTIONS[name], 1.0, prices)
+        args = [_evaluate(arg, variables) for arg in node.args]
+        result = func(name, *(value for value, _ in args))
+        unit = args[0][1] if name in UNIT_FUNCTIONS else None
+        return (result if isinstance(result, np.ndarray) else np.float64(result)), unit
+    raise ExpressionError(f'élément non autorisé : {type(node).__name__}')
+
+
+class ExpressionEngine:
+    """Singleton : évalue et mémorise les expressions pour la version courante des données"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._version = None
+            cls._instance._cache = {}  # expression normalisée → résultat
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    def _ensure(self):
+        series_matrix.ensure()
+        if self._version != series_matrix.version:
+            with self._lock:
+                if self._version != series_matrix.version:
+                    self._cache = {}
+                    self._version = series_matrix.version
+
+    def evaluate(self, expression):
+        """
+        Évalue une expression. Retourne un dict sérialisable :
+        - nombre : {'expression', 'codes', 'kind': 'scalar', 'value'}
+        - série  : {'expression', 'codes', 'kind': 'series', 'years', 'values'}
+        Lève ExpressionError si l'expression est invalide ou sans résultat.
+        """
+        self._ensure()
+        tree, variables, normalized = parse_expression(expression)
+        cached = self._cache.get(normalized)
+        if cached is not None:
+            return cached
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            result, _ = _evaluate(tree, variables)
+
+        payload = {'expression': normalized, 'codes': list(variables.values())}
+        if isinstance(result, np.ndarray):
+            mask = np.isfinite(result)
+            if not mask.any():
+                raise ExpressionError('aucune année commune avec un résultat défini')
+            payload.update(kind='series', years=series_matrix.years[mask].tolist(),
+                           values=result[mask].tolist())
+        else:
+            if not np.isfinite(result):
+                raise ExpressionError('résultat non défini (division par zéro ?)')
+            payload.update(kind='scalar', value=float(result))
+
+        if len(self._cache) >= MAX_CACHED_RESULTS:
+            self._cache.clear()
+        self._cache[normalized] = payload
+        return payload
+
+
+# Singleton
+expression_engine = ExpressionEngine()
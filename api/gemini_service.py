@@ -10,6 +10,9 @@ import logging
 from typing import Dict, Optional, List
 from .data_service import data_service
 from .national_data_service import national_data_service as nds
+from .movers_service import movers_service
+from .expressions import expression_engine, ExpressionError
+from .correlation_service import correlation_service
 
 logger = logging.getLogger(__name__)
 
@@ -286,6 +289,21 @@ DIRECT_INDICATOR_MAP = {
     'recettes fiscales': 'GC.TAX.TOTL.GD.ZS',
 }
 
+# Questions sur ce qui a changé récemment : le prompt reçoit les faits marquants
+# précalculés (movers_service), sans appel supplémentaire au LLM
+NOTABLE_KEYWORDS = [
+    'marquant', 'notable', 'plus bougé', 'plus changé', 'plus forte hausse', 'plus fortes hausses',
+    'plus forte baisse', 'plus fortes baisses', 'plus forte progression', 'quoi de neuf',
+    'nouveautés', 'récemment', 'dernière année', 'inhabituel', 'surprenant', 'top des',
+]
+
+# Questions de corrélation : le prompt reçoit les partenaires précalculés
+# (correlation_service) des indicateurs détectés
+CORRELATION_KEYWORDS = [
+    'corrél', 'correl', 'lié à', 'liée à', 'liés à', 'lien entre', 'relation entre',
+    'évolue avec', 'varie avec', 'associé à', 'associée à',
+]
+
 
 class GeminiService:
     """Service pour interpréter les requêtes utilisateur via Gemini"""
@@ -649,11 +667,14 @@ RÈGLES IMPORTANTES:
 5. Si l'indicateur exact N'EXISTE PAS mais qu'un indicateur PROCHE existe, match_type = "proxy" et explique le lien.
 6. success=false seulement si AUCUN rapport avec des statistiques.
 7. À pertinence égale entre plusieurs candidats, PRÉFÈRE l'indicateur qui: (a) couvre les années demandées par l'utilisateur, (b) a la série temporelle la plus longue [Npts], (c) a les données les plus récentes (→YYYY). La couverture des années demandées est PRIORITAIRE sur la longueur de la série.
+8. Si la question demande un CALCUL (moyenne, variation, taux de croissance annuel moyen, ratio ou part entre indicateurs...), renseigne "expression" avec une formule utilisant les CODES EXACTS, calculée ensuite par le serveur:
+   opérateurs + - * / ; fonctions mean(X, début, fin), change_pct(X, début, fin), cagr(X, début, fin), value(X, année), min/max(X, début, fin), yoy(X), rebase(X, année).
+   Exemples: "cagr(NY.GDP.MKTP.CD, 2010, 2023)", "NAT.tofe.recettes_fiscales / NAT.tofe.recettes_et_dons * 100". Sinon expression = null.
 
 REQUÊTE: "{enriched_query}"
 
 Réponds UNIQUEMENT en JSON:
-{{"success":true,"indicator_code":"CODE_EXACT","match_type":"exact ou proxy","proxy_explanation":"explication du lien si proxy, sinon null","start_year":null,"end_year":null,"calculation_requested":null}}"""
+{{"success":true,"indicator_code":"CODE_EXACT","match_type":"exact ou proxy","proxy_explanation":"explication du lien si proxy, sinon null","start_year":null,"end_year":null,"calculation_requested":null,"expression":null}}"""
         
         try:
             # Phase 1: Identifier l'indicateur
@@ -723,20 +744,26 @@ Réponds UNIQUEMENT en JSON:
             
             values = indicator_data['values']
             
-            # Calcul si demandé
+            # Calcul si demandé : évalué localement par le moteur d'expressions
             calculation_result = None
             calculation_formula = None
-            if calculation and values:
-                if calculation in ('moyenne', 'average'):
-                    total = sum(v['value'] for v in values)
-                    calculation_result = total / len(values)
-                    calculation_formula = f"({' + '.join(str(v['value']) for v in values)}) / {len(values)}"
-                elif calculation == 'variation' and len(values) >= 2:
-                    first_value = values[0]['value']
-                    last_value = values[-1]['value']
-                    if first_value != 0:
-                        calculation_result = ((last_value - first_value) / first_value) * 100
-                        calculation_formula = f"(({last_value} - {first_value}) / {first_value}) × 100"
+            expression_result = None
+            expression = gemini_response.get('expression')
+            if not expression and calculation and values:
+                expression = self._calculation_expression(calculation, indicator_code, values)
+            if expression:
+                try:
+                    computed = expression_engine.evaluate(expression)
+                    calculation_formula = computed['expression']
+                    if computed['kind'] == 'scalar':
+                        calculation_result = computed['value']
+                    else:
+                        expression_result = computed
+                except ExpressionError as e:
+                    logger.warning(f"Expression non évaluable '{expression}': {e}")
+            if calculation_result is None and expression_result is None and calculation and values:
+                # Série hors de la matrice alignée (series_matrix) : calcul sur les valeurs retournées
+                calculation_result, calculation_formula = self._calculate_from_values(calculation, values)
             
             # Skip Phase 2 (AI analysis) — return data immediately for speed
             # Analysis will be fetched lazily via /api/query-analysis
@@ -765,6 +792,7 @@ Réponds UNIQUEMENT en JSON:
                 'methodology': indicator_data.get('methodology', ''),
                 'calculation_result': calculation_result,
                 'calculation_formula': calculation_formula,
+                'expression_result': expression_result,
                 'chart_type': chart_type,
                 'related_indicators': related_indicators
             }
@@ -786,6 +814,30 @@ Réponds UNIQUEMENT en JSON:
                 }
             return self._handle_fallback(user_query, str(e))
     
+    @staticmethod
+    def _calculation_expression(calculation: str, indicator_code: str, values: list) -> Optional[str]:
+        """Expression équivalente à un calculation_requested simple, sur la période des valeurs."""
+        start, end = values[0]['year'], values[-1]['year']
+        if calculation in ('moyenne', 'average'):
+            return f"mean({indicator_code}, {start}, {end})"
+        if calculation == 'variation' and len(values) >= 2:
+            return f"change_pct({indicator_code}, {start}, {end})"
+        return None
+
+    @staticmethod
+    def _calculate_from_values(calculation: str, values: list):
+        """(résultat, formule) d'un calculation_requested simple sur les valeurs, ou (None, None)."""
+        if calculation in ('moyenne', 'average'):
+            total = sum(v['value'] for v in values)
+            return total / len(values), f"({' + '.join(str(v['value']) for v in values)}) / {len(values)}"
+        if calculation == 'variation' and len(values) >= 2:
+            first_value = values[0]['value']
+            last_value = values[-1]['value']
+            if first_value != 0:
+                return (((last_value - first_value) / first_value) * 100,
+                        f"(({last_value} - {first_value}) / {first_value}) × 100")
+        return None, None
+
     def generate_analysis(self, indicator_code: str, user_query: str,
                           match_type: str = 'exact', proxy_explanation: str = None) -> Dict:
         """
@@ -981,6 +1033,34 @@ Source: {source_display}""")
 --- FIN DONNÉES ---
 IMPORTANT: Cite la SOURCE de chaque indicateur (ex: "Banque Mondiale", "ANStat", "TOFE"). Ne cite JAMAIS les codes techniques."""
 
+        msg_lower = new_message.lower()
+        if data_contexts and any(kw in msg_lower for kw in CORRELATION_KEYWORDS):
+            blocks = []
+            for dc in data_contexts[:2]:
+                lines = correlation_service.describe(dc['code'])
+                if lines:
+                    blocks.append(f"{dc['name']} — séries les plus corrélées :\n" + "\n".join(f"- {line}" for line in lines))
+            if blocks:
+                data_section += """
+
+--- CORRÉLATIONS (Pearson, années communes de la base) ---
+""" + "\n\n".join(blocks) + """
+--- FIN CORRÉLATIONS ---
+Rappelle qu'une corrélation n'implique pas de causalité."""
+
+        if any(kw in msg_lower for kw in NOTABLE_KEYWORDS):
+            try:
+                notable = movers_service.notable_text()
+            except Exception as e:
+                logger.error(f"Notable context error: {e}")
+                notable = ''
+            if notable:
+                data_section += f"""
+
+--- FAITS MARQUANTS (calculés sur toutes les séries de la base) ---
+{notable}
+--- FIN FAITS MARQUANTS ---"""
+
         # Build conversation for Gemini
         system_prompt = f"""Tu es **Ask For Data AI**, un assistant conversationnel expert en statistiques et économie, spécialisé sur la Côte d'Ivoire mais avec des connaissances généralistes en statistiques, économétrie, économie et sciences sociales.
 
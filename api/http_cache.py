@@ -0,0 +1,148 @@
+"""
+Réponses HTTP pré-sérialisées et pré-compressées avec validation conditionnelle
+(ETag / Last-Modified → 304 Not Modified).
+"""
+import gzip
+import hashlib
+import json
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+
+try:
+    import brotli
+except ImportError:  # Brotli optionnel : on sert alors gzip ou identité
+    brotli = None
+
+
+def serialize_json(payload):
+    """Sérialise un payload comme le JSONRenderer de DRF (compact, UTF-8)."""
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'), allow_nan=False).encode('utf-8')
+
+
+def precompress(body, etag, last_modified):
+    """
+    Prépare toutes les représentations d'un corps de réponse.
+    Retourne {'identity': bytes, 'gzip': bytes, 'br': bytes|None, 'etag': str, 'last_modified': int}
+    """
+    return {
+        'identity': body,
+        'gzip': gzip.compress(body, compresslevel=9, mtime=0),
+        'br': brotli.compress(body, quality=11) if brotli else None,
+        'etag': etag,
+        'last_modified': last_modified,
+    }
+
+
+def _accepted_encodings(request):
+    """Encodages acceptés par le client (ignore ceux marqués q=0)."""
+    accepted = set()
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = params.replace(' ', '')
+        if q.startswith('q=') and q[2:] in ('0', '0.0', '0.00', '0.000'):
+            continue
+        accepted.add(token)
+    return accepted
+
+
+def _choose_encoding(request, blob):
+    return negotiated_encoding(request, br_available=blob.get('br') is not None)
+
+
+def negotiated_encoding(request, br_available=None):
+    """Encodage servi pour cette requête : br > gzip > identité."""
+    if br_available is None:
+        br_available = brotli is not None
+    accepted = _accepted_encodings(request)
+    if br_available and ('br' in accepted or '*' in accepted):
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return 'identity'
+
+
+def representation_etag(etag, encoding):
+    """ETag fort propre à chaque encodage (les octets diffèrent)."""
+    if encoding == 'identity':
+        return f'"{etag}"'
+    return f'"{etag}-{encoding}"'
+
+
+def dataset_etag(request, version):
+    """
+    ETag fort d'une réponse de lecture, calculable avant la vue : version des
+    données + URL (chemin et paramètres) + type négocié (Accept). Valeur entre
+    guillemets. Sans suffixe d'encodage : seules les réponses pré-compressées
+    (precompressed_response) en ajoutent un, les autres octets ne varient pas.
+    """
+    h = hashlib.sha1()
+    h.update(request.get_full_path().encode())
+    h.update(b'\n' + request.META.get('HTTP_ACCEPT', '').encode())
+    return representation_etag(f"{version[:12]}-{h.hexdigest()[:10]}", 'identity')
+
+
+def held_etag(request, etag):
+    """
+    ETag de If-None-Match correspondant à `etag` à l'encodage près ("v-br", "v-gzip"
+    ou "v" pour "v") : le client possède cette version, quel que soit l'encodage
+    pré-compressé qu'il a reçu. None sinon.
+    """
+    base = etag.strip('"')
+    held = {representation_etag(base, encoding): encoding for encoding in ('identity', 'gzip', 'br')}
+    for tag in request.META.get('HTTP_IF_NONE_MATCH', '').split(','):
+        tag = tag.strip()
+        tag = tag[2:] if tag.startswith('W/') else tag
+        if tag in held:
+            return tag
+    return None
+
+
+def is_not_modified(request, etag, last_modified):
+    """
+    Évalue If-None-Match (prioritaire) puis If-Modified-Since.
+    `etag` est la valeur entre guillemets de la représentation servie.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        tags = [t.strip() for t in if_none_match.split(',')]
+        # Comparaison faible (RFC 9110 §13.1.2) : W/"x" correspond à "x"
+        tags = [t[2:] if t.startswith('W/') else t for t in tags]
+        return '*' in tags or etag in tags
+
+    if_modified_since = request.META.get('HTTP_IF_MODIFIED_SINCE')
+    if if_modified_since and last_modified:
+        since = parse_http_date_safe(if_modified_since)
+        return since is not None and int(last_modified) <= since
+
+    return False
+
+
+def precompressed_response(request, blob, content_type='application/json',
+                           cache_control='no-cache'):
+    """
+    Sert la représentation adaptée à Accept-Encoding, ou un 304 si le client
+    possède déjà cette version. Reprend l'ETag posé par DatasetCacheMiddleware
+    quand l'endpoint est couvert par API_CACHE_POLICIES, suffixé par l'encodage servi.
+    """
+    encoding = _choose_encoding(request, blob)
+    base = getattr(request, 'dataset_etag', None)
+    etag = representation_etag(base.strip('"') if base else blob['etag'], encoding)
+
+    if is_not_modified(request, etag, blob['last_modified']):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(blob[encoding], content_type=content_type)
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+        response['Content-Length'] = str(len(blob[encoding]))
+
+    response['ETag'] = etag
+    if blob['last_modified']:
+        response['Last-Modified'] = http_date(blob['last_modified'])
+    response['Vary'] = 'Accept-Encoding'
+    response['Cache-Control'] = cache_control
+    return response
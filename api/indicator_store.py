@@ -0,0 +1,126 @@
+"""
+Réponses JSON pré-sérialisées des endpoints de lecture des indicateurs.
+Le corps de /api/indicator/<code> (records ou colonnes) est sérialisé au premier
+accès et gardé dans un cache borné (MAX_CACHED_BODIES) ; celui de /api/indicators
+sans filtre, une fois par version des données. Les vues renvoient ensuite ces
+octets tels quels. Le manifeste (/api/manifest) publie une empreinte de chaque
+détail pour le cache navigateur (static/js/data-cache.js) : les corps sont alors
+sérialisés un à un le temps du calcul, sans être gardés.
+"""
+import hashlib
+import logging
+import threading
+import time
+
+from .data_service import data_service
+from .dashboard_service import dashboard_service
+from .dataset_version import get_dataset_version
+from .national_data_service import national_data_service as nds
+from .renderers import render_json_bytes
+from .series_format import LAYOUT_RECORDS
+
+logger = logging.getLogger('api')
+
+# Nombre maximal de corps de détail gardés sérialisés
+MAX_CACHED_BODIES = 512
+
+
+class IndicatorStore:
+    """Store singleton des corps JSON pré-sérialisés"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(IndicatorStore, cls).__new__(cls)
+            cls._instance._version = None
+            cls._instance._details = {}  # (code, layout) → octets JSON
+            cls._instance._list_body = None
+            cls._instance._manifest_body = None
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    def _ensure(self):
+        """Invalide les corps sérialisés si la version des données a changé."""
+        version = get_dataset_version()['version']
+        if self._version != version:
+            with self._lock:
+                if self._version != version:
+                    self._details = {}
+                    self._list_body = None
+                    self._manifest_body = None
+                    self._version = version
+
+    @staticmethod
+    def _render_detail(code, layout):
+        if code.startswith('NAT.'):
+            detail = nds.get_indicator_detail_by_code(code, layout=layout)
+        else:
+            detail = data_service.get_indicator_detail(code, layout=layout)
+        if detail is None:
+            return None
+        return render_json_bytes({'success': True, 'indicator': detail})
+
+    def get_detail(self, code, layout):
+        """Corps JSON de /api/indicator/<code> pour ce layout, ou None si l'indicateur est inconnu."""
+        self._ensure()
+        key = (code, layout)
+        body = self._details.get(key)
+        if body is None:
+            body = self._render_detail(code, layout)
+            if body is None:
+                return None
+            with self._lock:
+                if len(self._details) >= MAX_CACHED_BODIES:
+                    self._details.clear()
+                self._details[key] = body
+        return body
+
+    def _indicators(self):
+        return data_service.get_all_indicators() + nds.get_all_indicators_for_explorer()
+
+    def get_list(self):
+        """Corps JSON de /api/indicators (sans filtre de recherche)."""
+        self._ensure()
+        if self._list_body is None:
+            indicators = self._indicators()
+            self._list_body = render_json_bytes({
+                'success': True,
+                'count': len(indicators),
+                'indicators': indicators,
+            })
+        return self._list_body
+
+    def get_manifest(self):
+        """
+        Corps JSON de /api/manifest : version des données et empreinte de chaque
+        entrée que le navigateur peut garder en cache.
+        {'success', 'version', 'indicators_list': hash, 'indicators': {code: hash},
+         'dashboard': {section: {'block', 'hash', 'keys'}}}
+        """
+        self._ensure()
+        if self._manifest_body is None:
+            start = time.perf_counter()
+            digests = {}
+            for ind in self._indicators():
+                body = self._details.get((ind['code'], LAYOUT_RECORDS)) or self._render_detail(ind['code'], LAYOUT_RECORDS)
+                if body is not None:
+                    digests[ind['code']] = _digest(body)
+            self._manifest_body = render_json_bytes({
+                'success': True,
+                'version': self._version,
+                'indicators_list': _digest(self.get_list()),
+                'indicators': digests,
+                'dashboard': dashboard_service.get_section_manifest(),
+            })
+            logger.info("✓ Manifeste: %d empreintes (%.2fs)", len(digests), time.perf_counter() - start)
+        return self._manifest_body
+
+
+def _digest(body):
+    """Empreinte courte d'un corps de réponse."""
+    return hashlib.sha1(body).hexdigest()[:12]
+
+
+# Instance globale singleton
+indicator_store = IndicatorStore()
@@ -0,0 +1,80 @@
+"""
+Mesure le temps de lecture de nos classeurs (data.xlsx et les classeurs nationaux)
+avec chaque moteur disponible (voir api/spreadsheet.py) et enregistre le plus rapide
+dans build/spreadsheet_engines.json, retenu ensuite par SPREADSHEET_ENGINE='auto'.
+
+    python manage.py benchmark_spreadsheet_engines [--repeat 3] [--no-record]
+"""
+import json
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.national_workbooks import NATIONAL_WORKBOOKS
+from api.spreadsheet import BENCHMARK_PATH, available_engines, open_workbook
+
+WORKBOOKS = ['data.xlsx'] + [spec['file'] for spec in NATIONAL_WORKBOOKS.values()]
+
+
+def _read_all(path, engine):
+    """Ouvre le classeur et lit toutes les lignes de toutes ses feuilles ; retourne le nombre de lignes."""
+    n_rows = 0
+    with open_workbook(path, engine) as wb:
+        for sheet in wb.sheet_names:
+            for _ in wb.rows(sheet):
+                n_rows += 1
+    return n_rows
+
+
+class Command(BaseCommand):
+    help = "Compare les moteurs de lecture Excel sur nos classeurs et enregistre le plus rapide."
+    # Pas de vérifications système : elles importeraient les vues et chargeraient les données
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3,
+                            help="Lectures par classeur et par moteur (meilleur temps retenu).")
+        parser.add_argument('--no-record', action='store_true',
+                            help="Affiche les mesures sans enregistrer le moteur le plus rapide.")
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        paths = [settings.BASE_DIR / name for name in WORKBOOKS]
+        paths = [p for p in paths if p.exists()]
+        if not paths:
+            raise CommandError("Aucun classeur trouvé.")
+        engines = available_engines()
+
+        timings = {}
+        for engine in engines:
+            timings[engine] = {}
+            for path in paths:
+                best = None
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    n_rows = _read_all(path, engine)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                timings[engine][path.name] = round(best, 4)
+                self.stdout.write(f"  {engine:<10} {path.name:<32} {best:7.3f}s  ({n_rows} lignes)")
+
+        totals = {engine: round(sum(t.values()), 4) for engine, t in timings.items()}
+        fastest = min(totals, key=totals.get)
+        for engine in engines:
+            self.stdout.write(f"{engine:<10} total {totals[engine]:.3f}s")
+        self.stdout.write(self.style.SUCCESS(f"✓ Moteur le plus rapide : {fastest}"))
+
+        if options['no_record']:
+            return
+        BENCHMARK_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(BENCHMARK_PATH, 'w', encoding='utf-8') as f:
+            json.dump({
+                'fastest': fastest,
+                'totals': totals,
+                'timings': timings,
+                'repeat': repeat,
+                'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            }, f, ensure_ascii=False, indent=2)
+        self.stdout.write(f"✓ Enregistré dans {BENCHMARK_PATH}")
@@ -0,0 +1,26 @@
+"""
+Construit les instantanés des partitions de données (sources nationales, thèmes ANStat,
+corrélations entre séries) pour la version courante des données, dans build/partitions/<version>/ : les processus
+web les relisent au premier accès au lieu de relire les classeurs et fichiers XML.
+
+    python manage.py build_partitions
+"""
+from django.core.management.base import BaseCommand
+
+from api.correlation_service import correlation_service  # noqa: F401 (déclare les partitions)
+from api.national_data_service import national_data_service  # noqa: F401
+from api.partitions import PARTITIONS_DIR, partition_store
+
+
+class Command(BaseCommand):
+    help = "Construit les instantanés des partitions de données (relus par les workers au démarrage)."
+    # Pas de vérifications système : elles importeraient les vues et chargeraient les données
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        sizes = partition_store.build_all()
+        for name, size in sizes.items():
+            self.stdout.write(f"  {name:<32} {size / 1e6:7.2f} Mo")
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {len(sizes)} partitions, {sum(sizes.values()) / 1e6:.1f} Mo dans {PARTITIONS_DIR}"
+        ))
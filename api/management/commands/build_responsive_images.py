@@ -0,0 +1,92 @@
+"""
+Génère les variantes responsives (AVIF / WebP / JPEG, plusieurs largeurs) des
+photos de api/static/img dans settings.RESPONSIVE_IMAGES_ROOT, à lancer avant
+collectstatic. Le manifeste produit est lu par le tag {% responsive_img %}.
+
+    python manage.py build_responsive_images [--force]
+"""
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Photos des personnalités (le logo, affiché à des tailles très variables, reste tel quel)
+SOURCE_PATTERNS = ['img/*.jpg', 'img/*.jpeg', 'img/*.webp']
+
+# Cadres de 110 px et 160 px (dashboard-v3.css) en 1x / 2x / 3x
+WIDTHS = [160, 320, 480]
+
+# format → (extension, options Pillow)
+FORMATS = {
+    'avif': ('avif', {'quality': 50}),
+    'webp': ('webp', {'quality': 78, 'method': 6}),
+    'jpeg': ('jpg', {'quality': 80, 'optimize': True, 'progressive': True}),
+}
+
+OUTPUT_DIR = 'img/responsive'
+MANIFEST_NAME = 'manifest.json'
+
+
+class Command(BaseCommand):
+    help = "Génère les variantes AVIF/WebP/JPEG redimensionnées des photos statiques."
+    # Pas de vérifications système : elles importeraient les vues et chargeraient les données
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help="Régénère toutes les variantes, même à jour.")
+
+    def handle(self, *args, **options):
+        try:
+            from PIL import Image, features
+        except ImportError:
+            raise CommandError("Pillow est requis (pip install Pillow).")
+
+        formats = {}
+        for name, spec in FORMATS.items():
+            if name == 'jpeg' or features.check(name):
+                formats[name] = spec
+            else:
+                self.stderr.write(f"⚠ Format {name} non supporté par ce Pillow : ignoré")
+
+        source_root = Path(settings.STATICFILES_DIRS[0])
+        build_root = Path(settings.RESPONSIVE_IMAGES_ROOT)
+        output_dir = build_root / OUTPUT_DIR
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        sources = sorted({p for pattern in SOURCE_PATTERNS for p in source_root.glob(pattern)})
+        manifest = {}
+        written = 0
+
+        for source in sources:
+            rel_source = source.relative_to(source_root).as_posix()
+            with Image.open(source) as img:
+                img = img.convert('RGB')
+                width, height = img.size
+                variants = {name: [] for name in formats}
+
+                # Largeurs utiles uniquement (jamais d'agrandissement)
+                widths = [w for w in WIDTHS if w < width] or [width]
+                for target in widths:
+                    resized = None
+                    for name, (ext, save_options) in formats.items():
+                        rel_out = f"{OUTPUT_DIR}/{source.stem}-{target}.{ext}"
+                        out_path = build_root / rel_out
+                        variants[name].append([target, rel_out])
+                        if (not options['force'] and out_path.exists()
+                                and out_path.stat().st_mtime >= source.stat().st_mtime):
+                            continue
+                        if resized is None:
+                            resized = img.resize((target, round(height * target / width)), Image.LANCZOS)
+                        resized.save(out_path, format=name.upper(), **save_options)
+                        written += 1
+
+            manifest[rel_source] = {'width': width, 'height': height, 'variants': variants}
+
+        with open(output_dir / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {len(manifest)} images, {written} variantes écrites dans {output_dir}"
+        ))
@@ -0,0 +1,37 @@
+"""
+Enregistre la version courante des données comme vintage : seules les cellules
+(indicateur × année) ajoutées, modifiées ou retirées depuis la vintage précédente
+sont stockées (voir api/vintages.py). Sans effet si la version est déjà enregistrée.
+
+    python manage.py record_vintage
+
+L'historique des vintages suppose une base persistante (DATABASE_URL en production) :
+sur le db.sqlite3 d'un disque éphémère, chaque déploiement repart d'une seule vintage.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.series_matrix import series_matrix
+from api.vintages import record_vintage
+
+
+class Command(BaseCommand):
+    help = "Enregistre la version courante des données comme vintage (delta par rapport à la précédente)."
+    # Pas de vérifications système : elles importeraient les vues et chargeraient les données
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_URL and not settings.DEBUG:
+            self.stderr.write(self.style.WARNING(
+                "Base SQLite locale : les vintages ne survivent pas à un redéploiement "
+                "sur disque éphémère (définir DATABASE_URL)."
+            ))
+        vintage, created = record_vintage(series_matrix)
+        if not created:
+            self.stdout.write(f"Version {vintage.version} déjà enregistrée ({vintage.recorded_at:%Y-%m-%d %H:%M}).")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Vintage {vintage.version} : {vintage.cells_added} cellules ajoutées, "
+            f"{vintage.cells_changed} modifiées, {vintage.cells_removed} retirées "
+            f"({vintage.cells_total} cellules)"
+        ))
@@ -0,0 +1,63 @@
+"""
+Cache HTTP des endpoints de lecture, indexé sur la version du jeu de données.
+"""
+from django.conf import settings
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+
+from .dataset_version import get_dataset_version
+from .http_cache import dataset_etag, held_etag, is_not_modified
+
+
+class DatasetCacheMiddleware:
+    """
+    Pour chaque endpoint listé dans settings.API_CACHE_POLICIES (nom d'URL →
+    Cache-Control) :
+    - calcule un ETag fort à partir de la version des données et de la requête ;
+    - répond 304 avant l'exécution de la vue si le client possède déjà cette version
+      (ETag de base ou suffixé par l'encodage d'une réponse pré-compressée) ;
+    - ajoute ETag / Last-Modified / Cache-Control / Vary aux réponses 200 et 304
+      (l'ETag d'une réponse pré-compressée, suffixé par son encodage, est conservé).
+    Ces vues sont déclarées sans authentification (la session n'est pas lue,
+    donc pas de Vary: Cookie) pour rester partageables par un CDN.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.policies = getattr(settings, 'API_CACHE_POLICIES', {})
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        etag = getattr(request, 'dataset_etag', None)
+        if etag and response.status_code in (200, 304):
+            self._set_headers(request, response, response.get('ETag') or etag)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        match = request.resolver_match
+        if match is None or match.url_name not in self.policies:
+            return None
+
+        dataset = get_dataset_version()
+        request.dataset_etag = dataset_etag(request, dataset['version'])
+        request.dataset_last_modified = dataset['last_modified']
+
+        held = held_etag(request, request.dataset_etag)
+        if held or is_not_modified(request, request.dataset_etag, dataset['last_modified']):
+            response = HttpResponseNotModified()
+            self._set_headers(request, response, held or request.dataset_etag)
+            if held and held != request.dataset_etag:
+                patch_vary_headers(response, ('Accept-Encoding',))
+            return response
+        return None
+
+    def _set_headers(self, request, response, etag):
+        response['ETag'] = etag
+        if request.dataset_last_modified:
+            response['Last-Modified'] = http_date(request.dataset_last_modified)
+        response['Cache-Control'] = self.policies[request.resolver_match.url_name]
+        # Vary: Accept-Encoding n'est posé que par les réponses pré-compressées
+        patch_vary_headers(response, ('Accept',))
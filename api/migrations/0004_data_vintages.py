@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:53
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_conversation_message'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVintage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(max_length=20, unique=True)),
+                ('recorded_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('files', models.JSONField(default=dict)),
+                ('cells_total', models.IntegerField(default=0)),
+                ('cells_added', models.IntegerField(default=0)),
+                ('cells_changed', models.IntegerField(default=0)),
+                ('cells_removed', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-recorded_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='VintageCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=200)),
+                ('year', models.SmallIntegerField()),
+                ('value', models.FloatField(null=True)),
+                ('vintage', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cells', to='api.datavintage')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['code', 'year', 'vintage'], name='vintage_cell_lookup')],
+            },
+        ),
+    ]
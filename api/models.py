@@ -130,3 +130,37 @@ class QueryCache(models.Model):
         if self.negative_feedback > 0 and self.negative_feedback >= self.positive_feedback:
             return False
         return True
+
+
+class DataVintage(models.Model):
+    """Version des données enregistrée à un rechargement (voir api/vintages.py)"""
+    version = models.CharField(max_length=20, unique=True)
+    recorded_at = models.DateTimeField(default=timezone.now, db_index=True)
+    files = models.JSONField(default=dict)
+    cells_total = models.IntegerField(default=0)
+    cells_added = models.IntegerField(default=0)
+    cells_changed = models.IntegerField(default=0)
+    cells_removed = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-recorded_at']
+
+    def __str__(self):
+        return f"{self.version} ({self.recorded_at:%Y-%m-%d %H:%M})"
+
+
+class VintageCell(models.Model):
+    """
+    Cellule (indicateur, année) modifiée par une vintage par rapport à la précédente ;
+    value null : cellule retirée.
+    """
+    vintage = models.ForeignKey(DataVintage, on_delete=models.CASCADE, related_name='cells')
+    code = models.CharField(max_length=200)
+    year = models.SmallIntegerField()
+    value = models.FloatField(null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['code', 'year', 'vintage'], name='vintage_cell_lookup')]
+
+    def __str__(self):
+        return f"{self.code} {self.year} = {self.value}"
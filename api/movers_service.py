@@ -0,0 +1,232 @@
+"""
+Classement des indicateurs qui ont le plus bougé (/api/movers) : variation sur un an,
+taux de croissance annuel moyen (TCAM) sur 5 / 10 ans et z-score de la variation
+sur la fenêtre, calculés pour toutes les séries d'un coup sur la matrice alignée
+(voir series_matrix) et gardés en mémoire pour la version courante des données.
+"""
+import logging
+import threading
+
+import numpy as np
+
+from .renderers import render_json_bytes
+from .series_matrix import series_matrix
+
+logger = logging.getLogger('api')
+
+MOVERS_WINDOWS = (1, 5, 10)
+DEFAULT_TOP = 10
+MAX_TOP = 100
+
+# Séries dont la dernière valeur a plus de N ans de retard sur la plus récente : écartées
+MAX_STALENESS = 2
+
+# Nombre minimal de variations passées pour calculer un z-score
+MIN_HISTORY = 5
+
+# Nombre maximal de réponses gardées sérialisées
+MAX_CACHED_BODIES = 64
+
+
+class MoversService:
+    """Singleton : statistiques de variation de toutes les séries, par fenêtre"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._version = None
+            cls._instance._stats = {}   # fenêtre → dict de tableaux alignés sur les lignes de la matrice
+            cls._instance._bodies = {}  # (fenêtre, source, top) → octets JSON
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    # ─────────────────────────────────────────────────
+    # Calcul
+    # ─────────────────────────────────────────────────
+    @staticmethod
+    def _compute(matrix, window):
+        """
+        Une passe vectorisée sur toute la matrice :
+        dernière valeur, valeur `window` ans plus tôt, variation absolue, variation en %
+        (sur un an) ou TCAM en % (sur plusieurs années), z-score de la variation sur la
+        fenêtre par rapport aux variations passées de même durée de la même série (celles
+        qui se terminent au plus tard l'année de base, sans recouvrement avec la dernière).
+        """
+        values = matrix.values
+        years = matrix.years
+        n_rows, n_years = values.shape
+        rows = np.arange(n_rows)
+
+        last_col = matrix._last_valid_index()[:, -1]
+        has_last = last_col >= 0
+        last_col_safe = np.where(has_last, last_col, 0)
+        latest = np.where(has_last, values[rows, last_col_safe], np.nan)
+
+        base_col = last_col - window
+        has_base = has_last & (base_col >= 0)
+        base = np.where(has_base, values[rows, np.where(has_base, base_col, 0)], np.nan)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = latest - base
+            if window == 1:
+                # Variation en % sans changement de signe seulement (un solde qui passe de -1 à +3 n'a pas de %)
+                pct = np.where(np.sign(latest) == np.sign(base), change / np.abs(base), np.nan) * 100
+            else:
+                # TCAM défini pour deux valeurs strictement positives seulement
+                pct = np.where((latest > 0) & (base > 0), (latest / base) ** (1.0 / window) - 1, np.nan) * 100
+            pct[~np.isfinite(pct)] = np.nan
+
+            # Z-score : variation sur `window` ans vs historique des variations sur `window` ans
+            # (colonne j : de l'année j à l'année j + window ; NaN si l'une des deux manque)
+            diffs = values[:, window:] - values[:, :-window]
+            ends_before_base = np.arange(diffs.shape[1])[None, :] + window <= base_col[:, None]
+            history = np.where(ends_before_base, diffs, np.nan)
+            valid = ~np.isnan(history)
+            count = valid.sum(axis=1)
+            filled = np.where(valid, history, 0.0)
+            mean = filled.sum(axis=1) / count
+            var = (np.where(valid, history - mean[:, None], 0.0) ** 2).sum(axis=1) / (count - 1)
+            z = (change - mean) / np.sqrt(var)
+            z[(count < MIN_HISTORY) | ~np.isfinite(z)] = np.nan
+
+        latest_year = np.where(has_last, years[last_col_safe], -1)
+        fresh = has_last & (latest_year >= latest_year.max() - MAX_STALENESS)
+        return {
+            'latest_year': latest_year,
+            'latest': latest,
+            'base': base,
+            'change': change,
+            'pct': pct,
+            'z': z,
+            'fresh': fresh,
+        }
+
+    def _ensure(self):
+        """Invalide les résultats si la version des données a changé."""
+        series_matrix.ensure()
+        if self._version != series_matrix.version:
+            with self._lock:
+                if self._version != series_matrix.version:
+                    self._stats = {}
+                    self._bodies = {}
+                    self._version = series_matrix.version
+
+    def get_stats(self, window):
+        """Statistiques de toutes les séries pour une fenêtre (calculées une fois par version)."""
+        self._ensure()
+        stats = self._stats.get(window)
+        if stats is None:
+            stats = self._compute(series_matrix, window)
+            self._stats[window] = stats
+        return stats
+
+    # ─────────────────────────────────────────────────
+    # Classements
+    # ─────────────────────────────────────────────────
+    def _entry(self, stats, row, window):
+        m = series_matrix
+        year = int(stats['latest_year'][row])
+        z = stats['z'][row]
+        pct = stats['pct'][row]
+        return {
+            'code': m.codes[row],
+            'name': m.names[row],
+            'unit': m.units[row],
+            'source': m.sources[row],
+            'year': year,
+            'base_year': year - window,
+            'value': float(stats['latest'][row]),
+            'base_value': float(stats['base'][row]),
+            'change': float(stats['change'][row]),
+            'pct': None if np.isnan(pct) else round(float(pct), 2),
+            'z': None if np.isnan(z) else round(float(z), 2),
+        }
+
+    def rank(self, window=1, source=None, top=DEFAULT_TOP):
+        """
+        {'gainers', 'losers', 'unusual', 'count'} :
+        plus fortes hausses / baisses en % (variation sur un an ou TCAM) et
+        variations les plus inhabituelles (|z-score|) parmi les séries à jour ; ces
+        dernières peuvent être sans % (changement de signe, base négative) : 'pct' None.
+        """
+        stats = self.get_stats(window)
+        fresh = stats['fresh']
+        if source is not None:
+            fresh = fresh & (series_matrix.families == source)
+
+        rows = np.nonzero(fresh & ~np.isnan(stats['pct']))[0]
+        pct = stats['pct'][rows]
+        order = np.argsort(pct, kind='stable')
+        gainers = [r for r in rows[order[::-1]][:top] if stats['pct'][r] > 0]
+        losers = [r for r in rows[order][:top] if stats['pct'][r] < 0]
+
+        z_rows = np.nonzero(fresh & ~np.isnan(stats['z']))[0]
+        unusual = z_rows[np.argsort(-np.abs(stats['z'][z_rows]), kind='stable')][:top]
+
+        return {
+            'count': int(len(rows)),
+            'gainers': [self._entry(stats, r, window) for r in gainers],
+            'losers': [self._entry(stats, r, window) for r in losers],
+            'unusual': [self._entry(stats, r, window) for r in unusual],
+        }
+
+    def get_movers_body(self, window=1, source=None, top=DEFAULT_TOP):
+        """Corps JSON de /api/movers, sérialisé une fois par (fenêtre, source, top)."""
+        self._ensure()
+        key = (window, source, top)
+        body = self._bodies.get(key)
+        if body is None:
+            body = render_json_bytes({'success': True, 'window': window, 'source': source,
+                                      **self.rank(window, source, top)})
+            if len(self._bodies) >= MAX_CACHED_BODIES:
+                self._bodies.clear()
+            self._bodies[key] = body
+        return body
+
+    # ─────────────────────────────────────────────────
+    # Contexte « faits marquants » (dashboard, chat)
+    # ─────────────────────────────────────────────────
+    @staticmethod
+    def _describe(entry, window):
+        if entry['pct'] is None:
+            # Pas de % (changement de signe, base négative ou nulle) : variation absolue
+            change = f"{entry['change']:+.4g} entre {entry['base_year']} et {entry['year']}"
+        elif window == 1:
+            change = f"{entry['pct']:+.1f} % en {entry['year']} (vs {entry['base_year']})"
+        else:
+            change = f"{entry['pct']:+.1f} %/an entre {entry['base_year']} et {entry['year']}"
+        line = f"{entry['name']} : {change}, dernière valeur {entry['value']:.4g}"
+        if entry['unit']:
+            line += f" {entry['unit']}"
+        return line
+
+    def notable(self, top=5, source=None):
+        """
+        Faits marquants prêts à l'emploi, sans appel au LLM :
+        {'movers': [phrases], 'unusual': [phrases], 'trends': [phrases]}.
+        """
+        yearly = self.rank(1, source, top)
+        trend = self.rank(5, source, top)
+        movers = sorted(yearly['gainers'] + yearly['losers'], key=lambda e: -abs(e['pct']))[:top]
+        return {
+            'movers': [self._describe(e, 1) for e in movers],
+            'unusual': [f"{self._describe(e, 1)} (z = {e['z']:+.1f})" for e in yearly['unusual']],
+            'trends': [self._describe(e, 5) for e in trend['gainers'][:top]],
+        }
+
+    def notable_text(self, top=5, source=None):
+        """Faits marquants sous forme de bloc texte (prompts)."""
+        notable = self.notable(top, source)
+        parts = []
+        for title, key in (("Plus fortes variations sur un an", 'movers'),
+                           ("Variations inhabituelles", 'unusual'),
+                           ("Plus fortes croissances sur 5 ans", 'trends')):
+            if notable[key]:
+                parts.append(title + " :\n" + "\n".join(f"- {line}" for line in notable[key]))
+        return "\n\n".join(parts)
+
+
+# Singleton
+movers_service = MoversService()
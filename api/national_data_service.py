@@ -5,88 +5,24 @@ Singleton pattern identique à data_service.py.
 """
 import os
 import logging
-import pandas as pd
+import numpy as np
+from functools import partial
 from pathlib import Path
 from .anstat_sdmx_service import anstat_sdmx_service, ANSTAT_INDICATOR_META, ANSTAT_SOURCE
+from .national_workbooks import NATIONAL_WORKBOOKS
+from .partitions import partition_store
+from .product_table import LEVEL_TOTAL, ProductTable
+from .series_format import period_layout, series_layout
+from .units import rescale
+from .workbook_mapping import read_workbook
 
 logger = logging.getLogger('api')
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-
-def _safe_float(val):
-    """Convertit une valeur en float, retourne None si impossible ou NaN/Inf."""
-    if val is None or val == '' or val == '-' or val == '…':
-        return None
-    try:
-        import math
-        s = str(val).replace('\xa0', '').replace('\u202f', '').replace(' ', '').replace(',', '.')
-        f = float(s)
-        if math.isnan(f) or math.isinf(f):
-            return None
-        return round(f, 4)
-    except (ValueError, TypeError):
-        return None
-
-
-def _read_table(filepath, sheet_name, header_row=1, data_start_row=2, max_row=None):
-    """
-    Lit un tableau avec structure standard :
-    - header_row (0-indexed) : ligne des en-têtes (Années, 2019, 2020, ...)
-    - data_start_row (0-indexed) : première ligne de données
-    - Retourne un dict {label: {years: [...], values: [...]}}
-    """
-    try:
-        df = pd.read_excel(filepath, sheet_name=sheet_name, header=None)
-    except Exception as e:
-        logger.warning(f"Impossible de lire {filepath} / {sheet_name}: {e}")
-        return {}
-
-    if max_row and max_row < len(df):
-        df = df.iloc[:max_row]
-
-    # Extraire les années depuis la ligne d'en-tête
-    header = df.iloc[header_row]
-    years = []
-    year_cols = []
-    for col_idx, val in enumerate(header):
-        if col_idx == 0:
-            continue  # Skip label column
-        y = _safe_float(val)
-        if y and 2000 <= y <= 2030:
-            years.append(int(y))
-            year_cols.append(col_idx)
-
-    if not years:
-        return {}
-
-    result = {}
-    for row_idx in range(data_start_row, len(df)):
-        row = df.iloc[row_idx]
-        label = row.iloc[0]
-        if pd.isna(label) or str(label).strip() == '':
-            continue
-        label = str(label).strip()
-
-        values = []
-        row_years = []
-        for yi, col_idx in enumerate(year_cols):
-            v = _safe_float(row.iloc[col_idx]) if col_idx < len(row) else None
-            if v is not None:
-                row_years.append(years[yi])
-                values.append(v)
-
-        if values:
-            # Détecter le niveau hiérarchique via l'indentation
-            raw_label = str(df.iloc[row_idx, 0])
-            indent = len(raw_label) - len(raw_label.lstrip())
-            result[label] = {
-                'years': row_years,
-                'values': values,
-                'level': indent,  # 0 = total, >0 = sous-catégorie
-            }
-
-    return result
+# Nombre de clés top_export_i / top_import_i
+TOP_PRODUCTS = 10
+PRODUCT_FLOW_LABELS = {'export': 'exportations', 'import': 'importations'}
 
 
 class NationalDataService:
@@ -106,539 +42,75 @@ class NationalDataService:
             self._loaded = True
 
     def _load_all(self):
-        """Charge les 4 fichiers."""
-        self.tofe = {}
-        self.douanes = {}
-        self.base_eco = {}
-        self.financements = {}
-
-        self._load_tofe()
-        self._load_douanes()
-        self._load_base_eco()
-        self._load_financements()
+        """Déclare une partition par classeur (national.tofe, ...), lue au premier accès."""
+        for source in NATIONAL_WORKBOOKS:
+            partition_store.register(f'national.{source}', partial(self._load_workbook, source))
 
         # ANStat SDMX data (loaded by its own singleton)
         self.anstat = anstat_sdmx_service
 
-        logger.info(f"✓ Données nationales chargées: TOFE={len(self.tofe)} séries, "
-                     f"Douanes={len(self.douanes)} séries, "
-                     f"Base éco={len(self.base_eco)} séries, "
-                     f"Financements={len(self.financements)} séries, "
-                     f"ANStat SDMX={self.anstat.get_series_count()} séries")
-
-    # ──────────────────────────────────────────────
-    # TOFE
-    # ──────────────────────────────────────────────
-    def _load_tofe(self):
-        filepath = BASE_DIR / 'TOFE.xlsx'
-        if not filepath.exists():
-            logger.warning(f"TOFE.xlsx introuvable: {filepath}")
-            return
-
-        try:
-            df = pd.read_excel(filepath, sheet_name='Haut du TOFE', header=None)
-        except Exception as e:
-            logger.warning(f"Erreur lecture TOFE: {e}")
-            return
-
-        # Ligne 0 = en-têtes (Catégorie, 2018, 2019, ..., 2023)
-        header = df.iloc[0]
-        years = []
-        year_cols = []
-        for ci, val in enumerate(header):
-            y = _safe_float(val)
-            if y and 2000 <= y <= 2030:
-                years.append(int(y))
-                year_cols.append(ci)
-
-        # Mapping des lignes clés du TOFE
-        tofe_keys = {
-            'RECETTES ET DONS': 'recettes_et_dons',
-            'RECETTES': 'recettes_totales',
-            'Recettes fiscales': 'recettes_fiscales',
-            'Impôts directs': 'impots_directs',
-            'Impôts sur les biens et services': 'impots_biens_services',
-            "Droits et taxes à l'importation": 'droits_importation',
-            "Taxes à l'exportation": 'taxes_exportation',
-            'Recettes non fiscales': 'recettes_non_fiscales',
-            'Cotisations sociales': 'cotisations_sociales',
-            'DONS': 'dons',
-            'DEPENSES TOTALES ET PRETS NET': 'depenses_totales',
-            'Rémunération des salariés': 'remuneration_salaries',
-            'Prestations sociales': 'prestations_sociales',
-            'Subventions et transferts': 'subventions_transferts',
-            'Dépenses de fonctionnement': 'depenses_fonctionnement',
-            'Intérêts': 'interets_dette',
-            'Dette intérieure': 'interets_dette_interieure',
-            'Dette extérieure': 'interets_dette_exterieure',
-            "Dépenses d'investissement": 'depenses_investissement',
-            'Financées sur ressources intérieures': 'invest_ressources_int',
-            'Financées sur ressources extérieures': 'invest_ressources_ext',
-            'SOLDE BUDGETAIRE GLOBAL': 'solde_budgetaire',
-            'FINANCEMENT NET': 'financement_net',
-            'Financement intérieur': 'financement_interieur',
-            'Financement extérieur': 'financement_exterieur',
-            'APPUIS BUDGETAIRES ATTENDUS/RECUS': 'appuis_budgetaires',
-            'Dépenses pro-pauvres': 'depenses_pro_pauvres',
-        }
-
-        for row_idx in range(1, len(df)):
-            label = df.iloc[row_idx, 0]
-            if pd.isna(label):
-                continue
-            label_clean = str(label).strip()
-
-            # Check exact match first, then startswith for partial matches
-            key = None
-            if label_clean in tofe_keys:
-                key = tofe_keys[label_clean]
-            else:
-                for k, v in tofe_keys.items():
-                    if label_clean.startswith(k):
-                        key = v
-                        break
-
-            if key:
-                row_years = []
-                values = []
-                for yi, ci in enumerate(year_cols):
-                    val = _safe_float(df.iloc[row_idx, ci])
-                    if val is not None:
-                        row_years.append(years[yi])
-                        values.append(val)
-                if values:
-                    self.tofe[key] = {'years': row_years, 'values': values, 'name': label_clean}
-
-        # Calcul pression fiscale si données dispo
-        if 'recettes_fiscales' in self.tofe:
-            self.tofe['_years'] = years
+        logger.info(f"✓ Données nationales: {len(NATIONAL_WORKBOOKS)} classeurs en partitions "
+                    f"({', '.join(partition_store.names('national.'))})")
 
-    # ──────────────────────────────────────────────
-    # DOUANES
-    # ──────────────────────────────────────────────
-    def _load_douanes(self):
-        filepath = BASE_DIR / 'douanes.xlsx'
-        if not filepath.exists():
-            logger.warning(f"douanes.xlsx introuvable: {filepath}")
-            return
-
-        # Agrégats du commerce extérieur
-        try:
-            data = _read_table(filepath, 'Agrégats du commerce extérieur', header_row=1, data_start_row=2)
-            for label, series in data.items():
-                lbl = label.lower()
-                if 'importation' in lbl:
-                    self.douanes['imports_caf'] = {**series, 'name': label}
-                elif 'exportation' in lbl:
-                    self.douanes['exports_fob'] = {**series, 'name': label}
-                elif 'taux de couverture' in lbl:
-                    self.douanes['taux_couverture'] = {**series, 'name': label}
-                elif 'solde' in lbl:
-                    self.douanes['solde_commercial'] = {**series, 'name': label}
-        except Exception as e:
-            logger.warning(f"Erreur lecture Agrégats commerce: {e}")
-
-        # Recettes douanières par taxe
-        try:
-            data = _read_table(filepath, 'recettes douanières1', header_row=1, data_start_row=2)
-            for label, series in data.items():
-                lbl = label.lower()
-                if 'total base brute' in lbl:
-                    self.douanes['recettes_brutes'] = {**series, 'name': label}
-                elif 'total base tofe' in lbl:
-                    self.douanes['recettes_tofe'] = {**series, 'name': label}
-                elif 'tva' in lbl or 'taxe sur la valeur' in lbl:
-                    self.douanes['recettes_tva'] = {**series, 'name': label}
-                elif 'droits de douane' in lbl:
-                    self.douanes['recettes_dd'] = {**series, 'name': label}
-                elif 'droit unique de sortie' in lbl or 'dus' in lbl:
-                    self.douanes['recettes_dus'] = {**series, 'name': label}
-        except Exception as e:
-            logger.warning(f"Erreur lecture recettes douanières: {e}")
-
-        # Exportations par zone géo
-        try:
-            data = _read_table(filepath, 'exportations par zone géo', header_row=1, data_start_row=2)
-            for label, series in data.items():
-                lbl = label.lower()
-                if lbl == 'europe':
-                    self.douanes['export_europe'] = {**series, 'name': label}
-                elif lbl.startswith('afrique'):
-                    self.douanes['export_afrique'] = {**series, 'name': label}
-                elif lbl.startswith('asie'):
-                    self.douanes['export_asie'] = {**series, 'name': label}
-                elif lbl.startswith('am'):
-                    self.douanes['export_amerique'] = {**series, 'name': label}
-                elif 'total' in lbl:
-                    self.douanes['export_total'] = {**series, 'name': label}
-        except Exception as e:
-            logger.warning(f"Erreur lecture exports zone: {e}")
-
-        # Exportations par catégorie de marchandise
-        try:
-            data = _read_table(filepath, 'Exportations des marchandises ', header_row=1, data_start_row=2)
-            for label, series in data.items():
-                lbl = label.lower()
-                if 'agriculture industrielle' in lbl:
-                    self.douanes['export_agri_industrielle'] = {**series, 'name': label}
-                elif 'première transformation' in lbl:
-                    self.douanes['export_premiere_transfo'] = {**series, 'name': label}
-                elif 'manufacturé' in lbl:
-                    self.douanes['export_manufactures'] = {**series, 'name': label}
-                elif 'minier' in lbl:
-                    self.douanes['export_miniers'] = {**series, 'name': label}
-                elif 'total' in lbl:
-                    self.douanes['export_marchandises_total'] = {**series, 'name': label}
-        except Exception as e:
-            logger.warning(f"Erreur lecture exports marchandises: {e}")
+    def _partition(self, source):
+        return partition_store.get(f'national.{source}')
 
-        # Top produits exportés (top 10)
-        try:
-            data = _read_table(filepath, 'Produits exportés', header_row=1, data_start_row=2)
-            top_exports = []
-            for label, series in data.items():
-                if series.get('level', 0) > 0 and series['values']:
-                    last_val = series['values'][-1]
-                    top_exports.append((label, last_val, series))
-            top_exports.sort(key=lambda x: x[1], reverse=True)
-            for i, (label, _, series) in enumerate(top_exports[:10]):
-                self.douanes[f'top_export_{i}'] = {**series, 'name': label}
-        except Exception as e:
-            logger.warning(f"Erreur lecture produits exportés: {e}")
+    @property
+    def tofe(self):
+        return self._partition('tofe')['series']
 
-        # Top produits importés (top 10)
-        try:
-            data = _read_table(filepath, 'Produits importés', header_row=1, data_start_row=2)
-            top_imports = []
-            for label, series in data.items():
-                if series.get('level', 0) == 0 and series['values'] and 'total' not in label.lower():
-                    last_val = series['values'][-1]
-                    top_imports.append((label, last_val, series))
-            top_imports.sort(key=lambda x: x[1], reverse=True)
-            for i, (label, _, series) in enumerate(top_imports[:10]):
-                self.douanes[f'top_import_{i}'] = {**series, 'name': label}
-        except Exception as e:
-            logger.warning(f"Erreur lecture produits importés: {e}")
+    @property
+    def douanes(self):
+        return self._partition('douanes')['series']
 
-    # ──────────────────────────────────────────────
-    # BASE ÉCO
-    # ──────────────────────────────────────────────
-    def _load_base_eco(self):
-        filepath = BASE_DIR / 'Données de la base éco.xlsx'
-        if not filepath.exists():
-            logger.warning(f"Données de la base éco.xlsx introuvable: {filepath}")
-            return
-
-        # --- Structure de l'Économie ---
-        try:
-            df = pd.read_excel(filepath, sheet_name=0, header=None)
-
-            # Bloc 1: Structure PIB par secteur
-            # Row 0=titre, 1=vide, 2=sous-titre, 3=header (Années, 2011, ...), 4+=data
-            header_row = df.iloc[3]
-            years1 = []
-            ycols1 = []
-            for ci, val in enumerate(header_row):
-                y = _safe_float(val)
-                if y and 2000 <= y <= 2030:
-                    years1.append(int(y))
-                    ycols1.append(ci)
-
-            pib_structure_keys = {
-                'Secteur Primaire': 'pib_primaire_pct',
-                'Secteur Secondaire': 'pib_secondaire_pct',
-                'Secteur Tertiaire': 'pib_tertiaire_pct',
-                'Industries extractives': 'pib_extractives_pct',
-                'Industries pétrolières': 'pib_petrole_pct',
-                'Energie (gazeaulec)': 'pib_energie_pct',
-                'BTP': 'pib_btp_pct',
-                'Industries manufacturières': 'pib_manufacturier_pct',
-                'Transports': 'pib_transports_pct',
-                'Télecommunication': 'pib_telecom_pct',
-                'Commerce': 'pib_commerce_pct',
-                'Autres services': 'pib_autres_services_pct',
-                "Services d'administration publique": 'pib_admin_publique_pct',
-            }
+    @property
+    def base_eco(self):
+        return self._partition('base_eco')['series']
 
-            for row_idx in range(4, 30):
-                if row_idx >= len(df):
-                    break
-                label = str(df.iloc[row_idx, 0]).strip() if not pd.isna(df.iloc[row_idx, 0]) else ''
-                key = pib_structure_keys.get(label)
-                if key:
-                    row_years = []
-                    values = []
-                    for yi, ci in enumerate(ycols1):
-                        v = _safe_float(df.iloc[row_idx, ci])
-                        if v is not None:
-                            row_years.append(years1[yi])
-                            values.append(v)
-                    if values:
-                        self.base_eco[key] = {'years': row_years, 'values': values, 'name': label}
+    @property
+    def financements(self):
+        return self._partition('financements')['series']
 
-            # Bloc: PIB nominal, croissance, FBCF (L114-L121)
-            # Header at row 113 (index)
-            if len(df) > 114:
-                header2 = df.iloc[113]
-                years2 = []
-                ycols2 = []
-                for ci, val in enumerate(header2):
-                    y = _safe_float(val)
-                    if y and 2000 <= y <= 2030:
-                        years2.append(int(y))
-                        ycols2.append(ci)
+    @property
+    def products(self):
+        """Flux ('export', 'import') → ProductTable."""
+        return self._partition('douanes')['products']
 
-                macro_keys = {
-                    'Taux de croissance PIB réel': 'croissance_pib_reel',
-                    'PIB en Millions XOF': 'pib_nominal_mxof',
-                    'Formation Brute de Capital Fixe': 'fbcf_mxof',
-                    "Taux d'investissement": 'taux_investissement',
-                }
-
-                for row_idx in range(114, min(122, len(df))):
-                    label = str(df.iloc[row_idx, 0]).strip() if not pd.isna(df.iloc[row_idx, 0]) else ''
-                    for prefix, key in macro_keys.items():
-                        if label.startswith(prefix):
-                            row_years = []
-                            values = []
-                            for yi, ci in enumerate(ycols2):
-                                v = _safe_float(df.iloc[row_idx, ci])
-                                if v is not None:
-                                    row_years.append(years2[yi])
-                                    values.append(v)
-                            if values:
-                                self.base_eco[key] = {'years': row_years, 'values': values, 'name': label}
-                            break
-
-            # IDE (L123-L135)
-            if len(df) > 124:
-                header3 = df.iloc[122]
-                years3 = []
-                ycols3 = []
-                for ci, val in enumerate(header3):
-                    y = _safe_float(val)
-                    if y and 2000 <= y <= 2030:
-                        years3.append(int(y))
-                        ycols3.append(ci)
-
-                for row_idx in range(123, min(136, len(df))):
-                    label = str(df.iloc[row_idx, 0]).strip() if not pd.isna(df.iloc[row_idx, 0]) else ''
-                    if label.startswith('Total IDE reçus'):
-                        row_years = []
-                        values = []
-                        for yi, ci in enumerate(ycols3):
-                            v = _safe_float(df.iloc[row_idx, ci])
-                            if v is not None:
-                                row_years.append(years3[yi])
-                                values.append(v)
-                        if values:
-                            self.base_eco['ide_total_mds'] = {'years': row_years, 'values': values, 'name': label}
-
-            # Effectifs employés (L52-L69)
-            if len(df) > 52:
-                header_emp = df.iloc[51]
-                years_emp = []
-                ycols_emp = []
-                for ci, val in enumerate(header_emp):
-                    y = _safe_float(val)
-                    if y and 2000 <= y <= 2030:
-                        years_emp.append(int(y))
-                        ycols_emp.append(ci)
-
-                emp_keys = {
-                    'Primaire': 'emploi_primaire',
-                    'Secondaire': 'emploi_secondaire',
-                    'Tertiaire': 'emploi_tertiaire',
-                    'Emploi total': 'emploi_total',
-                }
-                for row_idx in range(52, min(70, len(df))):
-                    label = str(df.iloc[row_idx, 0]).strip() if not pd.isna(df.iloc[row_idx, 0]) else ''
-                    key = emp_keys.get(label)
-                    if key:
-                        row_years = []
-                        values = []
-                        for yi, ci in enumerate(ycols_emp):
-                            v = _safe_float(df.iloc[row_idx, ci])
-                            if v is not None:
-                                row_years.append(years_emp[yi])
-                                values.append(v)
-                        if values:
-                            self.base_eco[key] = {'years': row_years, 'values': values, 'name': label}
-
-        except Exception as e:
-            logger.warning(f"Erreur lecture Structure Economie: {e}")
-
-        # --- Agro-industrie ---
-        try:
-            df = pd.read_excel(filepath, sheet_name='Agro-industrie', header=None)
-            header = df.iloc[1]
-            years = []
-            ycols = []
-            for ci, val in enumerate(header):
-                y = _safe_float(val)
-                if y and 2000 <= y <= 2030:
-                    years.append(int(y))
-                    ycols.append(ci)
-
-            agro_keys = {
-                'Production de cacao (en tonnes)': 'cacao_production',
-                'Quantité Cacao transformée (en tonnes)': 'cacao_transforme',
-                'Taux de transformation de cacaco': 'cacao_taux_transfo',
-            }
-            for row_idx in range(2, min(7, len(df))):
-                label = str(df.iloc[row_idx, 0]).strip() if not pd.isna(df.iloc[row_idx, 0]) else ''
-                for prefix, key in agro_keys.items():
-                    if label.startswith(prefix):
-                        row_years = []
-                        values = []
-                        for yi, ci in enumerate(ycols):
-                            v = _safe_float(df.iloc[row_idx, ci])
-                            if v is not None:
-                                row_years.append(years[yi])
-                                values.append(v)
-                        if values:
-                            self.base_eco[key] = {'years': row_years, 'values': values, 'name': label}
-                        break
-        except Exception as e:
-            logger.warning(f"Erreur lecture Agro-industrie: {e}")
-
-        # --- Dette publique ---
-        try:
-            df = pd.read_excel(filepath, sheet_name='Dette publique', header=None)
-
-            # Série longue (L15-L23, header at L15)
-            header = df.iloc[15]
-            years = []
-            ycols = []
-            for ci, val in enumerate(header):
-                y = _safe_float(val)
-                if y and 2000 <= y <= 2030:
-                    years.append(int(y))
-                    ycols.append(ci)
-
-            dette_keys = {
-                'Stock total dette': 'dette_stock_total',
-                '% du PIB': None,  # handled specially
-                'Extérieure': 'dette_exterieure',
-                'Intérieure': 'dette_interieure',
-                'PIB Nominal': 'pib_nominal_mds',
-            }
-
-            pib_pct_count = 0
-            for row_idx in range(16, min(24, len(df))):
-                label = str(df.iloc[row_idx, 0]).strip() if not pd.isna(df.iloc[row_idx, 0]) else ''
-                matched = False
-                for prefix, key in dette_keys.items():
-                    if label.startswith(prefix):
-                        if prefix == '% du PIB':
-                            pib_pct_count += 1
-                            if pib_pct_count == 1:
-                                key = 'dette_pct_pib'
-                            elif pib_pct_count == 2:
-                                key = 'dette_ext_pct_pib'
-                            elif pib_pct_count == 3:
-                                key = 'dette_int_pct_pib'
-                        if prefix == 'Extérieure':
-                            key = 'dette_exterieure_mds'
-                        if prefix == 'Intérieure':
-                            key = 'dette_interieure_mds'
-                        if key:
-                            row_years = []
-                            values = []
-                            for yi, ci in enumerate(ycols):
-                                v = _safe_float(df.iloc[row_idx, ci])
-                                if v is not None:
-                                    row_years.append(years[yi])
-                                    values.append(v)
-                            if values:
-                                self.base_eco[key] = {'years': row_years, 'values': values, 'name': label}
-                        matched = True
-                        break
-                # Handle "en % du PIB" lines
-                if not matched and label.startswith('en % du PIB'):
-                    pib_pct_count += 1
-                    if pib_pct_count == 1:
-                        key = 'dette_ext_pct_pib'
-                    else:
-                        key = 'dette_int_pct_pib'
-                    row_years = []
-                    values = []
-                    for yi, ci in enumerate(ycols):
-                        v = _safe_float(df.iloc[row_idx, ci])
-                        if v is not None:
-                            row_years.append(years[yi])
-                            values.append(v)
-                    if values:
-                        self.base_eco[key] = {'years': row_years, 'values': values, 'name': label}
-
-        except Exception as e:
-            logger.warning(f"Erreur lecture Dette publique: {e}")
-
-    # ──────────────────────────────────────────────
-    # FINANCEMENTS
-    # ──────────────────────────────────────────────
-    def _load_financements(self):
-        filepath = BASE_DIR / 'financements.xlsx'
+    def _load_workbook(self, source):
+        """
+        Lit le classeur d'une source selon sa spécification (national_workbooks) :
+        {'series': {clé: série}, 'products': {flux: ProductTable}}.
+        """
+        spec = NATIONAL_WORKBOOKS[source]
+        filepath = BASE_DIR / spec['file']
+        partition = {'series': {}, 'products': {}}
         if not filepath.exists():
-            logger.warning(f"financements.xlsx introuvable: {filepath}")
-            return
-
-        # Encours de la dette, tirages
-        try:
-            data = _read_table(filepath, 'Encours de la dette, tirages', header_row=1, data_start_row=2)
-            fin_keys = {
-                'Dette totale': 'dette_totale',
-                'Dette extérieure': 'dette_exterieure',
-                'Dette intérieure': 'dette_interieure',
-                'Tirages / Émissions totaux': 'tirages_totaux',
-                'Service total de la dette': 'service_dette_total',
-                'Remboursement principal total': 'remboursement_principal',
-                'Paiement intérêts total': 'paiement_interets',
-            }
-            for label, series in data.items():
-                for prefix, key in fin_keys.items():
-                    if label.startswith(prefix):
-                        self.financements[key] = {**series, 'name': label}
-                        break
-        except Exception as e:
-            logger.warning(f"Erreur lecture encours dette: {e}")
-
-        # Ratios principaux
-        try:
-            data = _read_table(filepath, 'Ratios principaux et indicateur', header_row=1, data_start_row=2)
-            ratio_keys = {
-                'Dette du gouvernement central': 'dette_pct_pib',
-                'Paiement des intérêts (% des recettes': 'interets_pct_recettes',
-                'Paiement des intérêts (% du PIB)': 'interets_pct_pib',
-                "Taux d'intérêt moyen pondéré de la dette (%)": 'taux_interet_moyen',
-                "Durée de vie moyenne jusqu'à échéance (années": 'duree_vie_moyenne',
-                'Dette à court terme (% du total)': 'dette_ct_pct',
-                'Dette en devises étrangères (% du total)': 'dette_devises_pct',
-                'Dette à taux fixe (% du total)': 'dette_taux_fixe_pct',
-            }
-            for label, series in data.items():
-                for prefix, key in ratio_keys.items():
-                    if label.startswith(prefix):
-                        self.financements[key] = {**series, 'name': label}
-                        break
-        except Exception as e:
-            logger.warning(f"Erreur lecture ratios financements: {e}")
-
-        # Service dette extérieure par créancier
-        try:
-            data = _read_table(filepath, 'Service de la dette extérieure', header_row=1, data_start_row=2)
-            for label, series in data.items():
-                lbl = label.lower().strip()
-                if lbl.startswith('bilatéraux') and series.get('level', 0) == 0:
-                    self.financements['service_ext_bilateral'] = {**series, 'name': label}
-                elif lbl.startswith('multilatéraux') and series.get('level', 0) == 0:
-                    self.financements['service_ext_multilateral'] = {**series, 'name': label}
-                elif "détenteurs d'obligations" in lbl and series.get('level', 0) == 0:
-                    self.financements['service_ext_obligations'] = {**series, 'name': label}
-                elif lbl.startswith('total service'):
-                    self.financements['service_ext_total'] = {**series, 'name': label}
-        except Exception as e:
-            logger.warning(f"Erreur lecture service dette ext: {e}")
+            logger.warning(f"{spec['file']} introuvable: {filepath}")
+            return partition
+        partition['series'], collected = read_workbook(filepath, spec['tables'])
+        self._load_products(partition, collected)
+        logger.info(f"✓ {spec['file']}: {len(partition['series'])} séries")
+        return partition
+
+    def _load_products(self, partition, tables):
+        """
+        Produits exportés / importés : toutes les lignes (voir product_table), exposées
+        sous un code stable, plus les clés top_export_i / top_import_i (top 10 de la
+        dernière année).
+        """
+        series = partition['series']
+        for flow, table in tables.items():
+            try:
+                products = ProductTable(flow, table)
+                rows, _ = products.top_k(TOP_PRODUCTS)
+            except Exception as e:
+                logger.warning(f"Erreur lecture produits ({flow}): {e}")
+                continue
+            partition['products'][flow] = products
+            for row, code in enumerate(products.codes):
+                series[code] = products.series(row)
+            for i, row in enumerate(rows.tolist()):
+                series[f'top_{flow}_{i}'] = products.series(row)
 
     # ──────────────────────────────────────────────
     # API publique
@@ -655,30 +127,80 @@ class NationalDataService:
         """Retourne toutes les séries d'une source."""
         return getattr(self, source, {})
 
-    def get_pression_fiscale(self):
-        """Calcule la pression fiscale = recettes fiscales / PIB nominal * 100."""
-        rf = self.tofe.get('recettes_fiscales', {})
+    def _product_meta(self, code):
+        """Nom, unité et description d'un produit douanier ('export.cacao_feves'), None si inconnu."""
+        flow = code.split('.', 1)[0]
+        table = self.products.get(flow)
+        row = table.index.get(code) if table is not None else None
+        if row is None:
+            return None
+        info = table.describe(row)
+        label = PRODUCT_FLOW_LABELS[flow]
+        kind = 'de la catégorie' if info['level'] == 'categorie' else 'du produit'
+        return {
+            'name': f"{info['name']} ({label})",
+            'unit': 'Mds FCFA',
+            'description': f"Valeur des {label} {kind}: {info['name']}"
+                           + (f" ({info['category']})" if info['category'] else ''),
+        }
+
+    def get_top_products(self, flow, k=TOP_PRODUCTS, year=None, start=None, end=None):
+        """
+        Classement des produits exportés ('export') ou importés ('import') pour une année
+        (par défaut, la dernière) ou une période (somme des années de start à end) :
+        {'flow', 'start', 'end', 'unit', 'products': [{rank, code, name, category, value}]}.
+        Retourne None si le flux est inconnu ; lève ValueError si la période est invalide.
+        """
+        table = self.products.get(flow)
+        if table is None:
+            return None
+        start, end = table.period(year, start, end)
+        rows, values = table.top_k(k, start=start, end=end)
+        products = []
+        for rank, (row, value) in enumerate(zip(rows.tolist(), values.tolist()), start=1):
+            info = table.describe(row)
+            products.append({
+                'rank': rank,
+                'code': f"NAT.douanes.{info['code']}",
+                'name': info['name'],
+                'category': info['category'],
+                'value': round(value, 4),
+            })
+        return {'flow': flow, 'start': start, 'end': end, 'unit': 'Mds FCFA', 'products': products}
+
+    def _pct_of_pib(self, key, name):
+        """
+        Série TOFE `key` rapportée au PIB nominal (%), années communes uniquement.
+        Les échelles (TOFE en Mds FCFA, PIB en Millions XOF) sont alignées d'après INDICATOR_META.
+        """
+        series = self.tofe.get(key, {})
         pib = self.base_eco.get('pib_nominal_mxof', {})
-        if not rf.get('values') or not pib.get('values'):
-            return {'years': [], 'values': [], 'name': 'Pression fiscale (% PIB)'}
+        if not series.get('values') or not pib.get('values'):
+            return {'years': [], 'values': [], 'name': name}
 
-        # Aligner les années communes
-        rf_dict = dict(zip(rf['years'], rf['values']))
+        series_dict = dict(zip(series['years'], series['values']))
         pib_dict = dict(zip(pib['years'], pib['values']))
-        common_years = sorted(set(rf['years']) & set(pib['years']))
+        common_years = sorted(set(series['years']) & set(pib['years']))
+
+        values = np.array([series_dict[y] for y in common_years], dtype=np.float64)
+        pib_values = rescale(
+            np.array([pib_dict[y] for y in common_years], dtype=np.float64),
+            self.INDICATOR_META['base_eco.pib_nominal_mxof']['unit'],
+            self.INDICATOR_META[f'tofe.{key}']['unit'],
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct = values / pib_values * 100
+        keep = (pib_values > 0) & np.isfinite(pct)
 
-        years = []
-        values = []
-        for y in common_years:
-            pib_val = pib_dict[y]
-            if pib_val and pib_val > 0:
-                # rf en milliards FCFA, PIB en millions XOF → convertir PIB en milliards
-                pib_mds = pib_val / 1000
-                pf = (rf_dict[y] / pib_mds) * 100
-                years.append(y)
-                values.append(round(pf, 1))
+        return {
+            'years': [y for y, k in zip(common_years, keep.tolist()) if k],
+            'values': [round(v, 1) for v in pct[keep].tolist()],
+            'name': name,
+        }
 
-        return {'years': years, 'values': values, 'name': 'Pression fiscale (% PIB)'}
+    def get_pression_fiscale(self):
+        """Calcule la pression fiscale = recettes fiscales / PIB nominal * 100."""
+        return self._pct_of_pib('recettes_fiscales', 'Pression fiscale (% PIB)')
 
     # ──────────────────────────────────────────────
     # Sources & métadonnées
@@ -823,7 +345,7 @@ class NationalDataService:
             })
 
         # Add top products (dynamic)
-        for i in range(10):
+        for i in range(TOP_PRODUCTS):
             exp_key = f'top_export_{i}'
             imp_key = f'top_import_{i}'
             if exp_key in self.douanes:
@@ -847,6 +369,22 @@ class NationalDataService:
                     'description': f'Valeur des importations du produit: {self.douanes[imp_key]["name"]}',
                 })
 
+        # All products and categories, under their stable code
+        for table in self.products.values():
+            for row, code in enumerate(table.codes):
+                if table.levels[row] == LEVEL_TOTAL:
+                    continue
+                meta = self._product_meta(code)
+                indicators.append({
+                    'code': f'NAT.douanes.{code}',
+                    'name': meta['name'],
+                    'unit': meta['unit'],
+                    'source': self.SOURCES['douanes']['source'],
+                    'source_link': self.SOURCES['douanes']['source_link'],
+                    'methodology': self.SOURCES['douanes']['methodology'],
+                    'description': meta['description'],
+                })
+
         # ── ANStat SDMX indicators ──
         for full_key, meta in ANSTAT_INDICATOR_META.items():
             series = self.anstat.get_series(full_key)
@@ -864,10 +402,11 @@ class NationalDataService:
 
         return indicators
 
-    def get_indicator_detail_by_code(self, code):
+    def get_indicator_detail_by_code(self, code, layout='records'):
         """
         Retourne le détail d'un indicateur national par son code NAT.xxx.yyy.
         Compatible avec le format attendu par l'API /api/indicator/<code>.
+        layout='columnar' → years / values en colonnes parallèles (voir series_format).
         """
         if not code.startswith('NAT.'):
             return None
@@ -881,7 +420,6 @@ class NationalDataService:
             series = self.anstat.get_series(anstat_key)
             if not series or not series.get('values'):
                 return None
-            values = [{'year': y, 'value': v} for y, v in zip(series['years'], series['values'])]
             return {
                 'code': code,
                 'name': meta.get('name', series.get('name', anstat_key)),
@@ -890,7 +428,7 @@ class NationalDataService:
                 'source_link': ANSTAT_SOURCE.get('source_link', ''),
                 'methodology': ANSTAT_SOURCE.get('methodology', ''),
                 'definition': meta.get('description', ''),
-                'values': values,
+                **series_layout(series['years'], series['values'], layout),
             }
 
         # ── Original national data path: NAT.source.key ──
@@ -900,7 +438,8 @@ class NationalDataService:
 
         source_key, data_key = parts
         src_meta = self.SOURCES.get(source_key, {})
-        meta = self.INDICATOR_META.get(full_key, {})
+        meta = self.INDICATOR_META.get(full_key) or \
+            (self._product_meta(data_key) if source_key == 'douanes' else None) or {}
 
         # Récupérer la série
         if data_key == 'pression_fiscale':
@@ -914,9 +453,6 @@ class NationalDataService:
         if not series or not series.get('values'):
             return None
 
-        # Build values in {year, value} format
-        values = [{'year': y, 'value': v} for y, v in zip(series['years'], series['values'])]
-
         return {
             'code': code,
             'name': meta.get('name', series.get('name', data_key)),
@@ -925,7 +461,31 @@ class NationalDataService:
             'source_link': src_meta.get('source_link', ''),
             'methodology': src_meta.get('methodology', ''),
             'definition': meta.get('description', ''),
-            'values': values,
+            **series_layout(series['years'], series['values'], layout),
+        }
+
+    def get_indicator_detail_at_freq(self, code, freq, agg=None, layout='records'):
+        """
+        Détail d'un indicateur ANStat (NAT.anstat.theme.CODE) à la fréquence `freq`
+        ('A', 'Q', 'M'), ré-échantillonné depuis ses observations d'origine (voir
+        AnstatSdmxService.resample). Retourne None si le code est inconnu ;
+        lève ValueError si la fréquence n'est pas disponible.
+        """
+        detail = self.get_indicator_detail_by_code(code, layout='columnar')
+        if detail is None or not code.startswith('NAT.anstat.'):
+            return None
+        anstat_key = code[len('NAT.anstat.'):]
+        series = self.anstat.resample(anstat_key, freq, agg)
+        if series is None:
+            return None
+        base = {k: v for k, v in detail.items() if k not in ('years', 'values')}
+        return {
+            **base,
+            'freq': series['freq'],
+            'agg': series['agg'],
+            'freq_orig': series['freq_orig'],
+            'frequencies': self.anstat.get_frequencies(anstat_key),
+            **period_layout(series['periods'], series['values'], layout),
         }
 
     def get_compact_indicator_list(self):
@@ -1007,6 +567,15 @@ class NationalDataService:
                             'name': name,
                             'score': 200,
                         })
+        # Every product, under its stable code
+        for table in self.products.values():
+            for row, code in enumerate(table.codes):
+                if table.levels[row] != LEVEL_TOTAL and query_lower in table.names[row].lower():
+                    results.append({
+                        'code': f'NAT.douanes.{code}',
+                        'name': self._product_meta(code)['name'],
+                        'score': 200,
+                    })
         # ── ANStat SDMX search ──
         for full_key, meta in ANSTAT_INDICATOR_META.items():
             series = self.anstat.get_series(full_key)
@@ -1038,27 +607,7 @@ class NationalDataService:
 
     def get_solde_budgetaire_pct_pib(self):
         """Retourne le solde budgétaire en % du PIB depuis le TOFE."""
-        solde = self.tofe.get('solde_budgetaire', {})
-        pib = self.base_eco.get('pib_nominal_mxof', {})
-        if not solde.get('values') or not pib.get('values'):
-            return {'years': [], 'values': [], 'name': 'Solde budgétaire (% PIB)'}
-
-        solde_dict = dict(zip(solde['years'], solde['values']))
-        pib_dict = dict(zip(pib['years'], pib['values']))
-        common_years = sorted(set(solde['years']) & set(pib['years']))
-
-        years = []
-        values = []
-        for y in common_years:
-            pib_val = pib_dict[y]
-            if pib_val and pib_val > 0:
-                pib_mds = pib_val / 1000
-                pct = (solde_dict[y] / pib_mds) * 100
-                years.append(y)
-                values.append(round(pct, 1))
-
-        return {'years': years, 'values': values, 'name': 'Solde budgétaire (% PIB)'}
-
+        return self._pct_of_pib('solde_budgetaire', 'Solde budgétaire (% PIB)')
 
 # Singleton instance
 national_data_service = NationalDataService()
@@ -0,0 +1,269 @@
+"""
+Spécification déclarative des classeurs nationaux : pour chaque source (TOFE, Douanes,
+Base éco, Financements), le fichier, les tableaux à lire et les règles qui associent
+les libellés de lignes aux clés des séries (voir workbook_mapping pour le format).
+
+Ajouter une série ou une source nationale revient à compléter cette spécification.
+"""
+from .workbook_mapping import LAYOUT_ROWS, LAYOUT_TABLE
+
+
+def _rules(mode, mapping):
+    """Règles d'un même mode à partir d'un dict {motif: clé} (ordre conservé)."""
+    return [(mode, pattern, key) for pattern, key in mapping.items()]
+
+
+# ──────────────────────────────────────────────
+# TOFE
+# ──────────────────────────────────────────────
+TOFE_KEYS = {
+    'RECETTES ET DONS': 'recettes_et_dons',
+    'RECETTES': 'recettes_totales',
+    'Recettes fiscales': 'recettes_fiscales',
+    'Impôts directs': 'impots_directs',
+    'Impôts sur les biens et services': 'impots_biens_services',
+    "Droits et taxes à l'importation": 'droits_importation',
+    "Taxes à l'exportation": 'taxes_exportation',
+    'Recettes non fiscales': 'recettes_non_fiscales',
+    'Cotisations sociales': 'cotisations_sociales',
+    'DONS': 'dons',
+    'DEPENSES TOTALES ET PRETS NET': 'depenses_totales',
+    'Rémunération des salariés': 'remuneration_salaries',
+    'Prestations sociales': 'prestations_sociales',
+    'Subventions et transferts': 'subventions_transferts',
+    'Dépenses de fonctionnement': 'depenses_fonctionnement',
+    'Intérêts': 'interets_dette',
+    'Dette intérieure': 'interets_dette_interieure',
+    'Dette extérieure': 'interets_dette_exterieure',
+    "Dépenses d'investissement": 'depenses_investissement',
+    'Financées sur ressources intérieures': 'invest_ressources_int',
+    'Financées sur ressources extérieures': 'invest_ressources_ext',
+    'SOLDE BUDGETAIRE GLOBAL': 'solde_budgetaire',
+    'FINANCEMENT NET': 'financement_net',
+    'Financement intérieur': 'financement_interieur',
+    'Financement extérieur': 'financement_exterieur',
+    'APPUIS BUDGETAIRES ATTENDUS/RECUS': 'appuis_budgetaires',
+    'Dépenses pro-pauvres': 'depenses_pro_pauvres',
+}
+
+TOFE = {
+    'file': 'TOFE.xlsx',
+    'tables': [
+        {
+            # Ligne 0 = en-têtes (Catégorie, 2018, 2019, ..., 2023) ; libellé exact
+            # d'abord, puis début de libellé
+            'sheet': 'Haut du TOFE',
+            'header_row': 0,
+            'layout': LAYOUT_ROWS,
+            'rules': _rules('exact', TOFE_KEYS) + _rules('prefix', TOFE_KEYS),
+        },
+    ],
+}
+
+# ──────────────────────────────────────────────
+# DOUANES
+# ──────────────────────────────────────────────
+DOUANES = {
+    'file': 'douanes.xlsx',
+    'tables': [
+        {
+            'sheet': 'Agrégats du commerce extérieur',
+            'header_row': 1,
+            'lower': True,
+            'rules': [
+                ('contains', 'importation', 'imports_caf'),
+                ('contains', 'exportation', 'exports_fob'),
+                ('contains', 'taux de couverture', 'taux_couverture'),
+                ('contains', 'solde', 'solde_commercial'),
+            ],
+        },
+        {
+            # Recettes douanières par taxe
+            'sheet': 'recettes douanières1',
+            'header_row': 1,
+            'lower': True,
+            'rules': [
+                ('contains', 'total base brute', 'recettes_brutes'),
+                ('contains', 'total base tofe', 'recettes_tofe'),
+                ('contains', ('tva', 'taxe sur la valeur'), 'recettes_tva'),
+                ('contains', 'droits de douane', 'recettes_dd'),
+                ('contains', ('droit unique de sortie', 'dus'), 'recettes_dus'),
+            ],
+        },
+        {
+            'sheet': 'exportations par zone géo',
+            'header_row': 1,
+            'lower': True,
+            'rules': [
+                ('exact', 'europe', 'export_europe'),
+                ('prefix', 'afrique', 'export_afrique'),
+                ('prefix', 'asie', 'export_asie'),
+                ('prefix', 'am', 'export_amerique'),
+                ('contains', 'total', 'export_total'),
+            ],
+        },
+        {
+            # Exportations par catégorie de marchandise
+            'sheet': 'Exportations des marchandises ',
+            'header_row': 1,
+            'lower': True,
+            'rules': [
+                ('contains', 'agriculture industrielle', 'export_agri_industrielle'),
+                ('contains', 'première transformation', 'export_premiere_transfo'),
+                ('contains', 'manufacturé', 'export_manufactures'),
+                ('contains', 'minier', 'export_miniers'),
+                ('contains', 'total', 'export_marchandises_total'),
+            ],
+        },
+        # Produits exportés / importés : tableaux complets (voir product_table)
+        {'sheet': 'Produits exportés', 'header_row': 1, 'collect': 'export'},
+        {'sheet': 'Produits importés', 'header_row': 1, 'collect': 'import'},
+    ],
+}
+
+# ──────────────────────────────────────────────
+# BASE ÉCO
+# ──────────────────────────────────────────────
+BASE_ECO = {
+    'file': 'Données de la base éco.xlsx',
+    'tables': [
+        {
+            # Structure PIB par secteur : 0=titre, 1=vide, 2=sous-titre, 3=en-tête (Années, 2011, ...)
+            'sheet': 0,
+            'header_row': 3,
+            'last_row': 30,
+            'layout': LAYOUT_ROWS,
+            'rules': _rules('exact', {
+                'Secteur Primaire': 'pib_primaire_pct',
+                'Secteur Secondaire': 'pib_secondaire_pct',
+                'Secteur Tertiaire': 'pib_tertiaire_pct',
+                'Industries extractives': 'pib_extractives_pct',
+                'Industries pétrolières': 'pib_petrole_pct',
+                'Energie (gazeaulec)': 'pib_energie_pct',
+                'BTP': 'pib_btp_pct',
+                'Industries manufacturières': 'pib_manufacturier_pct',
+                'Transports': 'pib_transports_pct',
+                'Télecommunication': 'pib_telecom_pct',
+                'Commerce': 'pib_commerce_pct',
+                'Autres services': 'pib_autres_services_pct',
+                "Services d'administration publique": 'pib_admin_publique_pct',
+            }),
+        },
+        {
+            # Effectifs employés (L52-L69)
+            'sheet': 0,
+            'header_row': 51,
+            'last_row': 70,
+            'layout': LAYOUT_ROWS,
+            'rules': _rules('exact', {
+                'Primaire': 'emploi_primaire',
+                'Secondaire': 'emploi_secondaire',
+                'Tertiaire': 'emploi_tertiaire',
+                'Emploi total': 'emploi_total',
+            }),
+        },
+        {
+            # PIB nominal, croissance, FBCF (L114-L121)
+            'sheet': 0,
+            'header_row': 113,
+            'last_row': 122,
+            'layout': LAYOUT_ROWS,
+            'rules': _rules('prefix', {
+                'Taux de croissance PIB réel': 'croissance_pib_reel',
+                'PIB en Millions XOF': 'pib_nominal_mxof',
+                'Formation Brute de Capital Fixe': 'fbcf_mxof',
+                "Taux d'investissement": 'taux_investissement',
+            }),
+        },
+        {
+            # IDE (L123-L135)
+            'sheet': 0,
+            'header_row': 122,
+            'last_row': 136,
+            'layout': LAYOUT_ROWS,
+            'rules': [('prefix', 'Total IDE reçus', 'ide_total_mds')],
+        },
+        {
+            'sheet': 'Agro-industrie',
+            'header_row': 1,
+            'last_row': 7,
+            'layout': LAYOUT_ROWS,
+            'rules': _rules('prefix', {
+                'Production de cacao (en tonnes)': 'cacao_production',
+                'Quantité Cacao transformée (en tonnes)': 'cacao_transforme',
+                'Taux de transformation de cacaco': 'cacao_taux_transfo',
+            }),
+        },
+        {
+            # Série longue (en-tête L15) : chaque encours est suivi de sa ligne « en % du PIB »
+            'sheet': 'Dette publique',
+            'header_row': 15,
+            'last_row': 24,
+            'layout': LAYOUT_ROWS,
+            'rules': _rules('prefix', {
+                'Stock total dette': 'dette_stock_total',
+                '% du PIB': 'dette_pct_pib',
+                'Extérieure': 'dette_exterieure_mds',
+                'Intérieure': 'dette_interieure_mds',
+                'PIB Nominal': 'pib_nominal_mds',
+                'en % du PIB': ['dette_ext_pct_pib', 'dette_int_pct_pib'],
+            }),
+        },
+    ],
+}
+
+# ──────────────────────────────────────────────
+# FINANCEMENTS
+# ──────────────────────────────────────────────
+FINANCEMENTS = {
+    'file': 'financements.xlsx',
+    'tables': [
+        {
+            'sheet': 'Encours de la dette, tirages',
+            'header_row': 1,
+            'rules': _rules('prefix', {
+                'Dette totale': 'dette_totale',
+                'Dette extérieure': 'dette_exterieure',
+                'Dette intérieure': 'dette_interieure',
+                'Tirages / Émissions totaux': 'tirages_totaux',
+                'Service total de la dette': 'service_dette_total',
+                'Remboursement principal total': 'remboursement_principal',
+                'Paiement intérêts total': 'paiement_interets',
+            }),
+        },
+        {
+            'sheet': 'Ratios principaux et indicateur',
+            'header_row': 1,
+            'rules': _rules('prefix', {
+                'Dette du gouvernement central': 'dette_pct_pib',
+                'Paiement des intérêts (% des recettes': 'interets_pct_recettes',
+                'Paiement des intérêts (% du PIB)': 'interets_pct_pib',
+                "Taux d'intérêt moyen pondéré de la dette (%)": 'taux_interet_moyen',
+                "Durée de vie moyenne jusqu'à échéance (années": 'duree_vie_moyenne',
+                'Dette à court terme (% du total)': 'dette_ct_pct',
+                'Dette en devises étrangères (% du total)': 'dette_devises_pct',
+                'Dette à taux fixe (% du total)': 'dette_taux_fixe_pct',
+            }),
+        },
+        {
+            # Service dette extérieure par créancier (lignes de premier niveau)
+            'sheet': 'Service de la dette extérieure',
+            'header_row': 1,
+            'lower': True,
+            'rules': [
+                ('prefix', 'bilatéraux', 'service_ext_bilateral', {'level': 0}),
+                ('prefix', 'multilatéraux', 'service_ext_multilateral', {'level': 0}),
+                ('contains', "détenteurs d'obligations", 'service_ext_obligations', {'level': 0}),
+                ('prefix', 'total service', 'service_ext_total'),
+            ],
+        },
+    ],
+}
+
+# Source (attribut de NationalDataService) → classeur
+NATIONAL_WORKBOOKS = {
+    'tofe': TOFE,
+    'douanes': DOUANES,
+    'base_eco': BASE_ECO,
+    'financements': FINANCEMENTS,
+}
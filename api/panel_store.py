@@ -0,0 +1,333 @@
+"""
+Panel multi-pays : pays × indicateur × année (Banque Mondiale).
+
+Sources : data.xlsx (Côte d'Ivoire) puis les exports WDI déposés dans panel/*.xlsx
+(mêmes colonnes : Country Code, Country Name, Series Code, Indicateur ou Series Name,
+années en colonnes, '2019' ou '2019 [YR2019]'). Un couple (pays, code) déjà lu n'est
+pas remplacé par un fichier suivant : data.xlsx fait foi pour la Côte d'Ivoire.
+
+Le panel est construit une fois par version des données dans build/panel/<version>/
+puis relu en mémoire partagée (np.load mmap_mode='r') par chaque processus :
+- values.npy : float64 (pays, indicateurs, années), NaN = pas de valeur ;
+- coverage.npy : masque de couverture compressé (np.packbits sur l'axe des années, 1 bit
+  par cellule) : les pays couverts et les années renseignées d'une comparaison s'y
+  lisent sans parcourir les valeurs ;
+- meta.json : codes et noms des pays et des indicateurs, années.
+
+Une comparaison (« PIB par habitant CI vs Sénégal vs Ghana ») est une coupe
+values[pays, indicateurs, années], sans boucle sur les lignes.
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .dataset_version import get_dataset_version
+from .product_table import slugify
+from .spreadsheet import read_frame
+
+logger = logging.getLogger('api')
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Fichiers du panel, dans l'ordre de priorité
+PANEL_FILE_PATTERNS = ['data.xlsx', 'panel/*.xlsx']
+PANEL_CACHE_DIR = BASE_DIR / 'build' / 'panel'
+
+HOME_COUNTRY = 'CIV'
+
+# Groupes de pays acceptés par ?countries= (membres actuels)
+COUNTRY_GROUPS = {
+    'UEMOA': ['BEN', 'BFA', 'CIV', 'GNB', 'MLI', 'NER', 'SEN', 'TGO'],
+    # Burkina Faso, Mali et Niger ont quitté la CEDEAO en janvier 2025
+    'CEDEAO': ['BEN', 'CPV', 'CIV', 'GMB', 'GHA', 'GIN', 'GNB', 'LBR', 'NGA', 'SEN', 'SLE', 'TGO'],
+}
+COUNTRY_GROUPS['WAEMU'] = COUNTRY_GROUPS['UEMOA']
+COUNTRY_GROUPS['ECOWAS'] = COUNTRY_GROUPS['CEDEAO']
+
+# Noms français des pays de la sous-région (les exports WDI portent les noms anglais)
+COUNTRY_NAMES_FR = {
+    'BEN': 'Bénin',
+    'BFA': 'Burkina Faso',
+    'CIV': "Côte d'Ivoire",
+    'CPV': 'Cap-Vert',
+    'GHA': 'Ghana',
+    'GIN': 'Guinée',
+    'GMB': 'Gambie',
+    'GNB': 'Guinée-Bissau',
+    'LBR': 'Libéria',
+    'MLI': 'Mali',
+    'NER': 'Niger',
+    'NGA': 'Nigéria',
+    'SEN': 'Sénégal',
+    'SLE': 'Sierra Leone',
+    'TGO': 'Togo',
+}
+
+# Taille maximale d'une comparaison
+MAX_PANEL_CODES = 20
+
+_YEAR_COLUMN_RE = re.compile(r'^\s*((?:19|20)\d\d)(?:\s*\[YR\d{4}\])?\s*$')
+
+
+def _year_of(column):
+    """Année d'une colonne (2019, '2019' ou '2019 [YR2019]'), None sinon."""
+    if isinstance(column, (int, np.integer)):
+        return int(column)
+    m = _YEAR_COLUMN_RE.match(str(column))
+    return int(m.group(1)) if m else None
+
+
+def _read_panel_file(path):
+    """Lignes (pays, nom du pays, code, nom) et valeurs par année d'un classeur WDI."""
+    try:
+        df = read_frame(path, sheet_name='Data')
+    except ValueError:
+        df = read_frame(path, sheet_name=0)
+    name_column = 'Indicateur' if 'Indicateur' in df.columns else 'Series Name'
+    df = df.dropna(subset=['Country Code', 'Series Code'])
+    years = {col: _year_of(col) for col in df.columns}
+    year_columns = [col for col, year in years.items() if year is not None]
+    values = df[year_columns].apply(pd.to_numeric, errors='coerce')
+    values.columns = [years[col] for col in year_columns]
+    keys = pd.DataFrame({
+        'country': df['Country Code'].astype(str).str.strip(),
+        'country_name': df.get('Country Name', df['Country Code']).astype(str).str.strip(),
+        'code': df['Series Code'].astype(str).str.strip(),
+        'name': df[name_column].astype(str).str.strip() if name_column in df.columns else df['Series Code'].astype(str),
+    })
+    return keys, values
+
+
+def _panel_files():
+    files = []
+    for pattern in PANEL_FILE_PATTERNS:
+        files.extend(sorted(p for p in BASE_DIR.glob(pattern) if p.is_file()))
+    return files
+
+
+class PanelStore:
+    """Singleton : panel pays × indicateur × année en mémoire partagée, par version des données"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._version = None
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    # ─────────────────────────────────────────────────
+    # Construction
+    # ─────────────────────────────────────────────────
+    def _build_arrays(self, directory):
+        """Lit les classeurs du panel et écrit ses tableaux dans `directory`."""
+        keys, blocks = [], []
+        for path in _panel_files():
+            try:
+                k, v = _read_panel_file(path)
+            except Exception as e:
+                logger.warning(f"Erreur lecture panel {path.name}: {e}")
+                continue
+            keys.append(k)
+            blocks.append(v)
+
+        if keys:
+            keys = pd.concat(keys, ignore_index=True)
+            values = pd.concat(blocks, ignore_index=True)
+            values = values.T.groupby(level=0).first().T  # colonnes dupliquées entre fichiers
+        else:
+            keys = pd.DataFrame(columns=['country', 'country_name', 'code', 'name'])
+            values = pd.DataFrame()
+        first = ~keys.duplicated(subset=['country', 'code'], keep='first').to_numpy()
+        keys = keys[first]
+        values = values[first]
+
+        years = np.array(sorted(int(y) for y in values.columns), dtype=np.int32)
+        country_idx, countries = pd.factorize(keys['country'])
+        code_idx, codes = pd.factorize(keys['code'])
+        cube = np.full((len(countries), len(codes), len(years)), np.nan)
+        if len(years):
+            cube[country_idx, code_idx, :] = values[years.tolist()].to_numpy(dtype=np.float64)
+
+        covered = ~np.isnan(cube)
+        country_names = keys.groupby('country', sort=False)['country_name'].first()
+        # Noms des indicateurs : ceux de data.xlsx (français) d'abord
+        code_names = keys.groupby('code', sort=False)['name'].first()
+
+        np.save(directory / 'values.npy', cube)
+        np.save(directory / 'coverage.npy', np.packbits(covered, axis=-1))
+        with open(directory / 'meta.json', 'w', encoding='utf-8') as f:
+            json.dump({
+                'years': years.tolist(),
+                'countries': list(countries),
+                'country_names': [COUNTRY_NAMES_FR.get(c, country_names[c]) for c in countries],
+                'codes': list(codes),
+                'names': [code_names[c] for c in codes],
+            }, f, ensure_ascii=False)
+
+    def _materialize(self, version):
+        """Répertoire des tableaux de `version`, construit s'il n'existe pas encore."""
+        directory = PANEL_CACHE_DIR / version
+        if (directory / 'meta.json').exists():
+            return directory
+        PANEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Construction dans un répertoire temporaire puis renommage (plusieurs processus)
+        tmp = Path(tempfile.mkdtemp(dir=PANEL_CACHE_DIR, prefix=f'.{version}-'))
+        try:
+            self._build_arrays(tmp)
+            os.rename(tmp, directory)
+        except OSError:
+            if not (directory / 'meta.json').exists():
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        for old in PANEL_CACHE_DIR.iterdir():
+            if old.name != version and not old.name.startswith('.'):
+                shutil.rmtree(old, ignore_errors=True)
+        return directory
+
+    def _load(self, version):
+        directory = self._materialize(version)
+        with open(directory / 'meta.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.years = np.array(meta['years'], dtype=np.int32)
+        self.countries = meta['countries']
+        self.country_names = meta['country_names']
+        self.codes = meta['codes']
+        self.names = meta['names']
+        self.country_index = {c: i for i, c in enumerate(self.countries)}
+        self.code_index = {c: i for i, c in enumerate(self.codes)}
+        self.values = np.load(directory / 'values.npy', mmap_mode='r')
+        self.coverage = np.load(directory / 'coverage.npy', mmap_mode='r')
+
+        # Noms acceptés par ?countries= : ISO3, nom français ou anglais normalisé
+        self._aliases = {}
+        for i, (code, name) in enumerate(zip(self.countries, self.country_names)):
+            self._aliases[code.lower()] = i
+            self._aliases[slugify(name)] = i
+        logger.info("✓ Panel: %d pays × %d indicateurs × %d années",
+                    len(self.countries), len(self.codes), len(self.years))
+
+    def ensure(self):
+        """Charge (ou recharge) le panel de la version courante des données."""
+        version = get_dataset_version()['version']
+        if self._version == version:
+            return self
+        with self._lock:
+            if self._version != version:
+                self._load(version)
+                self._version = version
+        return self
+
+    # ─────────────────────────────────────────────────
+    # Accès
+    # ─────────────────────────────────────────────────
+    def resolve_countries(self, tokens):
+        """
+        Indices des pays désignés par `tokens` (ISO3, nom, ou groupe UEMOA / CEDEAO),
+        sans doublon. Les membres d'un groupe absents du panel sont ignorés ;
+        lève ValueError pour un pays inconnu.
+        """
+        self.ensure()
+        rows = []
+        for token in tokens:
+            group = COUNTRY_GROUPS.get(token.strip().upper())
+            if group is not None:
+                rows.extend(self.country_index[c] for c in group if c in self.country_index)
+                continue
+            i = self._aliases.get(token.strip().lower(), self._aliases.get(slugify(token)))
+            if i is None:
+                raise ValueError(f'pays inconnu "{token.strip()}"')
+            rows.append(i)
+        return list(dict.fromkeys(rows))
+
+    def covered_countries(self, code):
+        """Indices des pays ayant au moins une valeur pour `code`."""
+        self.ensure()
+        i = self.code_index.get(code)
+        if i is None:
+            return []
+        # Un octet non nul : au moins une année renseignée parmi ses 8
+        return np.flatnonzero(self.coverage[:, i].any(axis=-1)).tolist()
+
+    def covered(self, codes, countries, lo=0, hi=None):
+        """Masque booléen [pays, indicateurs, années lo:hi] décompressé depuis coverage.npy."""
+        self.ensure()
+        hi = len(self.years) if hi is None else hi
+        packed = self.coverage[np.ix_(countries, codes)]
+        return np.unpackbits(packed, axis=-1, count=len(self.years))[:, :, lo:hi].astype(bool)
+
+    def _year_bounds(self, start, end):
+        """Colonnes [lo, hi) des années [start, end]."""
+        lo = 0 if start is None else int(np.searchsorted(self.years, start, side='left'))
+        hi = len(self.years) if end is None else int(np.searchsorted(self.years, end, side='right'))
+        return lo, hi
+
+    def slice(self, codes, countries, start=None, end=None):
+        """
+        (années, valeurs[pays, indicateurs, années]) pour les indices `countries` et
+        `codes` (indices d'indicateurs), restreints aux années [start, end].
+        """
+        self.ensure()
+        lo, hi = self._year_bounds(start, end)
+        block = self.values[np.ix_(countries, codes, np.arange(lo, hi))]
+        return self.years[lo:hi], block
+
+    def compare(self, codes, countries=None, start=None, end=None):
+        """
+        Comparaison de pays sur un axe d'années commun :
+        {'years', 'countries': [{code, name}], 'indicators': {code: {name, values: {pays: [v|null]}}},
+        'missing'}. Sans `countries` : tous les pays couverts par au moins un des codes.
+        Lève ValueError pour un pays inconnu.
+        """
+        self.ensure()
+        found = [c for c in codes if c in self.code_index]
+        missing = [c for c in codes if c not in self.code_index]
+        code_rows = [self.code_index[c] for c in found]
+        if countries is None:
+            covered = self.coverage[:, code_rows].any(axis=(1, 2)) if code_rows else np.zeros(0, dtype=bool)
+            country_rows = np.flatnonzero(covered).tolist()
+        else:
+            country_rows = self.resolve_countries(countries)
+
+        lo, hi = self._year_bounds(start, end)
+        # Années renseignées lues dans le masque : années vides retirées des bords de l'axe,
+        # seules les colonnes utiles sont ensuite copiées depuis values.npy
+        mask = self.covered(code_rows, country_rows, lo, hi)
+        present = np.flatnonzero(mask.any(axis=(0, 1)))
+        if len(present):
+            first, last = int(present[0]), int(present[-1]) + 1
+            mask = mask[:, :, first:last]
+            lo, hi = lo + first, lo + last
+        else:
+            mask = mask[:, :, :0]
+            hi = lo
+        years = self.years[lo:hi]
+        block = self.values[np.ix_(country_rows, code_rows, np.arange(lo, hi))]
+        cells = np.where(mask, block, None).tolist()
+
+        return {
+            'years': years.tolist(),
+            'countries': [{'code': self.countries[i], 'name': self.country_names[i]} for i in country_rows],
+            'indicators': {
+                code: {
+                    'name': self.names[self.code_index[code]],
+                    'values': {self.countries[i]: cells[ci][k] for ci, i in enumerate(country_rows)},
+                }
+                for k, code in enumerate(found)
+            },
+            'missing': missing,
+        }
+
+
+# Singleton
+panel_store = PanelStore()
@@ -0,0 +1,201 @@
+"""
+Partitions du jeu de données, construites une fois puis relues depuis leur instantané.
+
+Chaque source (national.tofe, national.douanes...), chaque thème ANStat (anstat.ipc,
+anstat.commerce...) et les corrélations entre séries sont une partition : un objet
+Python construit par son chargeur (lecture du classeur ou du fichier XML, calcul),
+puis enregistré comme instantané dans build/partitions/<version>/<nom>.pickle.
+
+Une partition est lue depuis son instantané s'il existe (`python manage.py
+build_partitions` ou un autre processus l'a déjà construit), sinon construite par son
+chargeur ; entre processus, un seul construit une partition absente (verrou de
+fichier), les autres attendent son instantané. Le gain est de ne pas relire les
+classeurs et fichiers XML dans chaque worker. Ce n'est ni un chargement à la demande
+ni un budget mémoire : la matrice des séries (series_matrix), la liste de l'explorateur
+et le manifeste lisent toutes les sources, chaque worker garde donc toutes les
+partitions en mémoire jusqu'au changement de version des données.
+"""
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou entre processus
+    fcntl = None
+
+from .dataset_version import get_dataset_version
+
+logger = logging.getLogger('api')
+
+PARTITIONS_DIR = Path(__file__).resolve().parent.parent / 'build' / 'partitions'
+
+@contextmanager
+def _build_lock(directory, name):
+    """Verrou exclusif entre processus (workers gunicorn) pendant la construction de `name`."""
+    if fcntl is None:
+        yield
+        return
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        lock_file = open(directory / f'.{name}.lock', 'wb')
+    except OSError:
+        yield
+        return
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class PartitionStore:
+    """Singleton : partitions enregistrées, lues depuis leur instantané au premier accès"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._loaders = {}             # nom → chargeur
+            cls._instance._resident = {}            # nom → (objet, taille de l'instantané)
+            cls._instance._loading = {}             # nom → verrou de chargement
+            cls._instance._lock = threading.Lock()
+            cls._instance._version = None
+            cls._instance.loads = 0
+        return cls._instance
+
+    def register(self, name, loader):
+        """Déclare la partition `name` ; `loader()` construit son contenu (objet picklable)."""
+        self._loaders[name] = loader
+
+    def names(self, prefix=''):
+        """Partitions déclarées, éventuellement filtrées par préfixe ('anstat.')."""
+        return [name for name in self._loaders if name.startswith(prefix)]
+
+    def _directory(self):
+        version = get_dataset_version()['version']
+        if version != self._version:
+            # Nouvelle version des données : partitions en mémoire périmées
+            with self._lock:
+                if version != self._version:
+                    self._resident.clear()
+                    self._version = version
+        return PARTITIONS_DIR / version
+
+    # ─────────────────────────────────────────────────
+    # Instantanés
+    # ─────────────────────────────────────────────────
+    def _read_snapshot(self, path):
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            return pickle.loads(data), len(data)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Instantané illisible {path.name}: {e}")
+            return None
+
+    def _write_snapshot(self, directory, path, value):
+        """Écrit l'instantané (fichier temporaire puis renommage) ; retourne sa taille."""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=f'.{path.name}-')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Instantané non enregistré {path.name}: {e}")
+        return len(data)
+
+    def _materialize(self, name, build=True):
+        """
+        Contenu et taille de la partition : instantané, ou chargeur puis instantané.
+        None si l'instantané manque et que `build` est faux.
+        """
+        directory = self._directory()
+        path = directory / f'{name}.pickle'
+        snapshot = self._read_snapshot(path)
+        if snapshot is not None or not build:
+            return snapshot
+        with _build_lock(directory, name):
+            # Un autre processus a pu la construire pendant l'attente du verrou
+            snapshot = self._read_snapshot(path)
+            if snapshot is not None:
+                return snapshot
+            start = time.perf_counter()
+            value = self._loaders[name]()
+            size = self._write_snapshot(directory, path, value)
+        logger.info("✓ Partition %s construite (%.1f Mo, %.2fs)", name, size / 1e6, time.perf_counter() - start)
+        return value, size
+
+    def build_all(self):
+        """Construit les instantanés manquants de toutes les partitions (sans les garder en mémoire)."""
+        directory = self._directory()
+        sizes = {}
+        for name in self._loaders:
+            path = directory / f'{name}.pickle'
+            if path.exists():
+                sizes[name] = path.stat().st_size
+                continue
+            sizes[name] = self._write_snapshot(directory, path, self._loaders[name]())
+        if PARTITIONS_DIR.exists():
+            for old in PARTITIONS_DIR.iterdir():
+                if old != directory and not old.name.startswith('.'):
+                    shutil.rmtree(old, ignore_errors=True)
+        return sizes
+
+    # ─────────────────────────────────────────────────
+    # Accès
+    # ─────────────────────────────────────────────────
+    def get(self, name, build=True):
+        """
+        Contenu de la partition `name`, chargé au premier accès. Sans instantané, il est
+        construit si `build` est vrai, sinon la méthode retourne None. Lève KeyError si inconnue.
+        """
+        if name not in self._loaders:
+            raise KeyError(name)
+        self._directory()
+        with self._lock:
+            entry = self._resident.get(name)
+            if entry is not None:
+                return entry[0]
+            loading = self._loading.setdefault(name, threading.Lock())
+
+        # Un seul chargement par partition ; les autres partitions restent accessibles
+        with loading:
+            with self._lock:
+                entry = self._resident.get(name)
+                if entry is not None:
+                    return entry[0]
+            materialized = self._materialize(name, build)
+            if materialized is None:
+                return None
+            value, size = materialized
+            with self._lock:
+                self._resident[name] = (value, size)
+                self.loads += 1
+        return value
+
+    def stats(self):
+        """Partitions résidentes, octets occupés (taille des instantanés) et chargements."""
+        with self._lock:
+            return {
+                'registered': len(self._loaders),
+                'resident': {name: size for name, (_, size) in self._resident.items()},
+                'resident_bytes': sum(size for _, size in self._resident.values()),
+                'loads': self.loads,
+            }
+
+
+# Singleton
+partition_store = PartitionStore()
@@ -0,0 +1,221 @@
+"""
+Tables des produits échangés (douanes.xlsx, feuilles 'Produits exportés' / 'Produits importés').
+
+Toutes les lignes d'une feuille sont conservées dans une matrice produits × années
+(NaN : valeur absente), avec pour chaque ligne :
+- un code stable dérivé du libellé ('export.cacao_feves'), indépendant du classement ;
+- son niveau : TOTAL, catégorie ('Agriculture industrielle et d'exportation') ou produit ;
+- sa catégorie parente (produits uniquement).
+
+Les libellés des feuilles ne sont pas indentés : une catégorie est reconnue comme la
+ligne égale (à l'arrondi près, chaque année) à la somme des lignes qui la suivent.
+
+Les classements (top_k) ne portent que sur les produits ; ils sont calculés en NumPy
+pour une année ou une période (somme des années) et mis en cache par (période, k).
+"""
+import re
+import threading
+import unicodedata
+
+import numpy as np
+
+FLOWS = ('export', 'import')
+
+# Taille maximale d'un classement (borne aussi le cache : périodes × k)
+MAX_TOP = 100
+
+LEVEL_TOTAL = 0
+LEVEL_CATEGORY = 1
+LEVEL_PRODUCT = 2
+LEVEL_NAMES = {LEVEL_TOTAL: 'total', LEVEL_CATEGORY: 'categorie', LEVEL_PRODUCT: 'produit'}
+
+# Écart toléré entre une catégorie et la somme de ses produits : valeurs publiées
+# arrondies à 0,1 (jusqu'à 0,05 d'écart par ligne sommée), plus une marge relative
+_ROUNDING_TOLERANCE = 0.05
+_RELATIVE_TOLERANCE = 0.001
+
+_SLUG_RE = re.compile(r'[^a-z0-9]+')
+
+
+def slugify(label):
+    """Code ASCII d'un libellé : 'Cacao fèves' → 'cacao_feves'."""
+    ascii_label = unicodedata.normalize('NFKD', label).encode('ascii', 'ignore').decode('ascii')
+    return _SLUG_RE.sub('_', ascii_label.lower()).strip('_') or 'produit'
+
+
+def _category_rows(values, total=None):
+    """
+    Lignes de catégorie d'une matrice (lignes dans l'ordre de la feuille) et, pour
+    chacune, l'indice de sa dernière ligne enfant : {catégorie: dernière ligne}.
+
+    Une catégorie est reconnue lorsque la somme des lignes qui la suivent l'égale. Une
+    catégorie dont les produits publiés ne couvrent pas toute la valeur ne l'est pas par
+    cette somme ; si la ligne `total` est connue, la première ligne hors catégorie égale
+    à TOTAL moins les catégories reconnues l'est aussi.
+
+    Une fois les catégories repérées, chacune a pour enfants toutes les lignes jusqu'à la
+    catégorie suivante : les derniers produits d'une catégorie (petites valeurs, souvent
+    arrondies à 0) sortent parfois de la somme publiée.
+    """
+    filled = np.nan_to_num(values)
+    n_rows = len(filled)
+    categories = {}
+    row = 0
+    while row < n_rows - 2:
+        target = filled[row]
+        if not target.any():
+            row += 1
+            continue
+        sums = np.cumsum(filled[row + 1:], axis=0)
+        n_summed = np.arange(1, len(sums) + 2)[:, None]
+        tolerance = _ROUNDING_TOLERANCE * n_summed[:len(sums)] + _RELATIVE_TOLERANCE * np.abs(target)
+        matches = np.flatnonzero((np.abs(sums - target) <= tolerance).all(axis=1))
+        # Au moins deux enfants : une ligne égale à la suivante n'est pas une catégorie
+        matches = matches[matches >= 1]
+        if len(matches):
+            last = row + 1 + int(matches[0])
+            categories[row] = last
+            row = last + 1
+        else:
+            row += 1
+
+    if total is not None and categories:
+        children = np.zeros(n_rows, dtype=bool)
+        for category, last in categories.items():
+            children[category:last + 1] = True
+        remainder = np.nan_to_num(total) - filled[list(categories)].sum(axis=0)
+        tolerance = _ROUNDING_TOLERANCE * (len(categories) + 1) + _RELATIVE_TOLERANCE * np.abs(remainder)
+        matches = np.flatnonzero(~children & (np.abs(filled - remainder) <= tolerance).all(axis=1))
+        if len(matches) and remainder.any():
+            row = int(matches[0])
+            following = [c for c in categories if c > row]
+            categories[row] = (min(following) if following else n_rows) - 1
+
+    starts = sorted(categories)
+    return {row: (starts[i + 1] if i + 1 < len(starts) else n_rows) - 1 for i, row in enumerate(starts)}
+
+
+class ProductTable:
+    """Produits d'un flux (exportations ou importations) : matrice produits × années et classements"""
+
+    def __init__(self, flow, table):
+        """
+        `table` : tableau lu par workbook_mapping, {libellé: {'years', 'values'}} dans l'ordre de la feuille.
+        """
+        self.flow = flow
+        self.names = list(table)
+        self.years = np.array(sorted({y for s in table.values() for y in s['years']}), dtype=np.int32)
+        self.values = np.full((len(self.names), len(self.years)), np.nan)
+        for i, series in enumerate(table.values()):
+            cols = np.searchsorted(self.years, series['years'])
+            self.values[i, cols] = series['values']
+
+        # Codes stables : libellé normalisé, suffixé en cas de collision
+        self.codes = []
+        seen = set()
+        for name in self.names:
+            base = code = f'{flow}.{slugify(name)}'
+            n = 2
+            while code in seen:
+                code = f'{base}_{n}'
+                n += 1
+            seen.add(code)
+            self.codes.append(code)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+
+        # Niveaux : TOTAL, catégories (somme des lignes suivantes), produits
+        self.levels = np.full(len(self.names), LEVEL_PRODUCT, dtype=np.int8)
+        self.parents = np.full(len(self.names), -1, dtype=np.int32)
+        is_total = np.array(['total' in name.lower() for name in self.names], dtype=bool)
+        self.levels[is_total] = LEVEL_TOTAL
+        detail = np.flatnonzero(~is_total)
+        total = self.values[np.flatnonzero(is_total)[0]] if is_total.any() else None
+        for row, last in _category_rows(self.values[detail], total).items():
+            self.levels[detail[row]] = LEVEL_CATEGORY
+            self.parents[detail[row + 1:last + 1]] = detail[row]
+        self.products = np.flatnonzero(self.levels == LEVEL_PRODUCT)
+
+        self._top = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getstate__(self):
+        # Instantané de partition (voir partitions) : sans le cache des classements ni le verrou
+        state = self.__dict__.copy()
+        del state['_top'], state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._top = {}
+        self._lock = threading.Lock()
+
+    # ─────────────────────────────────────────────────
+    # Accès
+    # ─────────────────────────────────────────────────
+    def series(self, row):
+        """Série {'years', 'values', 'name'} de la ligne `row` (années renseignées uniquement)."""
+        mask = ~np.isnan(self.values[row])
+        return {
+            'years': self.years[mask].tolist(),
+            'values': self.values[row, mask].tolist(),
+            'name': self.names[row],
+        }
+
+    def describe(self, row):
+        """Code, libellé, niveau et catégorie de la ligne `row`."""
+        parent = int(self.parents[row])
+        return {
+            'code': self.codes[row],
+            'name': self.names[row],
+            'level': LEVEL_NAMES[int(self.levels[row])],
+            'category': self.names[parent] if parent >= 0 else None,
+        }
+
+    def period(self, year=None, start=None, end=None):
+        """
+        (début, fin) d'une année ou d'une période ; par défaut, la dernière année.
+        Lève ValueError si la période ne recoupe pas les années de la feuille.
+        """
+        if year is not None:
+            start = end = year
+        if start is None and end is None:
+            if not len(self.years):
+                raise ValueError('aucune année disponible')
+            start = end = int(self.years[-1])
+        start = int(self.years[0]) if start is None else int(start)
+        end = int(self.years[-1]) if end is None else int(end)
+        if start > end or not ((self.years >= start) & (self.years <= end)).any():
+            years = f'{self.years[0]}-{self.years[-1]}' if len(self.years) else 'aucune'
+            raise ValueError(f'période {start}-{end} hors des années disponibles ({years})')
+        return start, end
+
+    def top_k(self, k=10, year=None, start=None, end=None):
+        """
+        Les `k` premiers produits pour une année (`year`, par défaut la dernière) ou la
+        somme des années de `start` à `end` : (lignes, valeurs), par valeur décroissante
+        (à valeur égale, ordre de la feuille). Les produits sans valeur sont exclus.
+        """
+        key = (*self.period(year, start, end), int(k))
+        cached = self._top.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            if key not in self._top:
+                self._top[key] = self._rank(*key)
+            return self._top[key]
+
+    def _rank(self, start, end, k):
+        cols = (self.years >= start) & (self.years <= end)
+        block = self.values[self.products][:, cols]
+        present = ~np.isnan(block).all(axis=1)
+        totals = np.where(present, np.nansum(block, axis=1), -np.inf)
+        order = np.argsort(-totals, kind='stable')[:k]
+        order = order[present[order]]
+        rows = self.products[order]
+        rows.flags.writeable = False
+        values = totals[order]
+        values.flags.writeable = False
+        return rows, values
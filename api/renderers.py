@@ -0,0 +1,165 @@
+"""
+Renderers DRF de l'API :
+- ORJSONRenderer : renderer JSON par défaut (orjson, NumPy compris), repli sur JSONRenderer
+- MessagePackRenderer / ArrowIPCRenderer : formats binaires des endpoints de séries
+  (négociation via Accept ou ?format=msgpack|arrow)
+Les trois dépendances sont optionnelles.
+"""
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson optionnel : sérialisation par le JSONRenderer de DRF
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack optionnel
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow IPC optionnel
+    pa = None
+
+BINARY_FORMATS = ('msgpack', 'arrow')
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+# Types hors JSON natif (Decimal, dates, chaînes paresseuses...) : mêmes règles que DRF
+_drf_default = JSONEncoder().default
+
+
+def render_json_bytes(data):
+    """Sérialise en JSON compact UTF-8 (orjson si disponible, sinon comme le JSONRenderer de DRF)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, default=_drf_default, option=ORJSON_OPTIONS)
+        except TypeError:
+            pass  # ex. entier hors 64 bits : le JSONRenderer sait le produire
+    return JSONRenderer().render(data)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer sérialisant via orjson (tableaux et scalaires NumPy acceptés)."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            # Sortie indentée demandée (?indent / Accept: ...; indent=4) : rendu DRF
+            return super().render(data, accepted_media_type, renderer_context)
+        return render_json_bytes(data)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Même structure que la réponse JSON, encodée en MessagePack."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, use_bin_type=True)
+
+
+def _iter_series(data):
+    """
+    Parcourt les séries d'une réponse (déjà au format colonnes) :
+    indicator / indicators (batch, éventuellement aligné) / data (requête IA) /
+    message.data_contexts (chat). Produit (code, years, values).
+    """
+    if isinstance(data.get('indicator'), dict):
+        ind = data['indicator']
+        yield ind.get('code', ''), ind.get('years', []), ind.get('values', [])
+
+    if isinstance(data.get('indicators'), dict):
+        shared_years = data.get('years', [])
+        for code, ind in data['indicators'].items():
+            yield code, ind.get('years', shared_years), ind.get('values', [])
+
+    if isinstance(data.get('data'), dict):
+        yield data.get('indicator_code', ''), data['data'].get('years', []), data['data'].get('values', [])
+
+    message = data.get('message')
+    if isinstance(message, dict):
+        for dc in message.get('data_contexts') or []:
+            yield dc.get('code', ''), dc.get('years', []), dc.get('values', [])
+
+
+class ArrowIPCRenderer(BaseRenderer):
+    """
+    Flux Arrow IPC au format long (code, year, value). Les autres champs de la
+    réponse (métadonnées, success, message...) sont placés en JSON dans les
+    métadonnées du schéma, sous la clé 'payload'.
+    """
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        codes, years, values = [], [], []
+        for code, ys, vs in _iter_series(data):
+            codes.extend([code] * len(ys))
+            years.extend(ys)
+            values.extend(vs)
+
+        table = pa.table({
+            'code': pa.array(codes, type=pa.string()),
+            'year': pa.array(years, type=pa.int32()),
+            'value': pa.array(values, type=pa.float64()),
+        })
+        meta = _strip_series(data)
+        table = table.replace_schema_metadata({
+            'payload': json.dumps(meta, ensure_ascii=False, default=str),
+        })
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+
+def _strip_series(data):
+    """Copie de la réponse sans les colonnes years / values (portées par la table)."""
+    def strip(d):
+        return {k: v for k, v in d.items() if k not in ('years', 'values')}
+
+    meta = strip(data)
+    if isinstance(data.get('indicator'), dict):
+        meta['indicator'] = strip(data['indicator'])
+    if isinstance(data.get('indicators'), dict):
+        meta['indicators'] = {code: strip(ind) for code, ind in data['indicators'].items()}
+    if isinstance(data.get('data'), dict):
+        meta.pop('data')
+    if isinstance(data.get('message'), dict) and data['message'].get('data_contexts'):
+        meta['message'] = {
+            **data['message'],
+            'data_contexts': [strip(dc) for dc in data['message']['data_contexts']],
+        }
+    return meta
+
+
+def series_renderer_classes():
+    """Renderers par défaut + formats binaires disponibles dans l'environnement."""
+    renderers = list(api_settings.DEFAULT_RENDERER_CLASSES)
+    if msgpack is not None:
+        renderers.append(MessagePackRenderer)
+    if pa is not None:
+        renderers.append(ArrowIPCRenderer)
+    return renderers
+
+
+SERIES_RENDERER_CLASSES = series_renderer_classes()
@@ -0,0 +1,146 @@
+"""
+Index multidimensionnel des séries SDMX (ANStat).
+
+Chaque série brute d'un fichier SDMX devient une ligne de l'index, repérée par
+toutes ses dimensions de clé (thème, INDICATOR, FREQ, REF_AREA, COUNTERPART...),
+sans fusion ni perte lorsque plusieurs séries partagent un même indicateur.
+
+Stockage compact, figé une fois le chargement terminé (freeze) :
+- dimensions : un code entier par ligne (dictionnaire des valeurs par dimension) ;
+- listes de postings : pour chaque dimension, les lignes triées par valeur en un seul
+  tableau (order) et les bornes de chaque valeur (starts) : les lignes ayant la
+  valeur v sont order[starts[v]:starts[v + 1]], déjà triées ;
+- observations : périodes et valeurs de toutes les séries concaténées, avec les
+  bornes de chaque ligne (offsets) ; une série est une vue sur ces tableaux.
+
+Une sélection (select(THEME='ipc', FREQ='M')) intersecte les postings des
+dimensions filtrées, sans parcourir les séries.
+"""
+import numpy as np
+
+# Dimension ajoutée par le chargeur (fichier d'origine), absente des fichiers SDMX
+THEME_DIMENSION = 'THEME'
+
+
+class SdmxIndex:
+    """Index des séries SDMX : dimensions codées, postings par dimension, observations concaténées"""
+
+    def __init__(self):
+        self._rows = []  # (dimensions, attributs, périodes, valeurs) avant freeze
+        self.frozen = False
+        self.dimensions = ()
+        self.vocab = {}       # dimension → [valeurs]
+        self._codes = {}      # dimension → {valeur: code}
+        self.row_codes = {}   # dimension → codes par ligne (int32, -1 : dimension absente)
+        self._postings = {}   # dimension → (order, starts)
+        self.attributes = []  # attributs par ligne (nom, UNIT_MULT...)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.periods = np.empty(0, dtype=np.int32)
+        self.values = np.empty(0, dtype=np.float64)
+
+    # ─────────────────────────────────────────────────
+    # Construction
+    # ─────────────────────────────────────────────────
+    def add(self, dimensions, attributes, periods, values):
+        """Ajoute une série (périodes triées) et retourne son numéro de ligne."""
+        if self.frozen:
+            raise RuntimeError('index SDMX figé')
+        self._rows.append((dimensions, attributes, periods, values))
+        return len(self._rows) - 1
+
+    def freeze(self):
+        """Construit les tableaux compacts ; l'index n'accepte plus d'ajout ensuite."""
+        rows = self._rows
+        n_rows = len(rows)
+
+        names = {THEME_DIMENSION: None}
+        for dimensions, _, _, _ in rows:
+            names.update(dict.fromkeys(dimensions))
+        self.dimensions = tuple(names)
+
+        for dim in self.dimensions:
+            codes = self._codes[dim] = {}
+            vocab = self.vocab[dim] = []
+            row_codes = np.full(n_rows, -1, dtype=np.int32)
+            for i, (dimensions, _, _, _) in enumerate(rows):
+                value = dimensions.get(dim)
+                if value is None:
+                    continue
+                code = codes.get(value)
+                if code is None:
+                    code = codes[value] = len(vocab)
+                    vocab.append(value)
+                row_codes[i] = code
+            self.row_codes[dim] = row_codes
+
+            # Lignes groupées par valeur (ordre stable : croissant dans chaque groupe)
+            order = np.argsort(row_codes, kind='stable').astype(np.int32)
+            starts = np.searchsorted(row_codes[order], np.arange(len(vocab) + 1))
+            self._postings[dim] = (order, starts)
+
+        self.attributes = [attributes for _, attributes, _, _ in rows]
+        lengths = np.fromiter((len(p) for _, _, p, _ in rows), dtype=np.int64, count=n_rows)
+        self.offsets = np.concatenate(([0], np.cumsum(lengths)))
+        if n_rows:
+            self.periods = np.concatenate([p for _, _, p, _ in rows]).astype(np.int32)
+            self.values = np.concatenate([v for _, _, _, v in rows]).astype(np.float64)
+
+        self._rows = []
+        self.frozen = True
+
+    # ─────────────────────────────────────────────────
+    # Accès
+    # ─────────────────────────────────────────────────
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def posting(self, dim, value):
+        """Lignes (triées) dont la dimension `dim` vaut `value` ; tableau vide si aucune."""
+        code = self._codes.get(dim, {}).get(value)
+        if code is None:
+            return np.empty(0, dtype=np.int32)
+        order, starts = self._postings[dim]
+        return order[starts[code]:starts[code + 1]]
+
+    def select(self, **filters):
+        """
+        Lignes correspondant à tous les filtres (dimension=valeur, ou liste de valeurs
+        acceptées) : select(THEME='ipc', FREQ=['M', 'Q']). Sans filtre : toutes les lignes.
+        """
+        selected = None
+        for dim, accepted in filters.items():
+            if isinstance(accepted, str):
+                rows = self.posting(dim, accepted)
+            else:
+                rows = np.unique(np.concatenate(
+                    [self.posting(dim, value) for value in accepted] or [np.empty(0, dtype=np.int32)]
+                ))
+            selected = rows if selected is None else np.intersect1d(selected, rows, assume_unique=True)
+            if len(selected) == 0:
+                break
+        if selected is None:
+            return np.arange(len(self), dtype=np.int32)
+        return selected
+
+    def dimension_values(self, dim, rows=None):
+        """Valeurs distinctes d'une dimension, sur toutes les lignes ou sur `rows`."""
+        if dim not in self.row_codes:
+            return []
+        if rows is None:
+            return list(self.vocab[dim])
+        codes = np.unique(self.row_codes[dim][rows])
+        return [self.vocab[dim][c] for c in codes.tolist() if c >= 0]
+
+    def dims(self, row):
+        """Dimensions de la ligne `row` : {dimension: valeur}."""
+        result = {}
+        for dim in self.dimensions:
+            code = int(self.row_codes[dim][row])
+            if code >= 0:
+                result[dim] = self.vocab[dim][code]
+        return result
+
+    def observations(self, row):
+        """(périodes, valeurs) de la ligne `row` : vues sur les tableaux concaténés."""
+        lo, hi = self.offsets[row], self.offsets[row + 1]
+        return self.periods[lo:hi], self.values[lo:hi]
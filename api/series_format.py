@@ -0,0 +1,65 @@
+"""
+Dispositions (layouts) des séries renvoyées par l'API.
+
+- records  : values = [{'year': 2020, 'value': 1.5}, ...]   (format historique)
+- columnar : years = [2020, ...], values = [1.5, ...]        (colonnes parallèles)
+
+Les séries infra-annuelles (ANStat, ?freq=Q|M) portent des périodes SDMX
+('2020-Q1', '2020-01') au lieu des années : voir period_layout.
+
+Les services produisent directement l'une ou l'autre à partir de leurs listes
+années / valeurs ; les helpers ci-dessous ne servent qu'aux réponses déjà
+construites en records (requêtes IA, contextes du chat).
+"""
+
+LAYOUT_RECORDS = 'records'
+LAYOUT_COLUMNAR = 'columnar'
+LAYOUTS = (LAYOUT_RECORDS, LAYOUT_COLUMNAR)
+
+
+def series_layout(years, values, layout=LAYOUT_RECORDS):
+    """Champs de série ('values' ou 'years' + 'values') pour deux listes parallèles."""
+    if layout == LAYOUT_COLUMNAR:
+        return {'years': list(years), 'values': list(values)}
+    return {'values': [{'year': y, 'value': v} for y, v in zip(years, values)]}
+
+
+def period_layout(periods, values, layout=LAYOUT_RECORDS):
+    """Comme series_layout, pour des périodes : 'periods' + 'values' ou [{'period', 'value'}]."""
+    if layout == LAYOUT_COLUMNAR:
+        return {'periods': list(periods), 'values': list(values)}
+    return {'values': [{'period': p, 'value': v} for p, v in zip(periods, values)]}
+
+
+def is_columnar(indicator):
+    return 'years' in indicator
+
+
+def records_to_columnar(records):
+    """[{'year', 'value'}, ...] → {'years': [...], 'values': [...]}"""
+    records = records or []
+    return {
+        'years': [v['year'] for v in records],
+        'values': [v['value'] for v in records],
+    }
+
+
+def to_columnar(indicator):
+    """Copie d'un indicateur (ou contexte de données) au format colonnes."""
+    if indicator is None or is_columnar(indicator):
+        return indicator
+    return {**indicator, **records_to_columnar(indicator.get('values'))}
+
+
+def filter_years(indicator, start_year=None, end_year=None):
+    """Restreint la série d'un indicateur (records ou colonnes) à [start_year, end_year]."""
+    if start_year is None and end_year is None:
+        return indicator
+
+    def keep(year):
+        return (start_year is None or year >= start_year) and (end_year is None or year <= end_year)
+
+    if is_columnar(indicator):
+        pairs = [(y, v) for y, v in zip(indicator['years'], indicator['values']) if keep(y)]
+        return {**indicator, 'years': [y for y, _ in pairs], 'values': [v for _, v in pairs]}
+    return {**indicator, 'values': [v for v in indicator['values'] if keep(v['year'])]}
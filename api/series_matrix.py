@@ -0,0 +1,212 @@
+"""
+Matrice alignée indicateurs × années couvrant toutes les sources
+(Banque Mondiale, nationales, ANStat), construite une fois par version des données.
+Sert les coupes transversales (/api/snapshot/<year>) et les calculs sur l'ensemble des séries.
+"""
+import logging
+import threading
+
+import numpy as np
+
+from .data_service import data_service
+from .dataset_version import get_dataset_version
+from .national_data_service import national_data_service as nds
+from .renderers import render_json_bytes
+
+logger = logging.getLogger('api')
+
+WB_SOURCE = 'Banque Mondiale (World Development Indicators)'
+
+# Familles de séries (filtre ?source=)
+SOURCE_WB = 'wb'
+SOURCE_NATIONAL = 'national'
+SOURCE_ANSTAT = 'anstat'
+MATRIX_SOURCES = (SOURCE_WB, SOURCE_NATIONAL, SOURCE_ANSTAT)
+
+SNAPSHOT_FALLBACKS = ('last',)
+
+# Nombre maximal de coupes annuelles gardées sérialisées
+MAX_CACHED_SNAPSHOTS = 64
+
+
+def source_family(code):
+    """Famille d'un code : 'anstat' (NAT.anstat.*), 'national' (NAT.*) ou 'wb'."""
+    if code.startswith('NAT.anstat.'):
+        return SOURCE_ANSTAT
+    if code.startswith('NAT.'):
+        return SOURCE_NATIONAL
+    return SOURCE_WB
+
+
+class SeriesMatrix:
+    """Singleton : matrice alignée de toutes les séries pour la version courante des données"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._version = None
+            cls._instance._lock = threading.Lock()
+            cls._instance._snapshots = {}  # (year, fallback) → octets JSON
+            cls._instance._last_index = None
+        return cls._instance
+
+    # ─────────────────────────────────────────────────
+    # Construction
+    # ─────────────────────────────────────────────────
+    def _build(self):
+        """Aligne toutes les séries sur un axe d'années commun (NaN = pas de valeur)."""
+        national = []
+        for ind in nds.get_all_indicators_for_explorer():
+            detail = nds.get_indicator_detail_by_code(ind['code'], layout='columnar')
+            if detail and detail['years']:
+                national.append((ind['code'], detail['name'], detail.get('unit', ''),
+                                 detail.get('source', ''), detail['years'], detail['values']))
+
+        wb_years = data_service._years
+        all_years = [int(y) for y in wb_years]
+        for _, _, _, _, years, _ in national:
+            all_years.extend(int(y) for y in years)
+        first, last = min(all_years), max(all_years)
+        years = np.arange(first, last + 1, dtype=np.int64)
+
+        wb_codes = [ind['code'] for ind in data_service.get_all_indicators()]
+        n_rows = len(wb_codes) + len(national)
+        values = np.full((n_rows, len(years)), np.nan, dtype=np.float64)
+
+        # Bloc Banque Mondiale : copie vectorisée de la matrice de data_service
+        wb_rows = [data_service._code_index[code] for code in wb_codes]
+        wb_cols = wb_years - first
+        values[:len(wb_codes)][:, wb_cols] = data_service._matrix[wb_rows]
+
+        codes, names, units, sources = [], [], [], []
+        for code in wb_codes:
+            name, unit = data_service.get_indicator_label(code)
+            codes.append(code)
+            names.append(name)
+            units.append(unit)
+            sources.append(WB_SOURCE)
+
+        for i, (code, name, unit, source, ys, vs) in enumerate(national, start=len(wb_codes)):
+            cols = np.asarray(ys, dtype=np.int64) - first
+            values[i, cols] = np.asarray([np.nan if v is None else v for v in vs], dtype=np.float64)
+            codes.append(code)
+            names.append(name)
+            units.append(unit)
+            sources.append(source)
+
+        self.years = years
+        self.values = values
+        self.codes = codes
+        self.names = names
+        self.units = units
+        self.sources = sources
+        self.families = np.array([source_family(c) for c in codes])
+        self.index = {code: i for i, code in enumerate(codes)}
+        self._last_index = None
+        self._snapshots = {}
+        logger.info("✓ Matrice des séries: %d indicateurs × %d années (%d–%d)",
+                    n_rows, len(years), first, last)
+
+    def ensure(self):
+        """Construit (ou reconstruit) la matrice pour la version courante des données."""
+        version = get_dataset_version()['version']
+        if self._version == version:
+            return self
+        with self._lock:
+            if self._version != version:
+                self._build()
+                self._version = version
+        return self
+
+    @property
+    def version(self):
+        return self._version
+
+    # ─────────────────────────────────────────────────
+    # Accès
+    # ─────────────────────────────────────────────────
+    def row(self, code):
+        """(années, valeurs) non-NaN d'un code, ou None."""
+        self.ensure()
+        i = self.index.get(code)
+        if i is None:
+            return None
+        mask = ~np.isnan(self.values[i])
+        return self.years[mask], self.values[i, mask]
+
+    def _last_valid_index(self):
+        """
+        Pour chaque (indicateur, année) : colonne de la dernière valeur disponible
+        à cette date (-1 si aucune). Calculé une fois, par cumul maximum.
+        """
+        if self._last_index is None:
+            cols = np.arange(len(self.years))
+            idx = np.where(np.isnan(self.values), -1, cols)
+            self._last_index = np.maximum.accumulate(idx, axis=1)
+        return self._last_index
+
+    def snapshot(self, year, fallback=None, source=None):
+        """
+        Valeur de chaque indicateur pour `year`.
+        fallback='last' : à défaut, dernière valeur disponible avant `year` (année réelle renvoyée).
+        Retourne (rows, years_found, values) — indices de lignes et valeurs alignées.
+        """
+        self.ensure()
+        n_rows = len(self.codes)
+        if year < self.years[0]:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.array([])
+
+        col = min(int(year - self.years[0]), len(self.years) - 1)
+        if fallback == 'last':
+            src_cols = self._last_valid_index()[:, col]
+            keep = src_cols >= 0
+        else:
+            if year > self.years[-1]:
+                return np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.array([])
+            src_cols = np.full(n_rows, col)
+            keep = ~np.isnan(self.values[:, col])
+
+        if source is not None:
+            keep &= self.families == source
+
+        rows = np.nonzero(keep)[0]
+        cols = src_cols[rows]
+        return rows, self.years[cols], self.values[rows, cols]
+
+    def get_snapshot_body(self, year, fallback=None, source=None):
+        """Corps JSON de /api/snapshot/<year>, sérialisé une fois par (année, fallback, source)."""
+        self.ensure()
+        key = (year, fallback, source)
+        body = self._snapshots.get(key)
+        if body is not None:
+            return body
+
+        rows, found_years, vals = self.snapshot(year, fallback, source)
+        indicators = [
+            {
+                'code': self.codes[r],
+                'name': self.names[r],
+                'unit': self.units[r],
+                'source': self.sources[r],
+                'year': y,
+                'value': v,
+            }
+            for r, y, v in zip(rows.tolist(), found_years.tolist(), vals.tolist())
+        ]
+        body = render_json_bytes({
+            'success': True,
+            'year': year,
+            'fallback': fallback,
+            'count': len(indicators),
+            'indicators': indicators,
+        })
+        if len(self._snapshots) >= MAX_CACHED_SNAPSHOTS:
+            self._snapshots.clear()
+        self._snapshots[key] = body
+        return body
+
+
+# Singleton
+series_matrix = SeriesMatrix()
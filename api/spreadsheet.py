@@ -0,0 +1,189 @@
+"""
+Lecture des classeurs Excel : une même interface au-dessus de plusieurs moteurs.
+
+- 'calamine' : python-calamine (lecteur Rust), optionnel ;
+- 'openpyxl' : openpyxl en lecture seule, lignes lues en flux (toujours disponible).
+
+Le moteur vient de settings.SPREADSHEET_ENGINE : 'auto' (défaut) retient le plus
+rapide mesuré sur nos classeurs par `python manage.py benchmark_spreadsheet_engines`
+(enregistré dans BENCHMARK_PATH), à défaut le premier moteur disponible de ENGINES.
+
+Quel que soit le moteur, une ligne est un tuple de valeurs : None pour une cellule
+vide, int pour un nombre entier (comme openpyxl et pd.read_excel), float, str ou date.
+"""
+import json
+import logging
+import os
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # python-calamine optionnel : lecture par openpyxl
+    CalamineWorkbook = None
+
+logger = logging.getLogger('api')
+
+ENGINE_AUTO = 'auto'
+ENGINE_CALAMINE = 'calamine'
+ENGINE_OPENPYXL = 'openpyxl'
+# Par ordre de préférence quand aucun banc d'essai n'est enregistré
+ENGINES = (ENGINE_CALAMINE, ENGINE_OPENPYXL)
+
+# Résultat du dernier banc d'essai (répertoire build/, hors dépôt)
+BENCHMARK_PATH = Path(__file__).resolve().parent.parent / 'build' / 'spreadsheet_engines.json'
+
+_resolved = {}
+
+
+def available_engines():
+    """Moteurs utilisables dans cet environnement, par ordre de préférence."""
+    return [engine for engine in ENGINES if engine != ENGINE_CALAMINE or CalamineWorkbook is not None]
+
+
+def _configured_engine():
+    """settings.SPREADSHEET_ENGINE, ou la variable d'environnement hors Django (scripts)."""
+    from django.conf import settings
+    from django.core.exceptions import ImproperlyConfigured
+    try:
+        return getattr(settings, 'SPREADSHEET_ENGINE', ENGINE_AUTO)
+    except ImproperlyConfigured:
+        return os.environ.get('SPREADSHEET_ENGINE', ENGINE_AUTO)
+
+
+def load_benchmark():
+    """Dernier banc d'essai enregistré ({'fastest', 'timings', ...}), None si absent."""
+    try:
+        with open(BENCHMARK_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def resolve_engine(engine=None):
+    """
+    Moteur effectivement utilisé pour `engine` (None : réglage du projet).
+    Lève ValueError si le moteur demandé est inconnu ou indisponible.
+    """
+    requested = (engine or _configured_engine() or ENGINE_AUTO).lower()
+    if requested in _resolved:
+        return _resolved[requested]
+
+    available = available_engines()
+    if requested == ENGINE_AUTO:
+        benchmark = load_benchmark() or {}
+        fastest = benchmark.get('fastest')
+        resolved = fastest if fastest in available else available[0]
+    elif requested in available:
+        resolved = requested
+    else:
+        raise ValueError(f'moteur de lecture "{requested}" indisponible '
+                         f'(disponibles : {", ".join(available)})')
+    _resolved[requested] = resolved
+    return resolved
+
+
+# ─────────────────────────────────────────────────
+# Moteurs
+# ─────────────────────────────────────────────────
+class _OpenpyxlWorkbook:
+    """Classeur openpyxl en lecture seule"""
+
+    def __init__(self, path):
+        self._wb = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+
+    @property
+    def sheet_names(self):
+        return self._wb.sheetnames
+
+    def rows(self, sheet, max_row=None):
+        ws = self._wb.worksheets[sheet] if isinstance(sheet, int) else self._wb[sheet]
+        # Dimensions déclarées parfois fausses : lignes lues jusqu'à la dernière réelle
+        ws.reset_dimensions()
+        return ws.iter_rows(max_row=max_row, values_only=True)
+
+    def close(self):
+        self._wb.close()
+
+
+def _calamine_value(value):
+    if value == '':
+        return None
+    if type(value) is float and value.is_integer():
+        return int(value)
+    return value
+
+
+class _CalamineWorkbook:
+    """Classeur python-calamine (feuille décodée d'un bloc)"""
+
+    def __init__(self, path):
+        self._wb = CalamineWorkbook.from_path(str(path))
+
+    @property
+    def sheet_names(self):
+        return self._wb.sheet_names
+
+    def rows(self, sheet, max_row=None):
+        if isinstance(sheet, int):
+            ws = self._wb.get_sheet_by_index(sheet)
+        else:
+            ws = self._wb.get_sheet_by_name(sheet)
+        # skip_empty_area=False : lignes numérotées depuis la ligne 1, comme openpyxl
+        data = ws.to_python(skip_empty_area=False, nrows=max_row)
+        return (tuple(_calamine_value(v) for v in row) for row in data)
+
+    def close(self):
+        self._wb.close()
+
+
+_WORKBOOK_CLASSES = {
+    ENGINE_CALAMINE: _CalamineWorkbook,
+    ENGINE_OPENPYXL: _OpenpyxlWorkbook,
+}
+
+
+class Workbook:
+    """
+    Classeur ouvert avec le moteur résolu : sheet_names, rows(feuille, max_row)
+    (feuille : nom ou rang), close() ; utilisable avec `with`.
+    Une feuille absente lève KeyError (nom) ou IndexError (rang).
+    """
+
+    def __init__(self, path, engine=None):
+        self.engine = resolve_engine(engine)
+        self._book = _WORKBOOK_CLASSES[self.engine](path)
+
+    @property
+    def sheet_names(self):
+        return list(self._book.sheet_names)
+
+    def rows(self, sheet, max_row=None):
+        """Lignes (tuples de valeurs) de la feuille, depuis la première ligne."""
+        if isinstance(sheet, int):
+            if not 0 <= sheet < len(self.sheet_names):
+                raise IndexError(f'feuille n°{sheet} absente')
+        elif sheet not in self.sheet_names:
+            raise KeyError(sheet)
+        return self._book.rows(sheet, max_row)
+
+    def close(self):
+        self._book.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_workbook(path, engine=None):
+    """Ouvre un classeur avec le moteur `engine` (None : réglage du projet)."""
+    return Workbook(path, engine)
+
+
+def read_frame(path, sheet_name=0, engine=None, **kwargs):
+    """pd.read_excel avec le moteur résolu (les deux moteurs sont pris en charge par pandas)."""
+    return pd.read_excel(path, sheet_name=sheet_name, engine=resolve_engine(engine), **kwargs)
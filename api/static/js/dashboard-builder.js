@@ -128,7 +128,7 @@ const DashboardBuilder = {
         const panels = JSON.parse(entry.panels);
         this.nextPanelId = entry.nextPanelId;
         this.panels = panels.map(p => ({ ...p, dataCache: {} }));
-        await Promise.all(this.panels.map(p => this._fetchPanelData(p)));
+        await this._fetchPanelsData(this.panels);
         this.renderGrid();
         this.saveToStorage();
         this._skipHistory = false;
@@ -208,8 +208,7 @@ const DashboardBuilder = {
 
     async loadIndicators() {
         try {
-            const res = await fetch('/api/indicators');
-            const data = await res.json();
+            const data = await DataCache.getIndicatorList();
             if (data.success) {
                 this.allIndicators = data.indicators.sort((a, b) =>
                     a.name.localeCompare(b.name, 'fr')
@@ -1090,22 +1089,34 @@ const DashboardBuilder = {
 
     // ── Data Fetching ─────────────────────────────────────
     async _fetchPanelData(panel) {
-        if (!panel.indicators || panel.indicators.length === 0) return;
-
-        const promises = panel.indicators.map(async (ind) => {
-            if (panel.dataCache[ind.code]) return;
-            try {
-                const res = await fetch(`/api/indicator/${ind.code}`);
-                const data = await res.json();
-                if (data.success && data.indicator) {
-                    panel.dataCache[ind.code] = data.indicator;
-                }
-            } catch (e) {
-                console.error(`Failed to fetch ${ind.code}:`, e);
-            }
+        await this._fetchPanelsData([panel]);
+    },
+
+    // Fetch every missing indicator of the given panels in a single batch request
+    // (indicators already in the versioned IndexedDB cache are not requested)
+    async _fetchPanelsData(panels) {
+        const codes = new Set();
+        panels.forEach(panel => {
+            (panel.indicators || []).forEach(ind => {
+                if (!panel.dataCache[ind.code]) codes.add(ind.code);
+            });
         });
+        if (codes.size === 0) return;
 
-        await Promise.all(promises);
+        try {
+            const data = await DataCache.getIndicators([...codes]);
+            panels.forEach(panel => {
+                (panel.indicators || []).forEach(ind => {
+                    const indicator = data.indicators[ind.code];
+                    if (indicator && !panel.dataCache[ind.code]) {
+                        panel.dataCache[ind.code] = indicator;
+                    }
+                });
+            });
+            (data.missing || []).forEach(code => console.error(`Failed to fetch ${code}: not found`));
+        } catch (e) {
+            console.error(`Failed to fetch ${[...codes].join(', ')}:`, e);
+        }
     },
 
     // ── Chart Rendering ───────────────────────────────────
@@ -1983,7 +1994,7 @@ const DashboardBuilder = {
                     dataCache: {},
                 }));
                 // Fetch all data then render
-                Promise.all(this.panels.map(p => this._fetchPanelData(p))).then(() => {
+                this._fetchPanelsData(this.panels).then(() => {
                     this.renderGrid();
                 });
             }
@@ -33,6 +33,14 @@ const DashboardV3 = {
     },
 
     dbData: null, // Real data from API
+    preview: {}, // Opening tab preview embedded in the page: last values of each series only
+    previewFallback: false, // true while the mini charts are drawn (see blockValues)
+    loadedSections: new Set(), // Sections of /api/dashboard-data already merged into dbData
+    allSectionsLoaded: false,
+
+    // /api/dashboard-data sections needed by each tab, read from <script id="dashboard-tabs">
+    // (DASHBOARD_TABS in api/dashboard_service.py)
+    SECTION_DATA: {},
 
     init() {
         console.log("Dashboard V3 Initializing...");
@@ -41,19 +49,35 @@ const DashboardV3 = {
         this.setupMobileMenu();
         this.setupSidebarSearch();
 
-        // Fetch real data from API then render
-        fetch('/api/dashboard-data')
-            .then(r => r.json())
-            .then(data => {
-                this.dbData = data;
-                console.log("Dashboard data loaded from API", data);
-                this.loadOverviewData();
+        this.loadTabSections();
+
+        // KPIs and opening tab preview embedded in the page by the dashboard view:
+        // the overview is drawn before any API call
+        const hasPreview = this.loadBootstrapData();
+        if (hasPreview) {
+            this.loadOverviewData();
+            this.renderMiniCharts();
+        }
+
+        // Fetch real data from API then render: KPIs first (tiny payload), then only the
+        // sections of the visible tab, then the rest of the dashboard in the background.
+        // Sections already embedded in the page resolve immediately, without a request.
+        const activeSection = document.querySelector('.sidebar-item.active');
+        const targetId = activeSection ? activeSection.getAttribute('data-target') : null;
+
+        const kpisReady = this.fetchSections(['kpis'])
+            .then(() => this.loadOverviewData());
+        const visibleSections = [...new Set([
+            ...(hasPreview ? [] : this.SECTION_DATA['section-overview'] || []),
+            ...(this.SECTION_DATA[targetId] || []),
+        ])];
+
+        Promise.all([kpisReady, this.fetchSections(visibleSections)])
+            .then(() => {
+                console.log("Dashboard data loaded from API", this.dbData);
                 this.renderMiniCharts();
-                const activeSection = document.querySelector('.sidebar-item.active');
-                if(activeSection) {
-                    const targetId = activeSection.getAttribute('data-target');
-                    this.handleSectionChange(targetId);
-                }
+                if(targetId) this.handleSectionChange(targetId);
+                this.fetchAllSections();
             })
             .catch(err => {
                 console.error("Failed to fetch dashboard data:", err);
@@ -65,12 +89,83 @@ const DashboardV3 = {
         window.addEventListener('resize', () => this.resizeAll());
     },
 
+    // Read the <script id="dashboard-tabs"> JSON rendered by the dashboard view
+    loadTabSections() {
+        const el = document.getElementById('dashboard-tabs');
+        if (!el) return;
+        try {
+            this.SECTION_DATA = JSON.parse(el.textContent);
+        } catch (e) {
+            console.warn("Invalid dashboard tabs data:", e);
+        }
+    },
+
+    // Read the <script id="dashboard-bootstrap"> JSON rendered by the dashboard view:
+    // full sections go to dbData, the opening tab preview to this.preview.
+    // Returns true when the preview is embedded.
+    loadBootstrapData() {
+        const el = document.getElementById('dashboard-bootstrap');
+        if (!el) return false;
+        try {
+            const bootstrap = JSON.parse(el.textContent);
+            this.mergeDashboardData(bootstrap.data || {});
+            (bootstrap.sections || []).forEach(s => this.loadedSections.add(s));
+            this.preview = bootstrap.preview || {};
+            return Object.keys(this.preview).length > 0;
+        } catch (e) {
+            console.warn("Invalid dashboard bootstrap data:", e);
+            return false;
+        }
+    },
+
+    // Merge a (partial) /api/dashboard-data payload into dbData
+    mergeDashboardData(data) {
+        if (!this.dbData) this.dbData = {};
+        ['kpis', 'series', 'national', 'anstat'].forEach(block => {
+            if (data[block]) this.dbData[block] = { ...(this.dbData[block] || {}), ...data[block] };
+        });
+    },
+
+    // Fetch the given dashboard sections (skipping those already loaded), through the
+    // versioned IndexedDB cache: unchanged sections are not downloaded again
+    fetchSections(sections) {
+        const missing = this.allSectionsLoaded ? [] : sections.filter(s => !this.loadedSections.has(s));
+        if (missing.length === 0) return Promise.resolve();
+        return DataCache.getDashboardSections(missing)
+            .then(data => {
+                this.mergeDashboardData(data);
+                missing.forEach(s => this.loadedSections.add(s));
+            });
+    },
+
+    // Load every remaining section once the first charts are on screen
+    fetchAllSections() {
+        const load = () => DataCache.getDashboardSections()
+            .then(data => {
+                this.mergeDashboardData(data);
+                this.allSectionsLoaded = true;
+            })
+            .catch(err => console.warn("Background dashboard data fetch failed:", err));
+        if (window.requestIdleCallback) window.requestIdleCallback(load);
+        else setTimeout(load, 200);
+    },
+
     resizeAll() {
         Object.values(this.charts).forEach(c => c && c.resize());
         if(this.map) this.map.invalidateSize();
     },
 
+    // Overview mini charts: drawn from the loaded sections, or else from the page preview
     renderMiniCharts() {
+        this.previewFallback = true;
+        try {
+            this.drawMiniCharts();
+        } finally {
+            this.previewFallback = false;
+        }
+    },
+
+    drawMiniCharts() {
         // Macro - real data from DB
         this.createMiniChart('mini-macro-1', this.sv('gdp_growth', 6) || [6.2, 2.0, 7.4, 6.7, 6.5, 5.9], 'line', this.colors.orange);
         this.createMiniChart('mini-macro-2', this.sv('inflation', 6) || [0.8, 2.4, 4.2, 5.2, 4.4, 3.5], 'bar', this.colors.slate);
@@ -158,7 +253,8 @@ const DashboardV3 = {
         const numData = data.map(Number);
         const minVal = Math.min(...numData);
         
-        const chart = echarts.init(el);
+        // Drawn from the page preview first, then redrawn once the API data is loaded
+        const chart = echarts.getInstanceByDom(el) || echarts.init(el);
         const option = {
             color: [color],
             grid: { left: 0, right: 0, top: 2, bottom: 2 },
@@ -289,11 +385,18 @@ const DashboardV3 = {
         if(el) el.innerHTML = value;
     },
 
+    // Helper: values of a dashboard entry, from the loaded sections or else, for the overview
+    // mini charts only, the page preview (returns null if empty so || fallback works)
+    blockValues(block, key) {
+        const loaded = this.dbData && this.dbData[block] && this.dbData[block][key];
+        const s = loaded || (this.previewFallback && this.preview[block] && this.preview[block][key]);
+        return s && s.values && s.values.length > 0 ? s.values : null;
+    },
+
     // Helper: get last N values from a series key (returns null if empty so || fallback works)
     sv(key, n) {
-        if (!this.dbData || !this.dbData.series || !this.dbData.series[key]) return null;
-        const vals = this.dbData.series[key].values;
-        if (!vals || vals.length === 0) return null;
+        const vals = this.blockValues('series', key);
+        if (!vals) return null;
         const result = n ? vals.slice(-n) : vals;
         return result.length > 0 ? result : null;
     },
@@ -308,9 +411,9 @@ const DashboardV3 = {
 
     // Helper: get last N values from national data
     nv(key, n) {
-        const s = this.nd(key);
-        if (!s) return null;
-        const result = n ? s.values.slice(-n) : s.values;
+        const vals = this.blockValues('national', key);
+        if (!vals) return null;
+        const result = n ? vals.slice(-n) : vals;
         return result.length > 0 ? result : null;
     },
 
@@ -332,9 +435,9 @@ const DashboardV3 = {
 
     // Helper: get last N values from ANStat data
     av(key, n) {
-        const s = this.ad(key);
-        if (!s) return null;
-        const result = n ? s.values.slice(-n) : s.values;
+        const vals = this.blockValues('anstat', key);
+        if (!vals) return null;
+        const result = n ? vals.slice(-n) : vals;
         return result.length > 0 ? result : null;
     },
 
@@ -736,10 +839,12 @@ const DashboardV3 = {
         if(!target) return;
         target.classList.remove('hidden');
 
-        // Initialize Charts for this section
-        setTimeout(() => {
+        // Initialize Charts for this section (once its data sections are loaded)
+        const ready = this.fetchSections(this.SECTION_DATA[sectionId] || [])
+            .catch(err => console.error("Failed to fetch dashboard data:", err));
+        ready.then(() => setTimeout(() => {
             this.initSectionCharts(sectionId);
-        }, 50); // Small delay for layout to stabilize
+        }, 50)); // Small delay for layout to stabilize
     },
 
     initSectionCharts(sectionId) {
@@ -2405,6 +2510,9 @@ const ExplorerModule = {
     currentIndicator: null,
     detailChart: null,
     chartType: 'line',
+    details: {},           // code → indicator, loaded by batch (prefetchDetails)
+    pendingDetails: null,  // batch request in flight
+    requestedDetails: new Set(),
     
     // Theme configuration with keywords for categorization
     themes: {
@@ -2509,8 +2617,7 @@ const ExplorerModule = {
 
     async loadIndicators() {
         try {
-            const response = await fetch('/api/indicators');
-            const data = await response.json();
+            const data = await DataCache.getIndicatorList();
             
             if (data.success) {
                 this.allIndicators = data.indicators;
@@ -2691,6 +2798,7 @@ const ExplorerModule = {
         this.filteredIndicators = this.allIndicators.filter(ind => ind.themes.includes(themeKey));
         this.sortIndicators();
         this.renderIndicatorsList();
+        this.prefetchDetails(this.filteredIndicators);
         
         // Switch views
         document.getElementById('explorer-themes-view').classList.add('hidden');
@@ -2744,6 +2852,29 @@ const ExplorerModule = {
         this.renderIndicatorsList();
     },
 
+    // Load the details of the listed indicators in a single batch request
+    // (/api/indicators/batch through DataCache), so that opening one of them needs no round trip
+    prefetchDetails(indicators) {
+        const codes = indicators
+            .map(ind => ind.code)
+            .filter(code => code && !this.details[code] && !this.requestedDetails.has(code))
+            .slice(0, DataCache.MAX_BATCH_CODES);
+        if (codes.length === 0) return this.pendingDetails;
+        codes.forEach(code => this.requestedDetails.add(code));
+
+        const previous = this.pendingDetails || Promise.resolve();
+        const request = previous
+            .then(() => DataCache.getIndicators(codes))
+            .then(data => Object.assign(this.details, data.indicators))
+            .catch(error => console.error('Failed to prefetch indicators:', error))
+            .finally(() => {
+                codes.forEach(code => this.requestedDetails.delete(code));
+                if (this.pendingDetails === request) this.pendingDetails = null;
+            });
+        this.pendingDetails = request;
+        return request;
+    },
+
     renderIndicatorsList() {
         const container = document.getElementById('indicators-list');
         
@@ -2789,8 +2920,10 @@ const ExplorerModule = {
             document.getElementById('explorer-indicators-view').classList.add('hidden');
             document.getElementById('explorer-detail-view').classList.remove('hidden');
 
-            const response = await fetch(`/api/indicator/${code}`);
-            const data = await response.json();
+            if (!this.details[code] && this.pendingDetails) await this.pendingDetails;
+            const indicator = this.details[code] || await DataCache.getIndicator(code);
+            if (indicator) this.details[code] = indicator;
+            const data = { success: !!indicator, indicator };
             
             if (!data.success || !data.indicator) {
                 DashboardV3.showToast('Indicateur non trouvé', 'warning');
@@ -0,0 +1,181 @@
+/**
+ * DataCache - Versioned browser cache (IndexedDB) for API data
+ *
+ * The server publishes /api/manifest: the dataset version plus a content hash
+ * for the indicator list, every indicator and every dashboard section.
+ * Entries are kept in IndexedDB with the hash they were fetched under; only
+ * entries whose hash changed (or that are not cached yet) hit the network.
+ * Without IndexedDB or a manifest, every call falls back to a plain fetch.
+ */
+
+const DataCache = {
+    DB_NAME: 'askfordata-data',
+    DB_VERSION: 1,
+    STORE: 'entries',
+    MAX_BATCH_CODES: 100, // see MAX_BATCH_CODES in api/views.py
+
+    _db: null,
+    _manifest: null,
+
+    // ── IndexedDB ─────────────────────────────────────────
+    _openDb() {
+        if (this._db) return this._db;
+        this._db = new Promise(resolve => {
+            if (!window.indexedDB) return resolve(null);
+            let req;
+            try {
+                req = indexedDB.open(this.DB_NAME, this.DB_VERSION);
+            } catch (e) {
+                return resolve(null);
+            }
+            req.onupgradeneeded = () => req.result.createObjectStore(this.STORE);
+            req.onsuccess = () => resolve(req.result);
+            // Private browsing, quota, blocked upgrade: run without cache
+            req.onerror = () => resolve(null);
+            req.onblocked = () => resolve(null);
+        });
+        return this._db;
+    },
+
+    // Read several entries at once → { key: {hash, data} }
+    async _getMany(keys) {
+        const db = await this._openDb();
+        if (!db || keys.length === 0) return {};
+        return new Promise(resolve => {
+            const found = {};
+            const tx = db.transaction(this.STORE, 'readonly');
+            const store = tx.objectStore(this.STORE);
+            keys.forEach(key => {
+                const req = store.get(key);
+                req.onsuccess = () => { if (req.result) found[key] = req.result; };
+            });
+            tx.oncomplete = () => resolve(found);
+            tx.onerror = () => resolve(found);
+            tx.onabort = () => resolve(found);
+        });
+    },
+
+    // Write entries [{key, hash, data}]
+    async _putMany(entries) {
+        const db = await this._openDb();
+        if (!db || entries.length === 0) return;
+        return new Promise(resolve => {
+            const tx = db.transaction(this.STORE, 'readwrite');
+            const store = tx.objectStore(this.STORE);
+            entries.forEach(({ key, hash, data }) => store.put({ hash, data }, key));
+            tx.oncomplete = () => resolve();
+            tx.onerror = () => resolve();
+            tx.onabort = () => resolve();
+        });
+    },
+
+    // ── Manifest ──────────────────────────────────────────
+    // Fetched once per page; revalidated by the browser (ETag → 304)
+    manifest() {
+        if (!this._manifest) {
+            this._manifest = fetch('/api/manifest')
+                .then(r => (r.ok ? r.json() : null))
+                .then(data => (data && data.success ? data : null))
+                .catch(() => null);
+        }
+        return this._manifest;
+    },
+
+    // ── Indicator list ────────────────────────────────────
+    // Same shape as GET /api/indicators
+    async getIndicatorList() {
+        const manifest = await this.manifest();
+        const hash = manifest && manifest.indicators_list;
+        if (hash) {
+            const cached = (await this._getMany(['list'])).list;
+            if (cached && cached.hash === hash) return cached.data;
+        }
+
+        const res = await fetch('/api/indicators');
+        const data = await res.json();
+        if (hash && data.success) await this._putMany([{ key: 'list', hash, data }]);
+        return data;
+    },
+
+    // ── Indicators ────────────────────────────────────────
+    // Same shape as GET /api/indicators/batch: { indicators: {code: indicator}, missing: [...] }
+    async getIndicators(codes) {
+        const manifest = await this.manifest();
+        const hashes = (manifest && manifest.indicators) || {};
+        const cached = await this._getMany(codes.map(code => `ind:${code}`));
+
+        const indicators = {};
+        const toFetch = [];
+        codes.forEach(code => {
+            const entry = cached[`ind:${code}`];
+            if (entry && hashes[code] && entry.hash === hashes[code]) indicators[code] = entry.data;
+            else toFetch.push(code);
+        });
+
+        const missing = [];
+        for (let i = 0; i < toFetch.length; i += this.MAX_BATCH_CODES) {
+            const chunk = toFetch.slice(i, i + this.MAX_BATCH_CODES);
+            const params = new URLSearchParams({ codes: chunk.join(',') });
+            const res = await fetch(`/api/indicators/batch?${params}`);
+            const data = await res.json();
+            if (!data.success) throw new Error(data.message || `HTTP ${res.status}`);
+
+            Object.assign(indicators, data.indicators);
+            missing.push(...(data.missing || []));
+            await this._putMany(Object.entries(data.indicators)
+                .filter(([code]) => hashes[code])
+                .map(([code, indicator]) => ({ key: `ind:${code}`, hash: hashes[code], data: indicator })));
+        }
+        return { indicators, missing };
+    },
+
+    // Same shape as the `indicator` field of GET /api/indicator/<code>, or null
+    async getIndicator(code) {
+        const { indicators } = await this.getIndicators([code]);
+        return indicators[code] || null;
+    },
+
+    // ── Dashboard sections ────────────────────────────────
+    // Same shape as GET /api/dashboard-data?sections=...; sections = null → whole dashboard
+    async getDashboardSections(sections = null) {
+        const manifest = await this.manifest();
+        const meta = (manifest && manifest.dashboard) || {};
+        const wanted = sections || Object.keys(meta);
+
+        const payload = {};
+        const merge = (block, content) => {
+            payload[block] = { ...(payload[block] || {}), ...content };
+        };
+
+        const cached = await this._getMany(wanted.map(s => `dash:${s}`));
+        const toFetch = [];
+        wanted.forEach(section => {
+            const entry = cached[`dash:${section}`];
+            if (entry && meta[section] && entry.hash === meta[section].hash) merge(meta[section].block, entry.data);
+            else toFetch.push(section);
+        });
+        if (wanted.length > 0 && toFetch.length === 0) return payload;
+
+        // Whole dashboard → unparameterized URL, shared with the HTTP/CDN cache
+        const url = (!sections || toFetch.length === Object.keys(meta).length)
+            ? '/api/dashboard-data'
+            : `/api/dashboard-data?sections=${encodeURIComponent(toFetch.join(','))}`;
+        const res = await fetch(url);
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        const data = await res.json();
+        Object.entries(data).forEach(([block, content]) => merge(block, content));
+
+        // Split the response back into sections using the keys listed in the manifest
+        await this._putMany(toFetch.filter(s => meta[s]).map(section => {
+            const { block, hash, keys } = meta[section];
+            const content = {};
+            keys.forEach(key => {
+                if (data[block] && key in data[block]) content[key] = data[block][key];
+            });
+            return { key: `dash:${section}`, hash, data: content };
+        }));
+        return payload;
+    },
+};
+
+window.DataCache = DataCache;
@@ -432,7 +432,7 @@ function displayResults(data) {
     // === BRIEF DATA SUMMARY (shown above the chart) ===
     const summaryEl = document.getElementById('data-summary');
     if (summaryEl) {
-        summaryEl.innerHTML = generateDataSummary(data, resolvedUnit);
+        summaryEl.innerHTML = generateDataSummary(data, resolvedUnit) + generateCalculationSummary(data);
         summaryEl.style.display = hasData ? 'block' : 'none';
     }
     
@@ -559,6 +559,26 @@ function generateDataSummary(data, unit) {
     return `<div class="data-summary-card"><i class="fas fa-chart-line"></i> <strong>${name}</strong> est passé de <strong>${fmt(first.value)}${unitStr}</strong> en <strong>${first.year}</strong> à <strong>${fmt(last.value)}${unitStr}</strong> en <strong>${last.year}</strong>${trend}.</div>`;
 }
 
+// Result of the calculation requested in the query, computed by the server
+// (calculation_result: a number; expression_result: a series by year)
+function generateCalculationSummary(data) {
+    const fmt = (v) => v.toLocaleString('fr-FR', { maximumFractionDigits: 2 });
+    const formula = data.calculation_formula
+        ? ` <span class="calc-formula">(${data.calculation_formula.replace(/</g, '&lt;')})</span>` : '';
+
+    if (typeof data.calculation_result === 'number') {
+        return `<div class="data-summary-card"><i class="fas fa-calculator"></i> Résultat du calcul : <strong>${fmt(data.calculation_result)}</strong>${formula}</div>`;
+    }
+    const series = data.expression_result;
+    if (series && series.years && series.years.length > 0) {
+        const n = series.years.length;
+        const last = `<strong>${fmt(series.values[n - 1])}</strong> en <strong>${series.years[n - 1]}</strong>`;
+        const first = n > 1 ? `, contre <strong>${fmt(series.values[0])}</strong> en <strong>${series.years[0]}</strong>` : '';
+        return `<div class="data-summary-card"><i class="fas fa-calculator"></i> Résultat du calcul : ${last}${first}${formula}</div>`;
+    }
+    return '';
+}
+
 function fetchAnalysisLazy(data) {
     const messageEl = document.getElementById('result-message');
     const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]')?.value 
@@ -0,0 +1,71 @@
+"""
+{% responsive_img %} : <picture> AVIF / WebP / JPEG avec srcset, à partir du
+manifeste produit par `manage.py build_responsive_images`. Sans manifeste
+(variantes non générées), rend un simple <img>.
+
+    {% load responsive_images %}
+    {% responsive_img 'img/patrick_achi.jpg' alt='Patrick ACHI' sizes='110px' %}
+    {% responsive_img 'img/tiemoko_kone.webp' alt='...' frame=110 %}   (cadre carré, object-fit: cover)
+"""
+import json
+from pathlib import Path
+
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from api.management.commands.build_responsive_images import MANIFEST_NAME, OUTPUT_DIR
+
+register = template.Library()
+
+# Ordre des <source> : le navigateur prend le premier format supporté
+SOURCE_TYPES = [('avif', 'image/avif'), ('webp', 'image/webp')]
+
+_manifest = None
+
+
+def _get_manifest():
+    """Manifeste des variantes (lu une fois par processus)."""
+    global _manifest
+    if _manifest is None:
+        path = Path(settings.RESPONSIVE_IMAGES_ROOT) / OUTPUT_DIR / MANIFEST_NAME
+        try:
+            with open(path, encoding='utf-8') as f:
+                _manifest = json.load(f)
+        except (OSError, ValueError):
+            _manifest = {}
+    return _manifest
+
+
+def _srcset(variants):
+    return ', '.join(f"{static(path)} {width}w" for width, path in variants)
+
+
+@register.simple_tag
+def responsive_img(path, alt='', sizes='100vw', style='', css_class='', frame=None):
+    """
+    `frame` : côté (px) d'un cadre carré rempli en object-fit: cover ; `sizes` est alors
+    déduit du ratio de l'image (une photo paysage est affichée plus large que le cadre).
+    """
+    entry = _get_manifest().get(path)
+    if entry and frame:
+        sizes = f"{round(int(frame) * max(1, entry['width'] / entry['height']))}px"
+    if not entry:
+        return format_html('<img src="{}" alt="{}" style="{}" class="{}" decoding="async">',
+                           static(path), alt, style, css_class)
+
+    variants = entry['variants']
+    fallback = variants['jpeg']
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((mime, _srcset(variants[fmt]), sizes) for fmt, mime in SOURCE_TYPES if variants.get(fmt)),
+    )
+    # display:contents : l'<img> reste l'enfant direct du cadre (mise en page inchangée)
+    return format_html(
+        '<picture style="display:contents">{}'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" style="{}" class="{}" decoding="async">'
+        '</picture>',
+        sources, static(fallback[len(fallback) // 2][1]), _srcset(fallback), sizes,
+        entry['width'], entry['height'], alt, style, css_class,
+    )
@@ -1,3 +1,540 @@
-from django.test import TestCase
+import json
+import pickle
+import re
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .anstat_sdmx_service import AGG_OVERRIDE, AGG_STRATEGY_BY_THEME, _aggregate_to_annual, _get_agg_strategy, anstat_sdmx_service
+from .dashboard_service import BOOTSTRAP_POINTS, DASHBOARD_TABS, SECTION_BLOCKS, dashboard_service
+from .expressions import MAX_EXPRESSION_LENGTH, MAX_POWER, ExpressionError, expression_engine
+from .gemini_service import GeminiService
+from .models import DataVintage, VintageCell
+from .panel_store import PanelStore
+from .product_table import LEVEL_CATEGORY, LEVEL_PRODUCT, LEVEL_TOTAL, ProductTable
+from .sdmx_index import SdmxIndex
+from .series_matrix import series_matrix
+from .vintages import record_vintage, resolve_vintage, series_as_of
+
+GDP = 'NY.GDP.MKTP.CD'
+POPULATION = 'SP.POP.TOTL'
+POPULATION_GROWTH = 'SP.POP.GROW'
+
+SDMX_SAMPLE = Path(__file__).resolve().parent / 'testdata' / 'sdmx_sample.xml'
+
+
+def _row(code):
+    series_matrix.ensure()
+    return series_matrix.values[series_matrix.index[code]]
+
+
+def _window(code, start, end):
+    values = _row(code)
+    years = series_matrix.years
+    mask = ~np.isnan(values) & (years >= start) & (years <= end)
+    return years[mask], values[mask]
+
+
+class ExpressionParsingTests(SimpleTestCase):
+    """Liste blanche de l'analyseur : seuls nombres, opérateurs, codes et FUNCTIONS passent."""
+
+    def assertRejected(self, expression, message=None):
+        with self.assertRaises(ExpressionError) as ctx:
+            expression_engine.evaluate(expression)
+        if message is not None:
+            self.assertIn(message, str(ctx.exception))
+
+    def test_attribute_rejected(self):
+        self.assertRejected(f'{GDP}.__class__', 'indicateur inconnu')
+        self.assertRejected('(1).real', 'Attribute')
+
+    def test_subscript_rejected(self):
+        self.assertRejected(f'{GDP}[0]', 'Subscript')
+
+    def test_keyword_arguments_rejected(self):
+        self.assertRejected(f'mean({GDP}, start=2010)', 'Call')
+
+    def test_unknown_names_rejected(self):
+        self.assertRejected('x + 1', 'nom inconnu : x')
+        self.assertRejected('XX.YY', 'indicateur inconnu : XX.YY')
+        self.assertRejected('foo(1)', 'fonction inconnue : foo')
+        self.assertRejected('mean', 'mean est une fonction')
+
+    def test_import_rejected(self):
+        self.assertRejected('__import__("os")', 'fonction inconnue : __import__')
+        self.assertRejected('__import__', 'nom inconnu : __import__')
+
+    def test_non_numeric_literals_rejected(self):
+        self.assertRejected('"a" + "b"')
+        self.assertRejected('True + 1')
+        self.assertRejected('[1, 2]')
+        self.assertRejected('3 // 2')
+
+    def test_power_limit(self):
+        self.assertEqual(expression_engine.evaluate(f'2 ** {MAX_POWER}')['value'], 2.0 ** MAX_POWER)
+        self.assertRejected(f'2 ** {MAX_POWER + 1}', 'exposant limité')
+        self.assertRejected(f'2 ** -{MAX_POWER + 1}', 'exposant limité')
+        self.assertRejected(f'{GDP} ** {GDP}', 'exposant limité')
+
+    def test_length_limit(self):
+        self.assertRejected('1 + ' * (MAX_EXPRESSION_LENGTH // 4) + '1', 'expression trop longue')
+        self.assertRejected('', 'expression vide')
+
+    def test_argument_count(self):
+        self.assertRejected(f'value({GDP})', 'value() attend entre 2 et 2 arguments')
+        self.assertRejected('usd(1)', "usd() attend un code d'indicateur")
+
+
+class ExpressionEvaluationTests(SimpleTestCase):
+    """Résultats des expressions, comparés à la matrice alignée."""
+
+    def test_scalar_mean(self):
+        _, values = _window(GDP, 2010, 2020)
+        result = expression_engine.evaluate(f'mean({GDP}, 2010, 2020)')
+        self.assertEqual(result['kind'], 'scalar')
+        self.assertAlmostEqual(result['value'], float(values.mean()), places=3)
+
+    def test_scalar_value(self):
+        years, values = _window(GDP, 2015, 2015)
+        result = expression_engine.evaluate(f'value({GDP}, 2015)')
+        self.assertEqual(result['value'], float(values[0]))
+        self.assertEqual(result['codes'], [GDP])
+
+    def test_scalar_cagr(self):
+        years, values = _window(GDP, 2010, 2020)
+        expected = ((values[-1] / values[0]) ** (1.0 / (years[-1] - years[0])) - 1) * 100
+        result = expression_engine.evaluate(f'cagr({GDP}, 2010, 2020)')
+        self.assertAlmostEqual(result['value'], float(expected), places=6)
+
+    def test_no_value_on_period(self):
+        with self.assertRaises(ExpressionError):
+            expression_engine.evaluate(f'value({GDP}, 1800)')
+
+    def test_series_aligned_by_year(self):
+        result = expression_engine.evaluate(f'yoy({GDP}) - {POPULATION_GROWTH}')
+        self.assertEqual(result['kind'], 'series')
+        gdp = dict(zip(*_window(GDP, 0, 9999)))
+        growth = dict(zip(*_window(POPULATION_GROWTH, 0, 9999)))
+        expected_years = [y for y in sorted(gdp) if y in growth and y - 1 in gdp]
+        self.assertEqual(result['years'], [int(y) for y in expected_years])
+        for year, value in zip(result['years'], result['values']):
+            yoy = (gdp[year] - gdp[year - 1]) / abs(gdp[year - 1]) * 100
+            self.assertAlmostEqual(value, yoy - growth[year], places=6)
+
+    def test_series_with_scalar(self):
+        years, values = _window(POPULATION, 0, 9999)
+        result = expression_engine.evaluate(f'{POPULATION} / 1e6')
+        self.assertEqual(result['years'], years.tolist())
+        np.testing.assert_allclose(result['values'], values / 1e6)
+
+    def test_mixed_scales_ratio(self):
+        # Mds FCFA / Millions FCFA : même ordre de grandeur que la pression fiscale publiée (%)
+        result = expression_engine.evaluate('NAT.tofe.recettes_fiscales / NAT.base_eco.pib_nominal_mxof * 100')
+        published = dict(zip(*_window('NAT.tofe.pression_fiscale', 0, 9999)))
+        for year, value in zip(result['years'], result['values']):
+            if year in published:
+                self.assertAlmostEqual(value, published[year], delta=0.5)
+
+    def test_mixed_currencies_rejected(self):
+        with self.assertRaises(ExpressionError):
+            expression_engine.evaluate(f'{GDP} / NAT.base_eco.pib_nominal_mxof')
+
+
+class CalculationExpressionTests(SimpleTestCase):
+    """Expressions générées pour les calculs simples demandés par l'IA."""
+
+    values = [{'year': 2010, 'value': 1.0}, {'year': 2015, 'value': 2.0}, {'year': 2020, 'value': 3.0}]
+
+    def test_moyenne(self):
+        expression = GeminiService._calculation_expression('moyenne', GDP, self.values)
+        self.assertEqual(expression, f'mean({GDP}, 2010, 2020)')
+        _, values = _window(GDP, 2010, 2020)
+        self.assertAlmostEqual(expression_engine.evaluate(expression)['value'], float(values.mean()), places=3)
+
+    def test_variation(self):
+        expression = GeminiService._calculation_expression('variation', GDP, self.values)
+        self.assertEqual(expression, f'change_pct({GDP}, 2010, 2020)')
+        _, values = _window(GDP, 2010, 2020)
+        expected = (values[-1] - values[0]) / abs(values[0]) * 100
+        self.assertAlmostEqual(expression_engine.evaluate(expression)['value'], float(expected), places=6)
+
+    def test_variation_needs_two_values(self):
+        self.assertIsNone(GeminiService._calculation_expression('variation', GDP, self.values[:1]))
+
+    def test_unknown_calculation(self):
+        self.assertIsNone(GeminiService._calculation_expression('mediane', GDP, self.values))
+
+    def test_fallback_on_values(self):
+        # Codes hors de series_matrix : calcul sur les valeurs retournées
+        self.assertEqual(GeminiService._calculate_from_values('moyenne', self.values)[0], 2.0)
+        self.assertEqual(GeminiService._calculate_from_values('variation', self.values)[0], 200.0)
+        zero = [{'year': 2010, 'value': 0.0}, {'year': 2020, 'value': 1.0}]
+        self.assertEqual(GeminiService._calculate_from_values('variation', zero), (None, None))
+        self.assertEqual(GeminiService._calculate_from_values('mediane', self.values), (None, None))
+
+
+class DatasetCacheTests(SimpleTestCase):
+    """304 avant la vue (DatasetCacheMiddleware), y compris pour les ETags pré-compressés."""
+
+    def assertNotModified(self, url, etag, **headers):
+        with mock.patch('api.views.dashboard_service.get_payload') as get_payload:
+            response = self.client.get(url, secure=True, HTTP_IF_NONE_MATCH=etag, **headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        get_payload.assert_not_called()
+
+    def test_precompressed_etag_not_modified(self):
+        for encoding in ('gzip', 'br'):
+            response = self.client.get('/api/dashboard-data', secure=True, HTTP_ACCEPT_ENCODING=encoding)
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+            if response.get('Content-Encoding') == encoding:
+                self.assertTrue(etag.endswith(f'-{encoding}"'))
+            self.assertNotModified('/api/dashboard-data', etag, HTTP_ACCEPT_ENCODING=encoding)
+
+    def test_identity_etag_not_modified(self):
+        etag = self.client.get(f'/api/indicator/{GDP}', secure=True)['ETag']
+        response = self.client.get(f'/api/indicator/{GDP}', secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_other_version_served(self):
+        response = self.client.get(f'/api/indicator/{GDP}', secure=True, HTTP_IF_NONE_MATCH='"autre-version-br"')
+        self.assertEqual(response.status_code, 200)
+
+
+class SdmxAggregationTests(SimpleTestCase):
+    """Annualisation des observations SDMX et règles AGG_OVERRIDE."""
+
+    def test_aggregate_to_annual(self):
+        observations = (
+            np.array([2021, 2020, 2020, 2021], dtype=np.int32),
+            np.array([1, 2, 1, 2], dtype=np.int16),
+            np.array([3.0, 2.0, 1.0, 4.0]),
+        )
+        for strategy, expected in (('avg', [1.5, 3.5]), ('sum', [3.0, 7.0]), ('last', [2.0, 4.0])):
+            years, values = _aggregate_to_annual(observations, strategy)
+            self.assertEqual(years.tolist(), [2020, 2021])
+            self.assertEqual(values.tolist(), expected, strategy)
+
+    def test_override_declaration_order(self):
+        def reference(code, theme):
+            for prefix, strategy in AGG_OVERRIDE.items():
+                if prefix in code:
+                    return strategy
+            return AGG_STRATEGY_BY_THEME.get(theme, 'avg')
+
+        codes = ['ENDA_XDC_USD_RATE', 'GGD_GDP', 'X_GDP_BFDA', 'BFDL_BP6', 'FASMB_XDC', 'PCPI_IX', 'TXG_FOB_XDC']
+        for code in codes:
+            for theme in ('commerce', 'reserves', 'ipc', 'inconnu'):
+                self.assertEqual(_get_agg_strategy(code, theme), reference(code, theme), (code, theme))
+        # BFDA est déclaré avant _GDP, même s'il apparaît après dans le code
+        self.assertEqual(_get_agg_strategy('X_GDP_BFDA', 'reserves'), 'sum')
+        self.assertEqual(_get_agg_strategy('TXG_FOB_XDC', 'commerce'), 'sum')
+        self.assertEqual(_get_agg_strategy('TXG_FOB_XDC', 'inconnu'), 'avg')
+
+
+class SdmxServiceTests(SimpleTestCase):
+    """Index, séries annualisées et ré-échantillonnage sur un extrait SDMX (testdata/sdmx_sample.xml)."""
+
+    def setUp(self):
+        self.enterContext(mock.patch.dict(anstat_sdmx_service.files, {'ipc': str(SDMX_SAMPLE)}, clear=True))
+        self.enterContext(mock.patch.dict(anstat_sdmx_service._resampled, clear=True))
+        partition = anstat_sdmx_service._load_theme('ipc')
+        self.enterContext(mock.patch.object(
+            anstat_sdmx_service, '_theme', lambda theme: partition if theme == 'ipc' else None))
+        self.index = partition['index']
+
+    def test_annual_series(self):
+        series = anstat_sdmx_service.series
+        self.assertEqual(series['ipc.PCPI_IX']['values'], [6.5, 18.5])  # avg (thème)
+        self.assertEqual(series['ipc.PCPI_IX']['freq_orig'], 'M')
+        self.assertEqual(series['ipc.BFDA_BP6_XDC']['values'], [100.0, 260.0])  # sum
+        self.assertEqual(series['ipc.FASMB_XDC']['values'], [111.0, 122.0])  # last, 2021-12 invalide
+        self.assertEqual(series['ipc.ENDA_XDC_USD_RATE']['years'], [2019, 2020, 2021])
+        self.assertIsInstance(self.index, SdmxIndex)
+
+    def test_index_select(self):
+        index = self.index
+        self.assertEqual(len(index), 5)
+        self.assertEqual(len(index.select(INDICATOR='ENDA_XDC_USD_RATE')), 2)
+        self.assertEqual(index.dimension_values('COUNTERPART_AREA'), ['US', 'EU'])
+
+        # FASMB_XDC n'a ni REF_AREA ni COUNTERPART_AREA
+        [stock] = index.select(INDICATOR='FASMB_XDC').tolist()
+        self.assertEqual(index.dims(stock), {'THEME': 'ipc', 'FREQ': 'M', 'INDICATOR': 'FASMB_XDC'})
+        self.assertNotIn(stock, index.select(REF_AREA='CI').tolist())
+        self.assertEqual(len(index.select(REF_AREA='CI')), 4)
+
+        [us] = index.posting('COUNTERPART_AREA', 'US').tolist()
+        self.assertEqual(index.dims(us)['COUNTERPART_AREA'], 'US')
+        self.assertEqual(index.select(REF_AREA='CI', COUNTERPART_AREA='US').tolist(), [us])
+        self.assertEqual(len(index.select(THEME='ipc', FREQ=['M', 'Q'])), 3)
+        self.assertEqual(len(index.posting('COUNTERPART_AREA', 'FR')), 0)
+        self.assertEqual(len(index.posting('DIMENSION_INCONNUE', 'x')), 0)
+        self.assertEqual(len(index.select(FREQ='W', REF_AREA='CI')), 0)
+        self.assertEqual(len(index.select()), 5)
+
+    def test_resample_monthly_to_quarterly_to_annual(self):
+        monthly = anstat_sdmx_service.resample('ipc.PCPI_IX', 'M')
+        self.assertIsNone(monthly['agg'])
+        self.assertEqual(monthly['periods'][:2], ['2020-01', '2020-02'])
+
+        quarterly = anstat_sdmx_service.resample('ipc.PCPI_IX', 'Q')
+        self.assertEqual((quarterly['agg'], quarterly['freq_orig']), ('avg', 'M'))
+        self.assertEqual(quarterly['periods'][0], '2020-Q1')
+        self.assertEqual(quarterly['values'][:2], [2.0, 5.0])
+
+        quarterly_sum = anstat_sdmx_service.resample('ipc.PCPI_IX', 'Q', 'sum')
+        annual_sum = anstat_sdmx_service.resample('ipc.PCPI_IX', 'A', 'sum')
+        self.assertEqual(annual_sum['periods'], ['2020', '2021'])
+        self.assertEqual(annual_sum['values'], [sum(quarterly_sum['values'][:4]), sum(quarterly_sum['values'][4:])])
+        self.assertEqual(anstat_sdmx_service.resample('ipc.PCPI_IX', 'A')['values'],
+                         anstat_sdmx_service.series['ipc.PCPI_IX']['values'])
+
+        stock = anstat_sdmx_service.resample('ipc.FASMB_XDC', 'Q')
+        self.assertEqual(stock['agg'], 'last')
+        self.assertEqual((stock['values'][0], stock['values'][-1]), (102.0, 122.0))
+
+    def test_resample_errors(self):
+        self.assertIsNone(anstat_sdmx_service.resample('ipc.INCONNU', 'A'))
+        with self.assertRaises(ValueError):
+            anstat_sdmx_service.resample('ipc.BFDA_BP6_XDC', 'M')
+
+    def test_find_series_and_raw_series(self):
+        found = anstat_sdmx_service.find_series(INDICATOR='ENDA_XDC_USD_RATE')
+        self.assertEqual([f['dimensions']['COUNTERPART_AREA'] for f in found], ['US', 'EU'])
+        self.assertEqual({f['theme'] for f in found}, {'ipc'})
+        self.assertEqual(len(anstat_sdmx_service.find_series(THEME='ipc', FREQ='M')), 2)
+        self.assertEqual(anstat_sdmx_service.find_series(THEME='commerce'), [])
+
+        raw = anstat_sdmx_service.get_raw_series('ipc', found[1]['row'])
+        self.assertEqual(raw['name'], 'Taux de change')
+        self.assertEqual(raw['periods'], ['2019', '2020', '2021'])
+        self.assertEqual(raw['values'], [655.957] * 3)
+
+
+# Page rendue sans collectstatic : stockage statique sans manifeste
+@override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class DashboardBootstrapTests(SimpleTestCase):
+    """Page /dashboard/ : KPIs complets et aperçu réduit de l'onglet d'ouverture."""
+
+    def test_tabs_reference_known_sections(self):
+        for tab, sections in DASHBOARD_TABS.items():
+            self.assertEqual([s for s in sections if s not in SECTION_BLOCKS], [], tab)
+
+    def test_bootstrap_preview(self):
+        html = self.client.get('/dashboard/', secure=True).content.decode()
+        tabs = re.search(r'<script id="dashboard-tabs" type="application/json">(.*?)</script>', html, re.S)
+        self.assertEqual(json.loads(tabs.group(1)), DASHBOARD_TABS)
+
+        bootstrap = json.loads(re.search(
+            r'<script id="dashboard-bootstrap" type="application/json">(.*?)</script>', html, re.S).group(1))
+        self.assertEqual(bootstrap['sections'], ['kpis'])
+        self.assertEqual(list(bootstrap['data']), ['kpis'])
+        full = json.loads(dashboard_service.get_payload(('macro',))['identity'])['series']
+        preview = bootstrap['preview']['series']
+        self.assertEqual(set(preview) & set(full), set(full))
+        for key, series in full.items():
+            self.assertEqual(preview[key], {'values': series['values'][-BOOTSTRAP_POINTS:]})
+
+
+class _Matrix:
+    """Matrice des séries minimale pour record_vintage : codes × années."""
+
+    def __init__(self, codes, years, values):
+        self.codes = codes
+        self.years = np.array(years)
+        self.values = np.array(values, dtype=np.float64)
+
+    def ensure(self):
+        return self
+
+
+class VintageTests(TestCase):
+    """Deltas enregistrés par record_vintage et séries reconstituées (?as_of=)."""
+
+    def record(self, version, day, values):
+        matrix = _Matrix([GDP, POPULATION], [2010, 2011], values)
+        with mock.patch('api.vintages.get_dataset_version', return_value={'version': version, 'files': {}}):
+            vintage, created = record_vintage(matrix)
+        DataVintage.objects.filter(pk=vintage.pk).update(recorded_at=f'{day}T12:00:00Z')
+        vintage.refresh_from_db()
+        return vintage, created
+
+    def setUp(self):
+        self.first, _ = self.record('ancienne', '2025-01-10', [[1.0, 2.0], [10.0, np.nan]])
+        # 2010 révisée, 2011 retirée pour GDP ; 2011 ajoutée pour POPULATION
+        self.second, _ = self.record('revisee', '2025-06-01', [[1.5, np.nan], [10.0, 11.0]])
+
+    def test_delta(self):
+        self.assertEqual((self.first.cells_total, self.first.cells_added), (3, 3))
+        second = self.second
+        self.assertEqual((second.cells_added, second.cells_changed, second.cells_removed), (1, 1, 1))
+        self.assertEqual(VintageCell.objects.filter(vintage=second).count(), 3)
+        removed = VintageCell.objects.get(vintage=second, code=GDP, year=2011)
+        self.assertIsNone(removed.value)
+        self.assertEqual(self.record('revisee', '2025-06-01', [[0.0, 0.0], [0.0, 0.0]]), (second, False))
+
+    def test_series_as_of(self):
+        self.assertEqual(series_as_of(GDP, self.first), ([2010, 2011], [1.0, 2.0]))
+        self.assertEqual(series_as_of(GDP, self.second), ([2010], [1.5]))
+        self.assertEqual(series_as_of(POPULATION, self.second), ([2010, 2011], [10.0, 11.0]))
+        self.assertEqual(series_as_of('INCONNU', self.second), ([], []))
+
+    def test_resolve_vintage(self):
+        self.assertEqual(resolve_vintage('ancienne'), self.first)
+        self.assertEqual(resolve_vintage('2025-03-01'), self.first)
+        self.assertEqual(resolve_vintage('2025-06-01'), self.second)  # fin de journée
+        self.assertEqual(resolve_vintage('2025-06-01T08:00:00+00:00'), self.first)
+        self.assertIsNone(resolve_vintage('2024-12-31'))
+        with self.assertRaises(ValueError):
+            resolve_vintage('hier')
+
+    def test_indicator_as_of(self):
+        url = f'/api/indicator/{GDP}?layout=columnar&as_of='
+        for as_of, expected in (('ancienne', [1.0, 2.0]), ('2025-03-01', [1.0, 2.0]), ('2025-07-01', [1.5])):
+            response = self.client.get(url + as_of, secure=True)
+            self.assertEqual(response.status_code, 200, as_of)
+            self.assertEqual(response.json()['indicator']['values'], expected, as_of)
+        self.assertEqual(response.json()['vintage']['version'], 'revisee')
+        for as_of in ('2024-12-31', 'hier'):
+            self.assertEqual(self.client.get(url + as_of, secure=True).status_code, 400, as_of)
+
+
+def _panel_file(rows, years):
+    """(clés, valeurs par année) au format de _read_panel_file : rows = [(pays, code, nom, valeurs)]."""
+    keys = pd.DataFrame({
+        'country': [r[0] for r in rows],
+        'country_name': [r[0] for r in rows],
+        'code': [r[1] for r in rows],
+        'name': [r[2] for r in rows],
+    })
+    return keys, pd.DataFrame([r[3] for r in rows], columns=years, dtype=np.float64)
+
+
+class PanelStoreTests(SimpleTestCase):
+    """Cube pays × indicateur × année et masque de couverture (panel_store), sur deux classeurs simulés."""
+
+    FILES = {
+        'data.xlsx': _panel_file([
+            ('CIV', 'GDP', 'PIB', [1.0, 2.0, np.nan]),
+            ('CIV', 'POP', 'Population', [np.nan, np.nan, np.nan]),
+        ], [2019, 2020, 2021]),
+        'wdi.xlsx': _panel_file([
+            ('SEN', 'GDP', 'GDP (current US$)', [3.0, np.nan, 5.0, np.nan]),
+            ('CIV', 'GDP', 'GDP (current US$)', [9.0, 9.0, 9.0, 9.0]),  # data.xlsx fait foi
+            ('GHA', 'POP', 'Population, total', [np.nan, 7.0, np.nan, np.nan]),
+        ], [2019, 2020, 2021, 2022]),
+    }
+
+    def setUp(self):
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(mock.patch('api.panel_store.PANEL_CACHE_DIR', Path(directory)))
+        self.enterContext(mock.patch('api.panel_store._panel_files', return_value=[Path(n) for n in self.FILES]))
+        self.enterContext(mock.patch('api.panel_store._read_panel_file', side_effect=lambda p: self.FILES[p.name]))
+        self.enterContext(mock.patch('api.panel_store.get_dataset_version', return_value={'version': 'test'}))
+        # Instance propre : le singleton garde le panel réel
+        self.store = object.__new__(PanelStore)
+        self.store._version = None
+        self.store._lock = threading.Lock()
+        self.store.ensure()
+
+    def test_cube(self):
+        store = self.store
+        self.assertEqual(store.countries, ['CIV', 'SEN', 'GHA'])
+        self.assertEqual(store.country_names[0], "Côte d'Ivoire")
+        self.assertEqual(store.codes, ['GDP', 'POP'])
+        self.assertEqual(store.names, ['PIB', 'Population'])
+        self.assertEqual(store.years.tolist(), [2019, 2020, 2021, 2022])
+        self.assertIsInstance(store.values, np.memmap)
+        np.testing.assert_array_equal(store.values[0, 0], [1.0, 2.0, np.nan, np.nan])
+        np.testing.assert_array_equal(store.values[1, 0], [3.0, np.nan, 5.0, np.nan])
+
+    def test_coverage_mask(self):
+        store = self.store
+        mask = store.covered([0, 1], [0, 1, 2])
+        np.testing.assert_array_equal(mask, ~np.isnan(np.asarray(store.values)))
+        np.testing.assert_array_equal(store.covered([0], [1], 1, 3), [[[False, True]]])
+        self.assertEqual(store.covered_countries('POP'), [2])
+        self.assertEqual(store.covered_countries('INCONNU'), [])
+
+    def test_compare(self):
+        result = self.store.compare(['GDP', 'XX'], ['CIV', 'Sénégal'])
+        self.assertEqual(result['years'], [2019, 2020, 2021])  # 2022 vide : retirée de l'axe
+        self.assertEqual(result['indicators']['GDP']['values'], {'CIV': [1.0, 2.0, None], 'SEN': [3.0, None, 5.0]})
+        self.assertEqual(result['missing'], ['XX'])
+
+        result = self.store.compare(['POP'])
+        self.assertEqual([c['code'] for c in result['countries']], ['GHA'])
+        self.assertEqual(result['years'], [2020])
+
+    def test_resolve_countries(self):
+        self.assertEqual(self.store.resolve_countries(['UEMOA', 'civ']), [0, 1])
+        with self.assertRaises(ValueError):
+            self.store.resolve_countries(['Atlantide'])
+
+
+class ProductTableTests(SimpleTestCase):
+    """Niveaux, codes stables et classements d'une feuille de produits (douanes.xlsx)."""
+
+    # Libellé → valeurs 2020, 2021 dans l'ordre de la feuille. « Mines » n'est pas la somme
+    # de ses produits publiés : reconnue comme TOTAL moins les autres catégories
+    SHEET = [
+        ('TOTAL EXPORTATIONS', [100.0, 120.0]),
+        ('Agriculture', [70.0, 80.0]),
+        ('Cacao fèves', [50.0, 60.0]),
+        ('Café', [20.0, 20.0]),
+        ('Mines', [30.0, 40.0]),
+        ('Or', [25.0, 30.0]),
+        ('Pétrole', [4.0, 9.0]),
+        ('Cacao-fèves', [None, None]),
+    ]
+
+    def setUp(self):
+        table = {}
+        for name, values in self.SHEET:
+            years = [y for y, v in zip((2020, 2021), values) if v is not None]
+            table[name] = {'years': years, 'values': [v for v in values if v is not None]}
+        self.table = ProductTable('export', table)
+
+    def row(self, name):
+        return self.table.names.index(name)
+
+    def test_levels_and_categories(self):
+        table = self.table
+        self.assertEqual(table.levels.tolist(), [LEVEL_TOTAL, LEVEL_CATEGORY, LEVEL_PRODUCT, LEVEL_PRODUCT,
+                                                 LEVEL_CATEGORY, LEVEL_PRODUCT, LEVEL_PRODUCT, LEVEL_PRODUCT])
+        self.assertEqual(table.describe(self.row('Café'))['category'], 'Agriculture')
+        self.assertEqual(table.describe(self.row('Cacao-fèves')), {
+            'code': 'export.cacao_feves_2', 'name': 'Cacao-fèves', 'level': 'produit', 'category': 'Mines',
+        })
+        self.assertEqual(table.codes[self.row('Cacao fèves')], 'export.cacao_feves')
+        self.assertEqual(table.series(self.row('Cacao-fèves')), {'years': [], 'values': [], 'name': 'Cacao-fèves'})
+
+    def test_top_k(self):
+        rows, values = self.table.top_k(2)
+        self.assertEqual([self.table.names[r] for r in rows], ['Cacao fèves', 'Or'])
+        self.assertEqual(values.tolist(), [60.0, 30.0])
+
+        # Période : somme des années ; produit sans valeur exclu
+        rows, values = self.table.top_k(10, start=2020, end=2021)
+        self.assertEqual([self.table.names[r] for r in rows], ['Cacao fèves', 'Or', 'Café', 'Pétrole'])
+        self.assertEqual(values.tolist(), [110.0, 55.0, 40.0, 13.0])
+        self.assertIs(self.table.top_k(10, start=2020, end=2021)[0], rows)  # cache (période, k)
+        with self.assertRaises(ValueError):
+            self.table.top_k(3, year=2030)
+
+    def test_pickle(self):
+        restored = pickle.loads(pickle.dumps(self.table))
+        self.assertEqual(restored.top_k(2)[1].tolist(), [60.0, 30.0])
+        self.assertEqual(restored.codes, self.table.codes)
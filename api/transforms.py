@@ -0,0 +1,325 @@
+"""
+Transformations de séries calculées côté serveur (?transform=...).
+
+    ?transform=yoy                       variation annuelle en %
+    ?transform=cagr | cagr=5             TCAM en % depuis la première année | sur 5 ans glissants
+    ?transform=rebase=2015               indice base 100 en 2015
+    ?transform=rolling_mean=3            moyenne mobile sur 3 ans
+    ?transform=log | diff                logarithme népérien | différence première
+    ?transform=share_of=NY.GDP.MKTP.CN   part (%) dans une autre série, année par année
+    ?transform=currency=USD              montant converti en USD (ou XOF) au taux de l'année
+    ?transform=rolling_mean=3,yoy        étapes composées, appliquées de gauche à droite
+
+Les séries sont lues sur l'axe d'années contigu de la matrice alignée (series_matrix) :
+chaque étape est une opération NumPy sur le tableau complet, et le résultat est
+gardé en mémoire par (code, transformation) pour la version courante des données.
+Une série d'une autre version (?as_of=, voir vintages.py) est réalignée sur le même
+axe et transformée de la même façon, sans mise en cache.
+share_of et currency tiennent compte de l'unité de la série (devise, échelle : voir
+conversion.py) : une part de Mds FCFA dans des $ US courants est calculée après conversion.
+"""
+import threading
+
+import numpy as np
+
+from .conversion import currency_converter
+from .series_format import series_layout, LAYOUT_RECORDS
+from .series_matrix import series_matrix
+from .units import CURRENCIES, format_unit, parse_unit
+
+# nom → type de l'argument (None : pas d'argument, int, str : code d'indicateur)
+TRANSFORMS = {
+    'yoy': None,
+    'cagr': int,
+    'rebase': int,
+    'rolling_mean': int,
+    'log': None,
+    'diff': None,
+    'share_of': str,
+    'currency': str,
+}
+# Argument obligatoire (facultatif pour cagr)
+REQUIRED_ARG = {'rebase', 'rolling_mean', 'share_of', 'currency'}
+
+MAX_STEPS = 6
+MAX_WINDOW = 50
+
+# Nombre maximal de séries transformées gardées en mémoire
+MAX_CACHED_SERIES = 4096
+
+
+def parse_transform(spec):
+    """
+    'rolling_mean=3,yoy' → (('rolling_mean', 3), ('yoy', None)).
+    Lève ValueError (message utilisateur) si la spécification est invalide.
+    """
+    steps = []
+    for raw in spec.split(','):
+        raw = raw.strip()
+        if not raw:
+            continue
+        name, _, arg = raw.partition('=')
+        name, arg = name.strip().lower(), arg.strip()
+        if name not in TRANSFORMS:
+            raise ValueError(f'transformation inconnue "{name}" (disponibles : {", ".join(TRANSFORMS)})')
+        if not arg:
+            if name in REQUIRED_ARG:
+                raise ValueError(f'"{name}" attend un argument ({name}=...)')
+            steps.append((name, None))
+            continue
+        arg_type = TRANSFORMS[name]
+        if arg_type is None:
+            raise ValueError(f'"{name}" ne prend pas d\'argument')
+        if arg_type is int:
+            try:
+                arg = int(arg)
+            except ValueError:
+                raise ValueError(f'"{name}" attend un entier')
+            if name != 'rebase' and not 1 <= arg <= MAX_WINDOW:
+                raise ValueError(f'"{name}" attend une durée entre 1 et {MAX_WINDOW} ans')
+        if name == 'currency':
+            arg = arg.upper()
+            if arg not in CURRENCIES:
+                raise ValueError(f'"currency" attend une devise ({", ".join(CURRENCIES)})')
+        steps.append((name, arg))
+
+    if not steps:
+        raise ValueError('transformation vide')
+    if len(steps) > MAX_STEPS:
+        raise ValueError(f'trop d\'étapes (maximum {MAX_STEPS})')
+    return tuple(steps)
+
+
+def format_transform(steps):
+    """Forme canonique d'une transformation : (('rebase', 2015),) → 'rebase=2015'."""
+    return ','.join(name if arg is None else f'{name}={arg}' for name, arg in steps)
+
+
+def transform_unit(unit, steps):
+    """Unité du résultat après les transformations."""
+    for name, arg in steps:
+        if name in ('yoy', 'cagr', 'share_of'):
+            unit = '%'
+        elif name == 'rebase':
+            unit = f'indice (base 100 = {arg})'
+        elif name == 'log':
+            unit = f'log ({unit})' if unit else 'log'
+        elif name == 'currency':
+            _, scale, prices = parse_unit(unit)
+            unit = format_unit(arg, scale, prices)
+    return unit
+
+
+# ─────────────────────────────────────────────────────
+# Opérations vectorisées (tableaux sur l'axe d'années contigu, NaN = pas de valeur)
+# ─────────────────────────────────────────────────────
+def _lagged_ratio(values, lag):
+    """values[t] / values[t - lag] (NaN sur les `lag` premières années)."""
+    out = np.full_like(values, np.nan)
+    out[lag:] = values[lag:] / values[:-lag]
+    return out
+
+
+def _yoy(values, years, arg):
+    out = np.full_like(values, np.nan)
+    out[1:] = (values[1:] - values[:-1]) / np.abs(values[:-1]) * 100
+    return out
+
+
+def _diff(values, years, arg):
+    out = np.full_like(values, np.nan)
+    out[1:] = values[1:] - values[:-1]
+    return out
+
+
+def _log(values, years, arg):
+    return np.where(values > 0, np.log(np.where(values > 0, values, 1.0)), np.nan)
+
+
+def _cagr(values, years, arg):
+    positive = np.where(values > 0, values, np.nan)
+    if arg is not None:
+        # TCAM glissant sur `arg` années
+        return (_lagged_ratio(positive, arg) ** (1.0 / arg) - 1) * 100
+    # TCAM depuis la première année disponible
+    valid = np.nonzero(~np.isnan(values))[0]
+    out = np.full_like(values, np.nan)
+    if len(valid) == 0:
+        return out
+    first = valid[0]
+    elapsed = np.arange(len(values)) - first
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = ((positive / positive[first]) ** (1.0 / elapsed) - 1) * 100
+    out[:first + 1] = np.nan
+    return out
+
+
+def _rebase(values, years, arg):
+    col = arg - int(years[0])
+    if not 0 <= col < len(values) or np.isnan(values[col]) or values[col] == 0:
+        raise ValueError(f'pas de valeur non nulle en {arg} pour rebaser la série')
+    return values / values[col] * 100
+
+
+def _rolling_mean(values, years, window):
+    # Moyenne sur `window` années consécutives toutes renseignées (cumuls glissants)
+    valid = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+    out = np.full_like(values, np.nan)
+    if window <= len(values):
+        full = (counts[window:] - counts[:-window]) == window
+        out[window - 1:] = np.where(full, (sums[window:] - sums[:-window]) / window, np.nan)
+    return out
+
+
+OPERATIONS = {
+    'yoy': _yoy,
+    'cagr': _cagr,
+    'rebase': _rebase,
+    'rolling_mean': _rolling_mean,
+    'log': _log,
+    'diff': _diff,
+}
+
+
+# ─────────────────────────────────────────────────────
+# Étapes qui dépendent de l'unité courante de la série
+# ─────────────────────────────────────────────────────
+def _align(years, values):
+    """Série (années, valeurs) réalignée sur l'axe d'années de series_matrix (NaN ailleurs)."""
+    out = np.full(len(series_matrix.years), np.nan)
+    if not len(years) or not len(out):
+        return out
+    years = np.asarray(years, dtype=series_matrix.years.dtype)
+    cols = np.searchsorted(series_matrix.years, years)
+    inside = (cols < len(out)) & (series_matrix.years[np.minimum(cols, len(out) - 1)] == years)
+    out[cols[inside]] = np.asarray(values, dtype=float)[inside]
+    return out
+
+
+def _current_reference(code):
+    i = series_matrix.index.get(code)
+    return None if i is None else series_matrix.values[i]
+
+
+def _share_of(values, unit, code, reference):
+    reference = reference(code)
+    if reference is None:
+        raise ValueError(f'indicateur de référence {code} non trouvé')
+    currency, scale, prices = parse_unit(unit)
+    ref_currency, ref_scale, ref_prices = currency_converter.unit_of(code)
+    if currency and ref_currency:
+        # Deux montants : référence exprimée dans la devise et l'échelle de la série
+        reference = reference * currency_converter.factors(ref_currency, ref_scale, ref_prices, currency, scale)
+    return values / reference * 100
+
+
+def _currency(values, unit, currency, reference):
+    return currency_converter.convert(values, unit, currency)[0]
+
+
+UNIT_OPERATIONS = {
+    'share_of': _share_of,
+    'currency': _currency,
+}
+
+
+class SeriesTransformer:
+    """Singleton : applique et mémorise les transformations de séries"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._version = None
+            cls._instance._cache = {}  # (code, étapes) → (années, valeurs) en listes
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    def _ensure(self):
+        series_matrix.ensure()
+        if self._version != series_matrix.version:
+            with self._lock:
+                if self._version != series_matrix.version:
+                    self._cache = {}
+                    self._version = series_matrix.version
+
+    def transform(self, code, steps):
+        """
+        (années, valeurs) de la série `code` transformée, années sans résultat exclues.
+        Retourne None si le code est inconnu ; lève ValueError si une étape est impossible.
+        """
+        self._ensure()
+        key = (code, steps)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        i = series_matrix.index.get(code)
+        if i is None:
+            return None
+        result = self._run(series_matrix.values[i].copy(), series_matrix.units[i], steps, _current_reference)
+        if len(self._cache) >= MAX_CACHED_SERIES:
+            self._cache.clear()
+        self._cache[key] = result
+        return result
+
+    def transform_series(self, code, years, values, steps, reference):
+        """
+        (années, valeurs) transformées d'une autre version de la série `code` (ex. une
+        vintage) ; `reference(code)` donne (années, valeurs) de la référence de share_of
+        dans cette même version. Non mis en cache. Retourne None si le code est inconnu.
+        """
+        self._ensure()
+        i = series_matrix.index.get(code)
+        if i is None:
+            return None
+
+        def aligned_reference(ref_code):
+            ref = reference(ref_code)
+            return None if ref is None or not len(ref[0]) else _align(*ref)
+
+        return self._run(_align(years, values), series_matrix.units[i], steps, aligned_reference)
+
+    @staticmethod
+    def _run(values, unit, steps, reference):
+        years = series_matrix.years
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for name, arg in steps:
+                if name in UNIT_OPERATIONS:
+                    values = UNIT_OPERATIONS[name](values, unit, arg, reference)
+                else:
+                    values = OPERATIONS[name](values, years, arg)
+                values[~np.isfinite(values)] = np.nan
+                unit = transform_unit(unit, ((name, arg),))
+
+        mask = ~np.isnan(values)
+        return years[mask].tolist(), values[mask].tolist()
+
+    def apply(self, indicator, steps, layout=LAYOUT_RECORDS, series=None, reference=None):
+        """
+        Copie d'un indicateur dont la série est remplacée par la série transformée :
+        la série courante, ou `series` = (années, valeurs) d'une autre version (voir
+        transform_series, `reference` donnant les séries de cette version).
+        Lève ValueError si la série n'est pas dans la matrice alignée (non transformable).
+        """
+        if series is None:
+            result = self.transform(indicator['code'], steps)
+        else:
+            result = self.transform_series(indicator['code'], *series, steps, reference)
+        if result is None:
+            raise ValueError(f'la série {indicator["code"]} ne peut pas être transformée')
+        years, values = result
+        base = {k: v for k, v in indicator.items() if k not in ('years', 'values')}
+        return {
+            **base,
+            'unit': transform_unit(indicator.get('unit', ''), steps),
+            'transform': format_transform(steps),
+            **series_layout(years, values, layout),
+        }
+
+
+# Singleton
+series_transformer = SeriesTransformer()
@@ -0,0 +1,109 @@
+"""
+Unités et échelles des séries : lecture des libellés d'unité et changements d'échelle.
+
+Les libellés viennent de data_service._infer_unit (Banque Mondiale), de
+INDICATOR_META (séries nationales) et de ANSTAT_INDICATOR_META (ANStat, complété
+par l'attribut SDMX UNIT_MULT). Un libellé monétaire se lit comme
+(devise, échelle, prix) :
+
+    'Mds FCFA'                     → ('XOF', 1e9, 'current')
+    'Millions XOF'                 → ('XOF', 1e6, 'current')
+    'en dollars courants'          → ('USD', 1,   'current')
+    'en dollars constants de 2015' → ('USD', 1,   'constant')
+    'UCL constantes'               → ('XOF', 1,   'constant')
+    '% du PIB', 'LCU par dollar…'  → (None,  1,   None)
+
+Module sans dépendance aux services de données (importé par national_data_service) ;
+la conversion entre devises est faite par conversion.py.
+"""
+import re
+
+import numpy as np
+
+XOF = 'XOF'
+USD = 'USD'
+CURRENCIES = (XOF, USD)
+
+PRICES_CURRENT = 'current'
+PRICES_CONSTANT = 'constant'
+
+# Libellés des échelles, du plus grand au plus petit
+SCALES = (
+    (1e9, 'Mds'),
+    (1e6, 'Millions'),
+    (1e3, 'Milliers'),
+)
+
+# Ratios, indices, taux de change… : jamais des montants
+_NOT_AMOUNT_RE = re.compile(r'%|\bpar\b|\bpour\b|/|=')
+# Dollars internationaux (PPA) : pas de taux de marché applicable
+_PPP_RE = re.compile(r'internationa|\bppa\b')
+_USD_RE = re.compile(r'dollar|\$|\busd\b')
+_XOF_RE = re.compile(r'fcfa|\bxof\b|\buc[ltvm]\b|\blcu\b|monnaie locale')
+_CONSTANT_RE = re.compile(r'constant')
+
+_SCALE_RES = (
+    (1e9, re.compile(r'\bmds?\b|\bmilliards?\b')),
+    (1e6, re.compile(r'\bmillions?\b')),
+    (1e3, re.compile(r'\bmilliers?\b')),
+)
+
+
+def parse_scale(unit, unit_mult=None):
+    """
+    Multiplicateur des valeurs stockées ('Mds FCFA' → 1e9). Sans mot d'échelle dans
+    le libellé, l'attribut SDMX UNIT_MULT (puissance de 10) est appliqué s'il est connu.
+    """
+    u = (unit or '').lower()
+    for scale, pattern in _SCALE_RES:
+        if pattern.search(u):
+            return scale
+    if unit_mult not in (None, ''):
+        try:
+            return 10.0 ** int(unit_mult)
+        except (TypeError, ValueError):
+            pass
+    return 1.0
+
+
+def parse_unit(unit, unit_mult=None):
+    """
+    (devise, échelle, prix) d'un libellé d'unité. devise vaut 'XOF', 'USD' ou None
+    (pas un montant, ou montant en PPA) ; prix vaut 'current', 'constant' ou None.
+    """
+    u = (unit or '').lower()
+    scale = parse_scale(unit, unit_mult)
+    if not u or _NOT_AMOUNT_RE.search(u) or _PPP_RE.search(u):
+        return None, scale, None
+    if _USD_RE.search(u):
+        currency = USD
+    elif _XOF_RE.search(u):
+        currency = XOF
+    else:
+        return None, scale, None
+    prices = PRICES_CONSTANT if _CONSTANT_RE.search(u) else PRICES_CURRENT
+    return currency, scale, prices
+
+
+def format_unit(currency, scale=1.0, prices=PRICES_CURRENT):
+    """Libellé d'un montant : ('USD', 1e9) → 'Mds USD', ('XOF', 1, 'constant') → 'XOF constants'."""
+    label = 'FCFA' if currency == XOF else currency
+    for value, name in SCALES:
+        if scale == value:
+            label = f'{name} {label}'
+            break
+    else:
+        if scale != 1:
+            label = f'{label} (×{scale:g})'
+    if prices == PRICES_CONSTANT:
+        label = f'{label} constants'
+    return label
+
+
+def rescale(values, from_unit, to_unit):
+    """
+    Valeurs exprimées dans `from_unit` ramenées à l'échelle de `to_unit`
+    (même devise) : rescale(pib, 'Millions XOF', 'Mds FCFA') divise par 1000.
+    """
+    factor = parse_scale(from_unit) / parse_scale(to_unit)
+    return np.asarray(values, dtype=np.float64) * factor
@@ -9,8 +9,18 @@ urlpatterns = [
     path('query-analysis', views.query_analysis, name='query_analysis'),
     path('suggest', views.suggest_indicators, name='suggest_indicators'),
     path('indicators', views.list_indicators, name='list_indicators'),
+    path('indicators/batch', views.indicators_batch, name='indicators_batch'),
     path('indicator/<str:code>', views.indicator_detail, name='indicator_detail'),
+    path('snapshot/<int:year>', views.year_snapshot, name='year_snapshot'),
+    path('movers', views.movers, name='movers'),
+    path('compute', views.compute_expression, name='compute_expression'),
+    path('correlations/<str:code>', views.indicator_correlations, name='indicator_correlations'),
+    path('douanes/top', views.top_products, name='top_products'),
+    path('panel', views.panel_compare, name='panel_compare'),
+    path('vintages', views.vintages, name='vintages'),
     path('dashboard-data', views.dashboard_data, name='dashboard_data'),
+    path('manifest', views.data_manifest, name='data_manifest'),
+    path('export', views.export_data, name='export_data'),
     path('health', views.health_check, name='health_check'),
     path('feedback', views.submit_feedback, name='submit_feedback'),
     path('save-api-key', views.save_api_key, name='save_api_key'),
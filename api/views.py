@@ -3,9 +3,11 @@ Vues API REST pour Ask For Data Côte d'Ivoire
 """
 import hashlib
 import logging
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, authentication_classes, renderer_classes
 from rest_framework.response import Response
 from rest_framework import status
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt
@@ -15,11 +17,32 @@ from django.contrib.auth.models import User
 
 logger = logging.getLogger('api')
 from .data_service import data_service
-from .national_data_service import national_data_service as nds
-from .anstat_sdmx_service import anstat_sdmx_service as anstat
+from .national_data_service import national_data_service as nds, TOP_PRODUCTS
+from .anstat_sdmx_service import AGG_STRATEGIES, RESAMPLE_FREQS, anstat_sdmx_service as anstat
 from .gemini_service import gemini_service, get_service_for_key
+from .dashboard_service import dashboard_service, DASHBOARD_SECTIONS, DASHBOARD_TABS
+from .http_cache import precompressed_response
+from .renderers import SERIES_RENDERER_CLASSES, BINARY_FORMATS
+from .indicator_store import indicator_store
+from .export_service import (
+    EXPORT_FORMATS, EXPORT_LAYOUTS, EXPORT_SOURCES,
+    resolve_export_codes, iter_export_rows, stream_csv, write_xlsx,
+)
+from .series_matrix import series_matrix, MATRIX_SOURCES, SNAPSHOT_FALLBACKS
+from .movers_service import movers_service, MOVERS_WINDOWS, DEFAULT_TOP as MOVERS_DEFAULT_TOP, MAX_TOP as MOVERS_MAX_TOP
+from .transforms import parse_transform, series_transformer
+from .expressions import expression_engine, ExpressionError
+from .correlation_service import correlation_service, DEFAULT_TOP as CORRELATION_DEFAULT_TOP, TOP_K as CORRELATION_TOP_K
+from .correlation_kernel import METHODS as CORRELATION_METHODS
+from .product_table import FLOWS as PRODUCT_FLOWS, MAX_TOP as PRODUCTS_MAX_TOP
+from .panel_store import panel_store, COUNTRY_GROUPS, HOME_COUNTRY, MAX_PANEL_CODES
+from .vintages import describe_vintage, indicator_as_of, list_vintages, resolve_vintage
+from .series_format import LAYOUT_COLUMNAR, LAYOUT_RECORDS, filter_years, records_to_columnar, to_columnar
 from .models import UserProfile, QueryCache, Conversation, Message
 
+# Attente maximale (s) du calcul des corrélations par /api/correlations/<code>
+CORRELATION_WAIT = 30
+
 
 # Auto-create UserProfile on user creation
 @receiver(post_save, sender=User)
@@ -39,7 +62,16 @@ def home(request):
     return render(request, 'home_v2.html')
 
 def dashboard(request):
-    return render(request, 'dashboard_v3.html')
+    # KPIs + aperçu de l'onglet d'ouverture intégrés à la page : aucun appel API avant le premier rendu
+    try:
+        bootstrap = dashboard_service.get_bootstrap_script()
+    except Exception as e:
+        logger.error(f"Dashboard bootstrap error: {e}")
+        bootstrap = ''
+    return render(request, 'dashboard_v3.html', {
+        'dashboard_bootstrap': bootstrap,
+        'dashboard_tabs': DASHBOARD_TABS,
+    })
 
 def sectors(request):
     return render(request, 'sectors.html')
@@ -88,11 +120,13 @@ def setup_api_key_page(request):
 # API Views
 @csrf_exempt
 @api_view(['POST'])
+@renderer_classes(SERIES_RENDERER_CLASSES)
 def query_data(request):
     """
     Endpoint pour interpréter une requête utilisateur
     
     POST /api/query
+    POST /api/query?layout=columnar   (data: {years: [...], values: [...]})
     Body: {"query": "votre question"}
     """
     query = request.data.get('query', '').strip()
@@ -141,7 +175,7 @@ def query_data(request):
             from django.conf import settings as conf_settings
             anon_limit = getattr(conf_settings, 'ANONYMOUS_QUERIES_LIMIT', 2)
             response_data['remaining'] = anon_limit - request.session['anon_queries']
-        return Response(response_data)
+        return Response(_query_response_layout(request, response_data))
 
     # Vérifier le quota (utilisateurs connectés uniquement)
     if is_authenticated:
@@ -204,7 +238,14 @@ def query_data(request):
             pass
     
     result['query_hash'] = query_hash
-    return Response(result)
+    return Response(_query_response_layout(request, result))
+
+
+def _query_response_layout(request, result):
+    """Convertit la série d'une réponse de requête (stockée en records) au layout demandé."""
+    if _requested_layout(request) != LAYOUT_COLUMNAR or not isinstance(result.get('data'), list):
+        return result
+    return {**result, 'data': records_to_columnar(result['data'])}
 
 
 @api_view(['POST'])
@@ -269,12 +310,18 @@ def query_analysis(request):
 
 
 @api_view(['GET'])
+@authentication_classes([])
 def list_indicators(request):
     """
     Endpoint pour lister tous les indicateurs (Banque Mondiale + nationaux)
     
     GET /api/indicators
     """
+    search = request.GET.get('search', '').strip().lower()
+    if not search:
+        # Liste complète : corps pré-sérialisé (une fois par version des données)
+        return _preserialized_response(request, indicator_store.get_list())
+
     try:
         # World Bank indicators
         indicators = data_service.get_all_indicators()
@@ -283,14 +330,12 @@ def list_indicators(request):
         national_indicators = nds.get_all_indicators_for_explorer()
         indicators.extend(national_indicators)
         
-        # Filtrer par recherche si paramètre fourni
-        search = request.GET.get('search', '').strip().lower()
-        if search:
-            indicators = [
-                ind for ind in indicators 
-                if search in str(ind.get('name', '')).lower() or search in str(ind.get('code', '')).lower()
-                or search in str(ind.get('description', '')).lower()
-            ]
+        # Filtrer par recherche
+        indicators = [
+            ind for ind in indicators 
+            if search in str(ind.get('name', '')).lower() or search in str(ind.get('code', '')).lower()
+            or search in str(ind.get('description', '')).lower()
+        ]
         
         return Response({
             'success': True,
@@ -304,35 +349,196 @@ def list_indicators(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _resolve_indicator(code, layout=LAYOUT_RECORDS):
+    """Résout un code national (NAT.xxx) ou Banque Mondiale vers son détail complet."""
+    indicator = None
+
+    # Try national indicator first if code starts with NAT.
+    if code.startswith('NAT.'):
+        indicator = nds.get_indicator_detail_by_code(code, layout=layout)
+
+    # Fallback to World Bank data
+    if indicator is None:
+        indicator = data_service.get_indicator_detail(code, layout=layout)
+
+    return indicator
+
+
+def _preserialized_response(request, body):
+    """Renvoie des octets JSON déjà sérialisés, sans repasser par le renderer."""
+    return HttpResponse(body, content_type=request.accepted_renderer.media_type)
+
+
+def _requested_layout(request):
+    """
+    Disposition des séries demandée : ?layout=columnar, implicite pour les
+    formats binaires (MessagePack, Arrow) ; records sinon.
+    """
+    renderer = getattr(request, 'accepted_renderer', None)
+    if renderer is not None and renderer.format in BINARY_FORMATS:
+        return LAYOUT_COLUMNAR
+    if request.GET.get('layout', '').strip().lower() == LAYOUT_COLUMNAR:
+        return LAYOUT_COLUMNAR
+    return LAYOUT_RECORDS
+
+
+def _parse_year_param(request, name):
+    """Lit un paramètre année optionnel (?from=2010). Lève ValueError si invalide."""
+    raw = request.GET.get(name, '').strip()
+    if not raw:
+        return None
+    return int(raw)
+
+
+def _parse_transform_param(request):
+    """Étapes de ?transform=... (None si absent). Lève ValueError si invalide."""
+    raw = request.GET.get('transform', '').strip()
+    if not raw:
+        return None
+    return parse_transform(raw)
+
+
+def _requested_vintage(request):
+    """Vintage de ?as_of= (None si absent). Lève ValueError si invalide ou antérieure à toute vintage."""
+    raw = request.GET.get('as_of', '').strip()
+    if not raw:
+        return None
+    vintage = resolve_vintage(raw)
+    if vintage is None:
+        raise ValueError(f'aucune vintage enregistrée au {raw}')
+    return vintage
+
+
+def _parse_freq_params(request):
+    """(fréquence, agrégation) de ?freq=Q&agg=sum (None si ?freq absent). Lève ValueError si invalide."""
+    freq = request.GET.get('freq', '').strip().upper()
+    agg = request.GET.get('agg', '').strip().lower() or None
+    if not freq:
+        if agg is not None:
+            raise ValueError('"agg" nécessite "freq"')
+        return None
+    if freq not in RESAMPLE_FREQS:
+        raise ValueError(f'fréquence inconnue "{freq}" (disponibles : {", ".join(RESAMPLE_FREQS)})')
+    if agg is not None and agg not in AGG_STRATEGIES:
+        raise ValueError(f'agrégation inconnue "{agg}" (disponibles : {", ".join(AGG_STRATEGIES)})')
+    return freq, agg
+
+
+MAX_BATCH_CODES = 100
+
+
+def _indicator_at_freq(request, code, freq, steps, layout):
+    """Réponse de /api/indicator/<code>?freq=... (séries ANStat ré-échantillonnées)."""
+    if steps is not None:
+        return Response({
+            'success': False,
+            'message': '"transform" ne s\'applique qu\'aux séries annuelles (sans "freq").'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if request.accepted_renderer.format == 'arrow':
+        return Response({
+            'success': False,
+            'message': 'Le format Arrow (table code, year, value) ne couvre que les séries annuelles.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if not code.startswith('NAT.anstat.'):
+        return Response({
+            'success': False,
+            'message': '"freq" est disponible uniquement pour les séries ANStat (NAT.anstat.*).'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        indicator = nds.get_indicator_detail_at_freq(code, *freq, layout=layout)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': f'Fréquence indisponible : {e}.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if indicator is None:
+        return Response({
+            'success': False,
+            'message': f'Indicateur {code} non trouvé.'
+        }, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        'success': True,
+        'indicator': indicator
+    })
+
+
 @api_view(['GET'])
+@authentication_classes([])
+@renderer_classes(SERIES_RENDERER_CLASSES)
 def indicator_detail(request, code):
     """
     Endpoint pour obtenir les détails d'un indicateur
     
     GET /api/indicator/<code>
+    GET /api/indicator/<code>?layout=columnar   (years: [...], values: [...])
+    GET /api/indicator/<code>?format=msgpack|arrow  (ou via l'en-tête Accept)
+    GET /api/indicator/<code>?transform=yoy | rebase=2015 | rolling_mean=3,yoy  (voir api/transforms.py)
+    GET /api/indicator/NAT.anstat.<theme>.<CODE>?freq=A|Q|M&agg=avg|sum|last  (observations ANStat d'origine)
+    GET /api/indicator/<code>?as_of=2025-06-30   (valeurs publiées à cette date, voir api/vintages.py)
     Supporte les codes Banque Mondiale (ex: NY.GDP.MKTP.CD) et nationaux (ex: NAT.tofe.recettes_fiscales)
     """
+    layout = _requested_layout(request)
+    try:
+        steps = _parse_transform_param(request)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': f'Paramètre "transform" invalide : {e}.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        freq = _parse_freq_params(request)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': f'Paramètre "freq" invalide : {e}.'
+        }, status=status.HTTP_400_BAD_REQUEST)
     try:
-        indicator = None
+        vintage = _requested_vintage(request)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': f'Paramètre "as_of" invalide : {e}.'
+        }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Try national indicator first if code starts with NAT.
-        if code.startswith('NAT.'):
-            indicator = nds.get_indicator_detail_by_code(code)
-        
-        # Fallback to World Bank data
-        if indicator is None:
-            indicator = data_service.get_indicator_detail(code)
+    if freq is not None:
+        if vintage is not None:
+            return Response({
+                'success': False,
+                'message': '"as_of" ne s\'applique qu\'aux séries annuelles (sans "freq").'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return _indicator_at_freq(request, code, freq, steps, layout)
+
+    if steps is None and vintage is None and request.accepted_renderer.format == 'json':
+        body = indicator_store.get_detail(code, layout)
+        if body is not None:
+            return _preserialized_response(request, body)
+
+    try:
+        indicator = _resolve_indicator(code, layout)
         
         if indicator is None:
             return Response({
                 'success': False,
                 'message': f'Indicateur {code} non trouvé.'
             }, status=status.HTTP_404_NOT_FOUND)
+
+        if vintage is not None:
+            indicator = indicator_as_of(indicator, code, vintage, layout, steps)
+        elif steps is not None:
+            indicator = series_transformer.apply(indicator, steps, layout)
         
-        return Response({
+        response = {
             'success': True,
             'indicator': indicator
-        })
+        }
+        if vintage is not None:
+            response['vintage'] = describe_vintage(vintage)
+        return Response(response)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': f'Transformation impossible : {e}.'
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             'success': False,
@@ -341,303 +547,458 @@ def indicator_detail(request, code):
 
 
 @api_view(['GET'])
+@authentication_classes([])
+@renderer_classes(SERIES_RENDERER_CLASSES)
+def indicators_batch(request):
+    """
+    Endpoint pour récupérer plusieurs indicateurs en une seule requête
+    (codes Banque Mondiale et nationaux mélangés).
+
+    GET /api/indicators/batch?codes=A,B,C&from=2010&to=2023&layout=aligned
+    - from / to : filtre optionnel sur les années
+    - layout=aligned : toutes les séries alignées sur un axe d'années commun
+      ({years: [...], indicators: {code: {..., values: [v|null, ...]}}})
+    - layout=columnar : chaque indicateur porte ses propres years / values
+    - format=msgpack|arrow (ou en-tête Accept) : encodage binaire, séries en colonnes
+    - transform=yoy,rebase=2015,... : transformation appliquée à chaque série (avant from / to)
+    - as_of=2025-06-30 (ou une version) : valeurs publiées à cette date (voir api/vintages.py)
+    """
+    codes = []
+    for c in request.GET.get('codes', '').split(','):
+        c = c.strip()
+        if c and c not in codes:
+            codes.append(c)
+
+    if not codes:
+        return Response({
+            'success': False,
+            'message': 'Paramètre "codes" manquant.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if len(codes) > MAX_BATCH_CODES:
+        return Response({
+            'success': False,
+            'message': f'Trop de codes demandés (maximum {MAX_BATCH_CODES}).'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        start_year = _parse_year_param(request, 'from')
+        end_year = _parse_year_param(request, 'to')
+    except ValueError:
+        return Response({
+            'success': False,
+            'message': 'Paramètres "from" / "to" invalides (années attendues).'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        steps = _parse_transform_param(request)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': f'Paramètre "transform" invalide : {e}.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        vintage = _requested_vintage(request)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': f'Paramètre "as_of" invalide : {e}.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    as_of = {'vintage': describe_vintage(vintage)} if vintage is not None else {}
+
+    aligned = request.GET.get('layout', '').strip().lower() == 'aligned'
+    # Les séries alignées se construisent depuis les colonnes, sans passer par les records
+    layout = LAYOUT_COLUMNAR if aligned else _requested_layout(request)
+
+    try:
+        indicators = {}
+        missing = []
+        for code in codes:
+            indicator = _resolve_indicator(code, layout)
+            if indicator is None:
+                missing.append(code)
+                continue
+            if vintage is not None:
+                indicator = indicator_as_of(indicator, code, vintage, layout, steps)
+            elif steps is not None:
+                indicator = series_transformer.apply(indicator, steps, layout)
+            indicators[code] = filter_years(indicator, start_year, end_year)
+
+        if aligned:
+            years = sorted({y for ind in indicators.values() for y in ind['years']})
+            for code, indicator in indicators.items():
+                by_year = dict(zip(indicator.pop('years'), indicator['values']))
+                indicators[code] = {**indicator, 'values': [by_year.get(y) for y in years]}
+            return Response({
+                'success': True,
+                'count': len(indicators),
+                'years': years,
+                'indicators': indicators,
+                'missing': missing,
+                **as_of,
+            })
+
+        return Response({
+            'success': True,
+            'count': len(indicators),
+            'indicators': indicators,
+            'missing': missing,
+            **as_of,
+        })
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': f'Transformation impossible : {e}.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': f'Erreur lors de la récupération des indicateurs: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@authentication_classes([])
+def year_snapshot(request, year):
+    """
+    Coupe transversale : la valeur de tous les indicateurs (Banque Mondiale,
+    nationaux, ANStat) pour une année, lue d'un bloc dans la matrice alignée.
+    
+    GET /api/snapshot/<year>
+    GET /api/snapshot/<year>?fallback=last   (à défaut, dernière valeur disponible ; `year` = année réelle)
+    GET /api/snapshot/<year>?source=wb|national|anstat
+    """
+    fallback = request.GET.get('fallback', '').strip().lower() or None
+    source = request.GET.get('source', '').strip().lower() or None
+    if (fallback is not None and fallback not in SNAPSHOT_FALLBACKS) \
+            or (source is not None and source not in MATRIX_SOURCES):
+        return Response({
+            'success': False,
+            'message': f'Paramètres invalides (fallback: {", ".join(SNAPSHOT_FALLBACKS)} ; '
+                       f'source: {", ".join(MATRIX_SOURCES)}).'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        return _preserialized_response(request, series_matrix.get_snapshot_body(year, fallback, source))
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': f'Erreur lors du calcul de la coupe annuelle: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@authentication_classes([])
+def movers(request):
+    """
+    Indicateurs qui ont le plus bougé : plus fortes hausses / baisses et variations
+    les plus inhabituelles (z-score), sur toutes les séries à jour.
+    
+    GET /api/movers?window=1&source=wb|national|anstat&top=10
+    - window : 1 (variation sur un an, défaut), 5 ou 10 (TCAM sur la période)
+    - top : nombre d'indicateurs par classement (maximum 100)
+    """
+    source = request.GET.get('source', '').strip().lower() or None
+    try:
+        window = int(request.GET.get('window', '1').strip() or 1)
+        top = int(request.GET.get('top', str(MOVERS_DEFAULT_TOP)).strip() or MOVERS_DEFAULT_TOP)
+    except ValueError:
+        window = top = None
+    if window not in MOVERS_WINDOWS or top is None or not 1 <= top <= MOVERS_MAX_TOP \
+            or (source is not None and source not in MATRIX_SOURCES):
+        return Response({
+            'success': False,
+            'message': f'Paramètres invalides (window: {", ".join(map(str, MOVERS_WINDOWS))} ; '
+                       f'top: 1 à {MOVERS_MAX_TOP} ; source: {", ".join(MATRIX_SOURCES)}).'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        return _preserialized_response(request, movers_service.get_movers_body(window, source, top))
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': f'Erreur lors du calcul du classement: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@authentication_classes([])
+def compute_expression(request):
+    """
+    Évalue une expression sur les indicateurs (voir api/expressions.py) :
+    résultat numérique, ou série alignée par année.
+    
+    GET /api/compute?expr=NAT.tofe.recettes_fiscales / NAT.base_eco.pib_nominal_mxof * 100
+    GET /api/compute?expr=cagr(NY.GDP.MKTP.CD, 2010, 2023)
+    - from / to : restreint une série résultat à une période
+    """
+    try:
+        start_year = _parse_year_param(request, 'from')
+        end_year = _parse_year_param(request, 'to')
+    except ValueError:
+        return Response({
+            'success': False,
+            'message': 'Paramètres "from" / "to" invalides (années attendues).'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        result = expression_engine.evaluate(request.GET.get('expr', ''))
+    except ExpressionError as e:
+        return Response({
+            'success': False,
+            'message': f'Expression invalide : {e}.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            'success': False,
+            'message': f'Erreur lors du calcul: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    if result['kind'] == 'series':
+        result = filter_years(result, start_year, end_year)
+    return Response({'success': True, **result})
+
+
+@api_view(['GET'])
+@authentication_classes([])
+def indicator_correlations(request, code):
+    """
+    Séries les plus corrélées à un indicateur (années communes uniquement),
+    précalculées au chargement des données.
+    
+    GET /api/correlations/<code>?method=pearson|spearman&top=10&source=wb|national|anstat
+    """
+    method = request.GET.get('method', 'pearson').strip().lower()
+    source = request.GET.get('source', '').strip().lower() or None
+    try:
+        top = int(request.GET.get('top', str(CORRELATION_DEFAULT_TOP)).strip() or CORRELATION_DEFAULT_TOP)
+    except ValueError:
+        top = None
+    if method not in CORRELATION_METHODS or top is None or not 1 <= top <= CORRELATION_TOP_K \
+            or (source is not None and source not in MATRIX_SOURCES):
+        return Response({
+            'success': False,
+            'message': f'Paramètres invalides (method: {", ".join(CORRELATION_METHODS)} ; '
+                       f'top: 1 à {CORRELATION_TOP_K} ; source: {", ".join(MATRIX_SOURCES)}).'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if not correlation_service.wait(CORRELATION_WAIT):
+        response = Response({
+            'success': False,
+            'message': 'Les corrélations sont en cours de calcul, réessayez dans quelques instants.'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = '10'
+        return response
+
+    partners = correlation_service.get_partners(code, method, top, source)
+    if partners is None:
+        return Response({
+            'success': False,
+            'message': f'Indicateur {code} non trouvé.'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({
+        'success': True,
+        'code': code,
+        'method': method,
+        'count': len(partners),
+        'correlations': partners,
+    })
+
+
+@api_view(['GET'])
+@authentication_classes([])
+def top_products(request):
+    """
+    Classement des produits exportés ou importés (douanes.xlsx, toutes les lignes des
+    feuilles produits), pour une année ou une période, avec le code stable de chaque produit.
+    
+    GET /api/douanes/top?flow=export|import&k=10
+    GET /api/douanes/top?flow=export&year=2022
+    GET /api/douanes/top?flow=import&from=2019&to=2023   (somme des années de la période)
+    """
+    flow = request.GET.get('flow', 'export').strip().lower()
+    try:
+        k = int(request.GET.get('k', str(TOP_PRODUCTS)).strip() or TOP_PRODUCTS)
+        year = _parse_year_param(request, 'year')
+        start_year = _parse_year_param(request, 'from')
+        end_year = _parse_year_param(request, 'to')
+    except ValueError:
+        k = None
+    if flow not in PRODUCT_FLOWS or k is None or not 1 <= k <= PRODUCTS_MAX_TOP:
+        return Response({
+            'success': False,
+            'message': f'Paramètres invalides (flow: {", ".join(PRODUCT_FLOWS)} ; '
+                       f'k: 1 à {PRODUCTS_MAX_TOP} ; year / from / to : années).'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        ranking = nds.get_top_products(flow, k, year, start_year, end_year)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': f'Période invalide : {e}.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if ranking is None:
+        return Response({
+            'success': False,
+            'message': 'Produits des douanes non disponibles.'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({'success': True, **ranking})
+
+
+@api_view(['GET'])
+@authentication_classes([])
+def panel_compare(request):
+    """
+    Comparaison d'indicateurs Banque Mondiale entre pays (data.xlsx et panel/*.xlsx),
+    sur un axe d'années commun : values[pays] alignée sur years (null si absente).
+    Pays : codes ISO3, noms, ou groupes UEMOA / CEDEAO ; sans ?countries=, tous les
+    pays couverts.
+    
+    GET /api/panel?codes=NY.GDP.PCAP.CD&countries=CIV,SEN,GHA
+    GET /api/panel?codes=NY.GDP.MKTP.KD.ZG,FP.CPI.TOTL.ZG&countries=UEMOA&from=2010&to=2023
+    """
+    codes = [c.strip() for c in request.GET.get('codes', '').split(',') if c.strip()]
+    countries = [c for c in request.GET.get('countries', '').split(',') if c.strip()] or None
+    try:
+        start_year = _parse_year_param(request, 'from')
+        end_year = _parse_year_param(request, 'to')
+    except ValueError:
+        codes = []
+    if not codes or len(codes) > MAX_PANEL_CODES:
+        return Response({
+            'success': False,
+            'message': f'Paramètres invalides (codes : 1 à {MAX_PANEL_CODES} codes séparés par des virgules ; '
+                       f'countries : ISO3 ou {", ".join(COUNTRY_GROUPS)} ; from / to : années).'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        comparison = panel_store.compare(codes, countries, start_year, end_year)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': f'Pays invalide : {e}.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if not comparison['indicators']:
+        return Response({
+            'success': False,
+            'message': f'Aucun indicateur trouvé parmi : {", ".join(codes)}.'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({'success': True, 'home': HOME_COUNTRY, **comparison})
+
+
+@api_view(['GET'])
+@authentication_classes([])
+def vintages(request):
+    """
+    Vintages enregistrées (une par version des données), de la plus récente à la plus
+    ancienne, avec le nombre de cellules ajoutées / modifiées / retirées ; leur version
+    ou leur date s'utilisent dans ?as_of= des endpoints de séries.
+    
+    GET /api/vintages
+    """
+    items = list_vintages()
+    return Response({'success': True, 'count': len(items), 'vintages': items})
+
+
+@api_view(['GET'])
+@authentication_classes([])
+def data_manifest(request):
+    """
+    Manifeste versionné pour le cache navigateur (IndexedDB, voir static/js/data-cache.js) :
+    version des données + empreinte de la liste, de chaque indicateur et de chaque
+    section du dashboard. Le client ne re-télécharge que les entrées modifiées.
+    
+    GET /api/manifest
+    """
+    return _preserialized_response(request, indicator_store.get_manifest())
+
+
+@api_view(['GET'])
+@authentication_classes([])
 def dashboard_data(request):
     """
     Endpoint pour alimenter les dashboards avec les données réelles de la BDD.
+    Le payload est précalculé une fois par version des données et servi pré-compressé
+    (br/gzip) avec ETag/Last-Modified : un client à jour reçoit un 304.
     
     GET /api/dashboard-data
+    GET /api/dashboard-data?sections=kpis,macro,tofe,anstat.monetary  (payload partiel)
     """
-    def get_series(code, n_last=10):
-        """Retourne les n dernières valeurs d'un indicateur."""
-        detail = data_service.get_indicator_detail(code)
-        if not detail or not detail.get('values'):
-            return {'years': [], 'values': [], 'name': code}
-        vals = detail['values'][-n_last:] if len(detail['values']) > n_last else detail['values']
-        return {
-            'years': [v['year'] for v in vals],
-            'values': [round(v['value'], 4) for v in vals],
-            'name': detail['name'],
-        }
+    requested = [s.strip() for s in request.GET.get('sections', '').split(',') if s.strip()]
+    try:
+        sections = dashboard_service.normalize_sections(requested)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': f'Section(s) inconnue(s): {e}',
+            'sections': DASHBOARD_SECTIONS,
+        }, status=status.HTTP_400_BAD_REQUEST)
 
-    def latest(code):
-        """Retourne la dernière valeur connue d'un indicateur."""
-        detail = data_service.get_indicator_detail(code)
-        if not detail or not detail.get('values'):
-            return {'year': None, 'value': None}
-        v = detail['values'][-1]
-        return {'year': v['year'], 'value': round(v['value'], 4)}
-
-    def prev(code):
-        """Retourne l'avant-dernière valeur connue."""
-        detail = data_service.get_indicator_detail(code)
-        if not detail or not detail.get('values') or len(detail['values']) < 2:
-            return {'year': None, 'value': None}
-        v = detail['values'][-2]
-        return {'year': v['year'], 'value': round(v['value'], 4)}
-
-    # --- KPIs ---
-    gdp = latest('NY.GDP.MKTP.CD')
-    gdp_prev = prev('NY.GDP.MKTP.CD')
-    gdp_growth = latest('NY.GDP.MKTP.KD.ZG')
-    inflation = latest('FP.CPI.TOTL.ZG')
-    inflation_prev = prev('FP.CPI.TOTL.ZG')
-    pop = latest('SP.POP.TOTL')
-    pop_growth = latest('SP.POP.GROW')
-    life_exp = latest('SP.DYN.LE00.IN')
-    life_exp_prev = prev('SP.DYN.LE00.IN')
-    unemp = latest('SL.UEM.TOTL.ZS')
-
-    kpis = {
-        'gdp': {
-            'value': f"${gdp['value']/1e9:.1f} Mrd" if gdp['value'] else 'N/A',
-            'year': gdp['year'],
-            'trend': f"+{gdp_growth['value']:.1f}% vs n-1" if gdp_growth['value'] and gdp_growth['value'] > 0 else f"{gdp_growth['value']:.1f}% vs n-1" if gdp_growth['value'] else '',
-            'dir': 'up' if gdp_growth['value'] and gdp_growth['value'] > 0 else 'down',
-        },
-        'inflation': {
-            'value': f"{inflation['value']:.1f}%" if inflation['value'] else 'N/A',
-            'year': inflation['year'],
-            'trend': 'En baisse' if inflation_prev['value'] and inflation['value'] and inflation['value'] < inflation_prev['value'] else 'En hausse',
-            'dir': 'up' if inflation_prev['value'] and inflation['value'] and inflation['value'] < inflation_prev['value'] else 'down',
-        },
-        'pop': {
-            'value': f"{pop['value']/1e6:.1f} M" if pop['value'] else 'N/A',
-            'year': pop['year'],
-            'trend': f"+{pop_growth['value']:.1f}% an" if pop_growth['value'] else '',
-            'dir': 'neutral',
-        },
-        'life': {
-            'value': f"{life_exp['value']:.1f} Ans" if life_exp['value'] else 'N/A',
-            'year': life_exp['year'],
-            'trend': f"+{life_exp['value'] - life_exp_prev['value']:.1f}" if life_exp['value'] and life_exp_prev['value'] else '',
-            'dir': 'up' if life_exp['value'] and life_exp_prev['value'] and life_exp['value'] > life_exp_prev['value'] else 'neutral',
-        },
-        'unemp': {
-            'value': f"{unemp['value']:.1f}%" if unemp['value'] else 'N/A',
-            'year': unemp['year'],
-            'trend': 'Au sens BIT',
-            'dir': 'neutral',
-        },
-    }
-
-    # --- Séries temporelles pour les graphiques ---
-    series_data = {
-        # Macro
-        'gdp_nominal': get_series('NY.GDP.MKTP.CD', 10),
-        'gdp_growth': get_series('NY.GDP.MKTP.KD.ZG', 10),
-        'gdp_per_capita': get_series('NY.GDP.PCAP.CD', 10),
-        'inflation': get_series('FP.CPI.TOTL.ZG', 10),
-        'exports_pct': get_series('NE.EXP.GNFS.ZS', 10),
-        'imports_pct': get_series('NE.IMP.GNFS.ZS', 10),
-        'fdi_pct': get_series('BX.KLT.DINV.WD.GD.ZS', 10),
-        # Demographie
-        'population': get_series('SP.POP.TOTL', 10),
-        'pop_growth': get_series('SP.POP.GROW', 10),
-        'urban_pct': get_series('SP.URB.TOTL.IN.ZS', 10),
-        'fertility': get_series('SP.DYN.TFRT.IN', 10),
-        'birth_rate': get_series('SP.DYN.CBRT.IN', 10),
-        'death_rate': get_series('SP.DYN.CDRT.IN', 10),
-        # Sante
-        'life_expectancy': get_series('SP.DYN.LE00.IN', 10),
-        'infant_mortality': get_series('SP.DYN.IMRT.IN', 10),
-        'health_expenditure': get_series('SH.XPD.CHEX.GD.ZS', 10),
-        'physicians': get_series('SH.MED.PHYS.ZS', 10),
-        # Education
-        'primary_enroll': get_series('SE.PRM.ENRR', 10),
-        'secondary_enroll': get_series('SE.SEC.ENRR', 10),
-        'tertiary_enroll': get_series('SE.TER.ENRR', 10),
-        'literacy': get_series('SE.ADT.LITR.ZS', 10),
-        # Emploi
-        'unemployment': get_series('SL.UEM.TOTL.ZS', 10),
-        'labor_force': get_series('SL.TLF.TOTL.IN', 10),
-        # Infrastructure
-        'electricity_access': get_series('EG.ELC.ACCS.ZS', 10),
-        'electricity_consumption': get_series('EG.USE.ELEC.KH.PC', 10),
-        'internet_users': get_series('IT.NET.USER.ZS', 10),
-        'mobile_subscriptions': get_series('IT.CEL.SETS.P2', 10),
-        # Environnement
-        'forest_pct': get_series('AG.LND.FRST.ZS', 10),
-        'arable_land_pct': get_series('AG.LND.ARBL.ZS', 10),
-        # Pauvreté
-        'poverty': get_series('SI.POV.NAHC', 10),
-        'gini': get_series('SI.POV.GINI', 10),
-    }
-
-    # --- Données nationales (TOFE, Douanes, Base Éco, Financements) ---
-    def ns(source, key):
-        """Retourne une série nationale {years, values, name}."""
-        s = nds.get_series(source, key)
-        return {'years': s.get('years', []), 'values': s.get('values', []), 'name': s.get('name', key)}
-
-    national_data = {
-        # Structure PIB par secteur (% du PIB)
-        'pib_primaire_pct': ns('base_eco', 'pib_primaire_pct'),
-        'pib_secondaire_pct': ns('base_eco', 'pib_secondaire_pct'),
-        'pib_tertiaire_pct': ns('base_eco', 'pib_tertiaire_pct'),
-        'pib_manufacturier_pct': ns('base_eco', 'pib_manufacturier_pct'),
-        'pib_btp_pct': ns('base_eco', 'pib_btp_pct'),
-        'pib_extractives_pct': ns('base_eco', 'pib_extractives_pct'),
-        'pib_commerce_pct': ns('base_eco', 'pib_commerce_pct'),
-        'pib_transports_pct': ns('base_eco', 'pib_transports_pct'),
-        # Dette publique
-        'dette_pct_pib': ns('base_eco', 'dette_pct_pib'),
-        'dette_stock_total': ns('base_eco', 'dette_stock_total'),
-        'dette_exterieure_mds': ns('base_eco', 'dette_exterieure_mds'),
-        'dette_interieure_mds': ns('base_eco', 'dette_interieure_mds'),
-        # Ratios dette (financements)
-        'dette_pct_pib_fin': ns('financements', 'dette_pct_pib'),
-        'interets_pct_recettes': ns('financements', 'interets_pct_recettes'),
-        'interets_pct_pib': ns('financements', 'interets_pct_pib'),
-        'taux_interet_moyen': ns('financements', 'taux_interet_moyen'),
-        'duree_vie_moyenne': ns('financements', 'duree_vie_moyenne'),
-        'dette_ct_pct': ns('financements', 'dette_ct_pct'),
-        'dette_devises_pct': ns('financements', 'dette_devises_pct'),
-        'service_dette_total': ns('financements', 'service_dette_total'),
-        'remboursement_principal': ns('financements', 'remboursement_principal'),
-        'paiement_interets': ns('financements', 'paiement_interets'),
-        # TOFE
-        'recettes_et_dons': ns('tofe', 'recettes_et_dons'),
-        'recettes_fiscales': ns('tofe', 'recettes_fiscales'),
-        'depenses_totales': ns('tofe', 'depenses_totales'),
-        'solde_budgetaire': ns('tofe', 'solde_budgetaire'),
-        'depenses_investissement': ns('tofe', 'depenses_investissement'),
-        'remuneration_salaries': ns('tofe', 'remuneration_salaries'),
-        'interets_dette': ns('tofe', 'interets_dette'),
-        'dons': ns('tofe', 'dons'),
-        'impots_directs': ns('tofe', 'impots_directs'),
-        'impots_biens_services': ns('tofe', 'impots_biens_services'),
-        'droits_importation': ns('tofe', 'droits_importation'),
-        'taxes_exportation': ns('tofe', 'taxes_exportation'),
-        'subventions_transferts': ns('tofe', 'subventions_transferts'),
-        'depenses_fonctionnement': ns('tofe', 'depenses_fonctionnement'),
-        'financement_interieur': ns('tofe', 'financement_interieur'),
-        'financement_exterieur': ns('tofe', 'financement_exterieur'),
-        # Financements - service dette ext par créancier
-        'service_ext_bilateral': ns('financements', 'service_ext_bilateral'),
-        'service_ext_multilateral': ns('financements', 'service_ext_multilateral'),
-        'service_ext_obligations': ns('financements', 'service_ext_obligations'),
-        # Pression fiscale & solde calculés
-        'pression_fiscale': nds.get_pression_fiscale(),
-        'solde_budgetaire_pct_pib': nds.get_solde_budgetaire_pct_pib(),
-        # Commerce extérieur (Douanes)
-        'imports_caf': ns('douanes', 'imports_caf'),
-        'exports_fob': ns('douanes', 'exports_fob'),
-        'solde_commercial': ns('douanes', 'solde_commercial'),
-        'taux_couverture': ns('douanes', 'taux_couverture'),
-        'export_europe': ns('douanes', 'export_europe'),
-        'export_afrique': ns('douanes', 'export_afrique'),
-        'export_asie': ns('douanes', 'export_asie'),
-        'export_amerique': ns('douanes', 'export_amerique'),
-        'export_agri_industrielle': ns('douanes', 'export_agri_industrielle'),
-        'export_premiere_transfo': ns('douanes', 'export_premiere_transfo'),
-        'export_manufactures': ns('douanes', 'export_manufactures'),
-        'export_miniers': ns('douanes', 'export_miniers'),
-        'recettes_douanieres_brutes': ns('douanes', 'recettes_brutes'),
-        # Agro-industrie
-        'cacao_production': ns('base_eco', 'cacao_production'),
-        'cacao_transforme': ns('base_eco', 'cacao_transforme'),
-        'cacao_taux_transfo': ns('base_eco', 'cacao_taux_transfo'),
-        # PIB & investissement
-        'pib_nominal_mxof': ns('base_eco', 'pib_nominal_mxof'),
-        'croissance_pib_reel': ns('base_eco', 'croissance_pib_reel'),
-        'taux_investissement': ns('base_eco', 'taux_investissement'),
-        'ide_total_mds': ns('base_eco', 'ide_total_mds'),
-        # Emploi par secteur
-        'emploi_primaire': ns('base_eco', 'emploi_primaire'),
-        'emploi_secondaire': ns('base_eco', 'emploi_secondaire'),
-        'emploi_tertiaire': ns('base_eco', 'emploi_tertiaire'),
-        'emploi_total': ns('base_eco', 'emploi_total'),
-    }
-
-    # Top produits exportés/importés
-    for i in range(10):
-        key_exp = f'top_export_{i}'
-        key_imp = f'top_import_{i}'
-        s_exp = nds.get_series('douanes', key_exp)
-        s_imp = nds.get_series('douanes', key_imp)
-        if s_exp.get('values'):
-            national_data[key_exp] = {'years': s_exp['years'], 'values': s_exp['values'], 'name': s_exp['name']}
-        if s_imp.get('values'):
-            national_data[key_imp] = {'years': s_imp['years'], 'values': s_imp['values'], 'name': s_imp['name']}
-
-    # --- ANStat SDMX data ---
-    def ans(key):
-        """Retourne une série ANStat {years, values, name}."""
-        s = anstat.get_series(key)
-        return {'years': s.get('years', []), 'values': s.get('values', []), 'name': s.get('name', key)}
-
-    anstat_data = {
-        # Production industrielle
-        'ipi_total': ans('production.AIP_IX'),
-        'ipi_food': ans('production.AIP_ISIC4_C10_IX'),
-        'ipi_mining': ans('production.AIP_ISIC4_B07_IX'),
-        'ipi_refinery': ans('production.AIP_ISIC4_C19_IX'),
-        # Prix à la production
-        'ippi_total': ans('ipp.PPPI_IX'),
-        # Prix à la consommation
-        'ipc_global': ans('ipc.PCPI_IX'),
-        'ipc_food': ans('ipc.PCPI_CP_01_IX'),
-        'ipc_transport': ans('ipc.PCPI_CP_07_IX'),
-        # Monétaire
-        'base_monetaire': ans('banque_centrale.FASMB_XDC'),
-        'masse_monetaire_m2': ans('institutions_depot.FDSB_XDC'),
-        'credit_economie': ans('institutions_depot.FDSAO_XDC'),
-        'actifs_ext_nets_bc': ans('banque_centrale.FASF_XDC'),
-        'creances_etat_bc': ans('banque_centrale.FASG_XDC'),
-        # Taux d'intérêt
-        'taux_directeur': ans('taux_interet.FPOLM_MIN_PA'),
-        'taux_pret_marginal': ans('taux_interet.FPOLM_MAR_PA'),
-        'taux_debiteur': ans('taux_interet.FILR_PA'),
-        'taux_crediteur': ans('taux_interet.FIDR_PA'),
-        # Taux de change
-        'taux_change_usd_avg': ans('taux_change.ENDA_XDC_USD_RATE'),
-        'taux_change_usd_end': ans('taux_change.ENDE_XDC_USD_RATE'),
-        # Réserves
-        'reserves_officielles': ans('reserves.MAU_RAFA_XDC'),
-        # Balance des paiements
-        'compte_courant_bdp': ans('balance_paiements.BCA_BP6_XDC'),
-        'balance_biens_bdp': ans('balance_paiements.BG_BP6_XDC'),
-        'exports_biens_bdp': ans('balance_paiements.BXG_BP6_XDC'),
-        'imports_biens_bdp': ans('balance_paiements.BMG_BP6_XDC'),
-        'ide_nets_bdp': ans('balance_paiements.BFDA_BP6_XDC'),
-        # Dette extérieure
-        'dette_ext_brute': ans('dette_ext.D_BP6_XDC'),
-        'dette_ext_admin': ans('dette_ext.DG_BP6_XDC'),
-        # Population ANStat
-        'pop_anstat_total': ans('population.P3'),
-        'pop_anstat_homme': ans('population.P1'),
-        'pop_anstat_femme': ans('population.P2'),
-        # Social
-        'scolarisation_primaire': ans('social.I3'),
-        'scolarisation_secondaire': ans('social.I2'),
-        'esperance_vie_anstat': ans('social.I9'),
-        'mortalite_infantile_anstat': ans('social.I16'),
-        'taux_croissance_demo': ans('social.I7'),
-        'fecondite_anstat': ans('social.I12'),
-        'taux_natalite': ans('social.I14'),
-        'taux_mortalite': ans('social.I15'),
-        # Emploi
-        'immatriculations_cnps': ans('emploi.LENE_VS_PE_NUM'),
-        'immatriculations_cgreae': ans('emploi.LENE_PS_PE_NUM'),
-        # TOFE SDMX (séries mensuelles agrégées à l'année, plus longues que TOFE Excel)
-        'tofe_sdmx_recettes': ans('tofe_sdmx.CIV_CGO_R_XDC'),
-        'tofe_sdmx_recettes_fiscales': ans('tofe_sdmx.CIV_CGO_RF_XDC'),
-        'tofe_sdmx_depenses': ans('tofe_sdmx.CIV_CGO_DL_XDC'),
-        'tofe_sdmx_solde': ans('tofe_sdmx.CIV_CGO_SB_XDC'),
-        'tofe_sdmx_solde_pib': ans('tofe_sdmx.CIV_CGO_SB_GDP'),
-        'tofe_sdmx_investissement': ans('tofe_sdmx.CIV_CGO_DI_XDC'),
-        'tofe_sdmx_personnel': ans('tofe_sdmx.CIV_CGO_DCP_XDC'),
-        'tofe_sdmx_interets': ans('tofe_sdmx.CIV_CGO_IDP_XDC'),
-        'tofe_sdmx_dgi': ans('tofe_sdmx.CIV_CGO_RFI_XDC'),
-        'tofe_sdmx_dgd': ans('tofe_sdmx.CIV_CGO_RFC_XDC'),
-    }
+    return precompressed_response(request, dashboard_service.get_payload(sections))
 
-    return Response({
-        'kpis': kpis,
-        'series': series_data,
-        'national': national_data,
-        'anstat': anstat_data,
-    })
+
+def export_data(request):
+    """
+    Export CSV / XLSX streamé d'un ensemble d'indicateurs (vue Django simple : le
+    corps est produit au fil de l'eau, sans passer par un renderer DRF).
+    
+    GET /api/export?codes=A,B,C&from=2010&to=2023&format=csv
+    GET /api/export?search=pib&source=wb&format=xlsx&layout=long
+    - codes : liste explicite ; sinon tous les indicateurs, filtrés par search / source (wb|national)
+    - format : csv (défaut) ou xlsx
+    - layout : wide (une ligne par indicateur, une colonne par année, défaut) ou long (code, année, valeur)
+    """
+    if request.method != 'GET':
+        return JsonResponse({'success': False, 'message': 'Méthode non autorisée.'}, status=405)
+
+    codes = []
+    for c in request.GET.get('codes', '').split(','):
+        c = c.strip()
+        if c and c not in codes:
+            codes.append(c)
+    search = request.GET.get('search', '').strip()
+    source = request.GET.get('source', '').strip().lower() or None
+    export_format = request.GET.get('format', 'csv').strip().lower()
+    layout = request.GET.get('layout', 'wide').strip().lower()
+
+    if export_format not in EXPORT_FORMATS or layout not in EXPORT_LAYOUTS \
+            or (source is not None and source not in EXPORT_SOURCES):
+        return JsonResponse({
+            'success': False,
+            'message': f'Paramètres invalides (format: {", ".join(EXPORT_FORMATS)} ; '
+                       f'layout: {", ".join(EXPORT_LAYOUTS)} ; source: {", ".join(EXPORT_SOURCES)}).'
+        }, status=400)
+
+    try:
+        start_year = _parse_year_param(request, 'from')
+        end_year = _parse_year_param(request, 'to')
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'message': 'Paramètres "from" / "to" invalides (années attendues).'
+        }, status=400)
+
+    codes = resolve_export_codes(codes=codes, search=search, source=source)
+    if not codes:
+        return JsonResponse({'success': False, 'message': 'Aucun indicateur à exporter.'}, status=404)
+
+    rows = iter_export_rows(codes, layout=layout, start_year=start_year, end_year=end_year)
+    filename = f"askfordata_export_{timezone.now():%Y%m%d}.{export_format}"
+
+    if export_format == 'xlsx':
+        return FileResponse(
+            write_xlsx(rows), as_attachment=True, filename=filename,
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+
+    response = StreamingHttpResponse(stream_csv(rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 
 @api_view(['GET'])
@@ -697,6 +1058,7 @@ def submit_feedback(request):
 
 
 @api_view(['GET'])
+@authentication_classes([])
 def suggest_indicators(request):
     """
     Endpoint pour l'autocomplétion
@@ -722,7 +1084,8 @@ def suggest_indicators(request):
         # Limiter à 10 résultats pour l'autocomplétion
         return Response({'suggestions': merged[:10]})
     except Exception as e:
-        return Response({'suggestions': [], 'error': str(e)})
+        return Response({'suggestions': [], 'error': str(e)},
+                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @csrf_exempt
@@ -837,11 +1200,13 @@ def user_status(request):
 
 @csrf_exempt
 @api_view(['POST'])
+@renderer_classes(SERIES_RENDERER_CLASSES)
 def chat_send(request):
     """
     Send a message in a conversation. Creates conversation if needed.
     
     POST /api/chat/send
+    POST /api/chat/send?layout=columnar  (data_contexts with years / values columns)
     Body: {"message": "...", "conversation_id": null|int}
     """
     if not request.user.is_authenticated:
@@ -925,7 +1290,10 @@ def chat_send(request):
             'id': ai_message.id,
             'role': 'assistant',
             'content': result['content'],
-            'data_contexts': data_contexts,
+            'data_contexts': (
+                [to_columnar(dc) for dc in data_contexts]
+                if _requested_layout(request) == LAYOUT_COLUMNAR else data_contexts
+            ),
         },
         'conversation_title': conversation.title,
         'remaining': quota['remaining'],
@@ -0,0 +1,155 @@
+"""
+Vintages des données : chaque version du jeu de données (voir dataset_version) est
+enregistrée par `python manage.py record_vintage`, sous forme de delta par rapport à la
+vintage précédente (cellules indicateur × année ajoutées, modifiées ou retirées ; voir
+les modèles DataVintage / VintageCell). Une révision ne coûte que les cellules changées.
+
+Une série telle qu'elle était publiée à une date (?as_of=) se reconstitue par une
+requête indexée (code, année, vintage) : pour chaque année, la dernière cellule
+enregistrée jusqu'à cette vintage. Rien n'est gardé en mémoire entre les requêtes.
+"""
+import logging
+from datetime import datetime, time
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .dataset_version import get_dataset_version
+from .models import DataVintage, VintageCell
+from .series_format import series_layout
+from .transforms import series_transformer
+
+logger = logging.getLogger('api')
+
+BATCH_SIZE = 5000
+
+
+def _current_cells(matrix):
+    """{(code, année): valeur} des cellules renseignées de la matrice des séries."""
+    matrix.ensure()
+    rows, cols = (~np.isnan(matrix.values)).nonzero()
+    years = matrix.years[cols].tolist()
+    values = matrix.values[rows, cols].tolist()
+    return {(matrix.codes[r], y): v for r, y, v in zip(rows.tolist(), years, values)}
+
+
+def _latest_cells():
+    """État reconstitué de la dernière vintage : {(code, année): valeur} (cellules retirées exclues)."""
+    state = {}
+    cells = VintageCell.objects.order_by('vintage_id').values_list('code', 'year', 'value')
+    for code, year, value in cells.iterator(chunk_size=BATCH_SIZE):
+        if value is None:
+            state.pop((code, year), None)
+        else:
+            state[(code, year)] = value
+    return state
+
+
+def record_vintage(matrix):
+    """
+    Enregistre la version courante des données comme vintage (delta par rapport à la
+    précédente). Retourne (vintage, créée) ; une version déjà enregistrée n'est pas dupliquée.
+    """
+    version = get_dataset_version()
+    existing = DataVintage.objects.filter(version=version['version']).first()
+    if existing is not None:
+        return existing, False
+
+    current = _current_cells(matrix)
+    previous = _latest_cells()
+    added = [(key, v) for key, v in current.items() if key not in previous]
+    changed = [(key, v) for key, v in current.items() if key in previous and previous[key] != v]
+    removed = [(key, None) for key in previous if key not in current]
+
+    with transaction.atomic():
+        vintage = DataVintage.objects.create(
+            version=version['version'],
+            files=version['files'],
+            cells_total=len(current),
+            cells_added=len(added),
+            cells_changed=len(changed),
+            cells_removed=len(removed),
+        )
+        VintageCell.objects.bulk_create(
+            (VintageCell(vintage=vintage, code=code, year=year, value=value)
+             for (code, year), value in added + changed + removed),
+            batch_size=BATCH_SIZE,
+        )
+    logger.info("✓ Vintage %s: %d cellules ajoutées, %d modifiées, %d retirées",
+                vintage.version, len(added), len(changed), len(removed))
+    return vintage, True
+
+
+def resolve_vintage(as_of):
+    """
+    Vintage en vigueur à `as_of` : identifiant de version, date (AAAA-MM-JJ, fin de
+    journée) ou date-heure ISO. None si aucune vintage n'était enregistrée à cette date ;
+    lève ValueError si `as_of` n'est ni une version ni une date.
+    """
+    vintage = DataVintage.objects.filter(version=as_of).first()
+    if vintage is not None:
+        return vintage
+    # Date seule d'abord : parse_datetime accepte aussi '2025-06-30' (minuit)
+    day = parse_date(as_of)
+    if day is not None:
+        moment = datetime.combine(day, time.max)
+    else:
+        moment = parse_datetime(as_of)
+        if moment is None:
+            raise ValueError(f'"{as_of}" n\'est ni une version ni une date (AAAA-MM-JJ)')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return DataVintage.objects.filter(recorded_at__lte=moment).order_by('-recorded_at').first()
+
+
+def describe_vintage(vintage):
+    """Version, date d'enregistrement et taille du delta d'une vintage."""
+    return {
+        'version': vintage.version,
+        'recorded_at': vintage.recorded_at.isoformat(),
+        'cells_total': vintage.cells_total,
+        'cells_added': vintage.cells_added,
+        'cells_changed': vintage.cells_changed,
+        'cells_removed': vintage.cells_removed,
+    }
+
+
+def list_vintages():
+    """Vintages enregistrées, de la plus récente à la plus ancienne."""
+    return [describe_vintage(v) for v in DataVintage.objects.all()]
+
+
+def series_as_of(code, vintage):
+    """(années, valeurs) de `code` telles que publiées dans `vintage`."""
+    cells = (VintageCell.objects
+             .filter(code=code, vintage_id__lte=vintage.id)
+             .order_by('year', '-vintage_id')
+             .values_list('year', 'value'))
+    years, values = [], []
+    last_year = None
+    for year, value in cells:
+        if year == last_year:
+            continue  # cellule plus ancienne d'une année déjà résolue
+        last_year = year
+        if value is not None:
+            years.append(year)
+            values.append(value)
+    return years, values
+
+
+def indicator_as_of(indicator, code, vintage, layout, steps=None):
+    """
+    Indicateur (détail courant) avec sa série telle que publiée dans `vintage` :
+    métadonnées courantes, valeurs de la vintage. Les étapes `steps` (?transform=)
+    s'appliquent à ces valeurs (et à la référence de share_of dans la même vintage).
+    """
+    if vintage.version == get_dataset_version()['version']:
+        return indicator if steps is None else series_transformer.apply(indicator, steps, layout)
+    years, values = series_as_of(code, vintage)
+    if steps is not None:
+        return series_transformer.apply(indicator, steps, layout, series=(years, values),
+                                        reference=lambda ref: series_as_of(ref, vintage))
+    series = {k: v for k, v in indicator.items() if k not in ('years', 'values')}
+    return {**series, **series_layout(years, values, layout)}
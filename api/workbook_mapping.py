@@ -0,0 +1,220 @@
+"""
+Moteur de lecture des classeurs nationaux à partir d'une spécification déclarative
+(voir national_workbooks.py).
+
+Chaque classeur est ouvert une seule fois (voir spreadsheet : calamine, ou openpyxl
+en lecture seule, lignes lues en flux, sans DataFrame) ; chaque feuille utile est parcourue
+une seule fois, jusqu'à la dernière ligne dont un tableau a besoin, et chaque ligne
+est confiée aux tableaux de la spécification qui la couvrent.
+
+Les règles d'un tableau (libellé → clé) sont compilées en une seule expression
+régulière : une alternative par règle, essayées dans l'ordre de la spécification
+(la première qui correspond l'emporte, comme une suite de if / elif).
+
+Spécification d'un tableau :
+- sheet : nom de la feuille, ou son rang (0 : première feuille) ;
+- header_row : ligne des années (indices à partir de 0, comme pd.read_excel(header=None)) ;
+- first_row / last_row : lignes de données [first_row, last_row) (défaut : après l'en-tête, jusqu'à la fin) ;
+- layout : 'rows' (chaque ligne est confrontée aux règles, dans l'ordre de la feuille)
+  ou 'table' (lignes regroupées par libellé avec leur niveau d'indentation, puis
+  confrontées aux règles) ;
+- lower : règles appliquées au libellé en minuscules ;
+- rules : [(mode, motif, clé)] ou [(mode, motif, clé, {'level': n})], mode parmi
+  'exact', 'prefix', 'contains' ; motif : une chaîne ou un tuple d'alternatives ;
+  clé : une clé, ou une liste de clés affectées aux occurrences successives du motif ;
+- collect : nom sous lequel le tableau complet (layout 'table') est renvoyé tel quel.
+"""
+import logging
+import math
+import re
+
+from .spreadsheet import open_workbook
+
+logger = logging.getLogger('api')
+
+LAYOUT_ROWS = 'rows'
+LAYOUT_TABLE = 'table'
+
+YEAR_MIN = 2000
+YEAR_MAX = 2030
+
+_MATCH_MODES = {
+    'exact': '(?={}\\Z)',
+    'prefix': '(?={})',
+    'contains': '(?=.*?{})',
+}
+# Le libellé est confronté aux règles sous la forme '<niveau>\t<libellé>'
+_LEVEL_PREFIX = '\\d+\\t'
+
+
+def _safe_float(val):
+    """Convertit une valeur en float, retourne None si impossible ou NaN/Inf."""
+    if val is None or val == '' or val == '-' or val == '…':
+        return None
+    try:
+        s = str(val).replace('\xa0', '').replace('\u202f', '').replace(' ', '').replace(',', '.')
+        f = float(s)
+        if math.isnan(f) or math.isinf(f):
+            return None
+        return round(f, 4)
+    except (ValueError, TypeError):
+        return None
+
+
+def _year_columns(header):
+    """(années, colonnes) d'une ligne d'en-tête (la première colonne porte les libellés)."""
+    years = []
+    cols = []
+    for col, val in enumerate(header):
+        if col == 0:
+            continue
+        y = _safe_float(val)
+        if y and YEAR_MIN <= y <= YEAR_MAX:
+            years.append(int(y))
+            cols.append(col)
+    return years, cols
+
+
+def _row_series(row, years, cols):
+    """(années, valeurs) renseignées d'une ligne."""
+    row_years = []
+    values = []
+    width = len(row)
+    for year, col in zip(years, cols):
+        v = _safe_float(row[col]) if col < width else None
+        if v is not None:
+            row_years.append(year)
+            values.append(v)
+    return row_years, values
+
+
+class Matcher:
+    """
+    Règles d'un tableau compilées en une expression régulière (une alternative par
+    règle) : matcher(libellé, niveau) → clé ou None. Une règle dont la clé est une
+    liste affecte ses clés aux occurrences successives du motif.
+    """
+
+    def __init__(self, rules):
+        alternatives = []
+        self.keys = []
+        for i, rule in enumerate(rules):
+            mode, pattern, key = rule[:3]
+            options = rule[3] if len(rule) > 3 else {}
+            template = _MATCH_MODES[mode]
+            patterns = pattern if isinstance(pattern, tuple) else (pattern,)
+            body = '|'.join(template.format(re.escape(p)) for p in patterns)
+            level = options.get('level')
+            prefix = _LEVEL_PREFIX if level is None else f'{int(level)}\\t'
+            alternatives.append(f'(?P<r{i}>{prefix}(?:{body}))')
+            self.keys.append(key)
+        self.regex = re.compile('|'.join(alternatives), re.DOTALL) if alternatives else None
+        self._seen = [0] * len(self.keys)
+
+    def __call__(self, label, level=0):
+        if self.regex is None:
+            return None
+        m = self.regex.match(f'{level}\t{label}')
+        if m is None:
+            return None
+        i = int(m.lastgroup[1:])
+        key = self.keys[i]
+        if isinstance(key, list):
+            n = self._seen[i]
+            self._seen[i] += 1
+            return key[n] if n < len(key) else None
+        return key
+
+
+class _TableReader:
+    """État de lecture d'un tableau pendant le parcours de sa feuille"""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.header_row = spec['header_row']
+        self.first_row = spec.get('first_row', self.header_row + 1)
+        self.last_row = spec.get('last_row')
+        self.layout = spec.get('layout', LAYOUT_TABLE)
+        self.lower = spec.get('lower', False)
+        self.matcher = Matcher(spec.get('rules', ()))
+        self.years = []
+        self.cols = []
+        self.table = {}
+
+    def covers(self, i):
+        return self.first_row <= i and (self.last_row is None or i < self.last_row)
+
+    def feed(self, i, row, store):
+        if i == self.header_row:
+            self.years, self.cols = _year_columns(row)
+            return
+        if not self.covers(i) or not self.years or not row:
+            return
+        raw = row[0]
+        if raw is None:
+            return
+        label = str(raw).strip()
+        if not label:
+            return
+        row_years, values = _row_series(row, self.years, self.cols)
+        if self.layout == LAYOUT_ROWS:
+            key = self.matcher(label.lower() if self.lower else label)
+            if key and values:
+                store[key] = {'years': row_years, 'values': values, 'name': label}
+        elif values:
+            raw = str(raw)
+            self.table[label] = {
+                'years': row_years,
+                'values': values,
+                'level': len(raw) - len(raw.lstrip()),  # 0 = total, >0 = sous-catégorie
+            }
+
+    def finish(self, store):
+        """Applique les règles aux lignes regroupées par libellé (layout 'table')."""
+        if self.layout != LAYOUT_TABLE:
+            return
+        for label, series in self.table.items():
+            key = self.matcher(label.lower() if self.lower else label, series['level'])
+            if key:
+                store[key] = {**series, 'name': label}
+
+
+def read_workbook(filepath, tables):
+    """
+    Lit les tableaux `tables` d'un classeur en un seul passage.
+    Retourne ({clé: série}, {nom: tableau collecté}).
+    """
+    store = {}
+    collected = {}
+    try:
+        wb = open_workbook(filepath)
+    except Exception as e:
+        logger.warning(f"Impossible de lire {filepath}: {e}")
+        return store, collected
+
+    try:
+        by_sheet = {}
+        for spec in tables:
+            by_sheet.setdefault(spec['sheet'], []).append(_TableReader(spec))
+
+        for sheet, readers in by_sheet.items():
+            ends = [r.last_row for r in readers]
+            try:
+                rows = wb.rows(sheet, max_row=None if None in ends else max(ends))
+            except (IndexError, KeyError):
+                logger.warning(f"Feuille introuvable: {filepath.name} / {sheet}")
+                continue
+            try:
+                for i, row in enumerate(rows):
+                    for reader in readers:
+                        reader.feed(i, row, store)
+                for reader in readers:
+                    reader.finish(store)
+                    if 'collect' in reader.spec:
+                        collected[reader.spec['collect']] = reader.table
+            except Exception as e:
+                logger.warning(f"Erreur lecture {filepath.name} / {sheet}: {e}")
+    finally:
+        wb.close()
+
+    return store, collected
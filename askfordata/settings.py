@@ -74,6 +74,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'api.middleware.DatasetCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'askfordata.urls'
@@ -99,12 +100,23 @@ WSGI_APPLICATION = 'askfordata.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# En production, DATABASE_URL (ex. postgres://...) désigne une base persistante : les
+# vintages des données (api/vintages.py) y sont conservées d'un déploiement à l'autre.
+# Sans elle, db.sqlite3 est recréé à chaque build sur un disque éphémère.
+DATABASE_URL = os.environ.get('DATABASE_URL', '').strip()
+
+if DATABASE_URL:
+    import dj_database_url
+    DATABASES = {
+        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600, conn_health_checks=True),
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
     }
-}
 
 
 # Password validation
@@ -145,10 +157,24 @@ STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'api' / 'static']
 
+# Variantes AVIF/WebP/JPEG générées par `manage.py build_responsive_images` (non versionnées)
+RESPONSIVE_IMAGES_ROOT = BASE_DIR / 'build' / 'static'
+if RESPONSIVE_IMAGES_ROOT.is_dir():
+    STATICFILES_DIRS.append(RESPONSIVE_IMAGES_ROOT)
+
 # WhiteNoise configuration
+# collectstatic produit des noms hashés (app.3f2a1c.js) + versions .gz/.br ;
+# WhiteNoise sert ces fichiers avec un cache d'un an (immutable).
 WHITENOISE_USE_FINDERS = True
 WHITENOISE_STATIC_ROOT = STATIC_ROOT
-STATICFILES_STORAGE = 'whitenoise.storage.StaticFilesStorage'
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -159,13 +185,50 @@ FERNET_KEY = os.environ.get('FERNET_KEY', '')
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.ORJSONRenderer',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'api.authentication.CsrfExemptSessionAuthentication',
     ],
 }
 
+# ─── Lecture des classeurs Excel (api/spreadsheet.py) ──
+# 'auto' : moteur le plus rapide mesuré par `manage.py benchmark_spreadsheet_engines`,
+# sinon python-calamine s'il est installé, sinon openpyxl ; ou 'calamine' / 'openpyxl'
+SPREADSHEET_ENGINE = os.environ.get('SPREADSHEET_ENGINE', 'auto')
+
+# ─── Corrélations entre séries (api/correlation_service.py) ──
+# Processus du pool de calcul, lancé une fois par version des données par `manage.py
+# build_partitions` (ou, sans instantané, par un seul worker ; 0 : calcul sans pool).
+# En deçà de PARALLEL_MIN_ROWS séries, le calcul se fait en série, plus rapide
+CORRELATION_WORKERS = int(os.environ.get('CORRELATION_WORKERS', min(4, os.cpu_count() or 1)))
+
+# ─── Cache HTTP des endpoints de lecture (nom d'URL → Cache-Control) ──
+# ETag fort / Last-Modified dérivés de la version des données (api/dataset_version.py) ;
+# s-maxage s'applique au CDN placé devant Render.
+API_READ_CACHE_CONTROL = os.environ.get(
+    'API_READ_CACHE_CONTROL', 'public, max-age=300, s-maxage=3600, stale-while-revalidate=86400'
+)
+API_CACHE_POLICIES = {
+    'list_indicators': API_READ_CACHE_CONTROL,
+    'indicator_detail': API_READ_CACHE_CONTROL,
+    'indicators_batch': API_READ_CACHE_CONTROL,
+    'suggest_indicators': API_READ_CACHE_CONTROL,
+    'year_snapshot': API_READ_CACHE_CONTROL,
+    'movers': API_READ_CACHE_CONTROL,
+    'compute_expression': API_READ_CACHE_CONTROL,
+    'indicator_correlations': API_READ_CACHE_CONTROL,
+    'top_products': API_READ_CACHE_CONTROL,
+    'panel_compare': API_READ_CACHE_CONTROL,
+    'vintages': API_READ_CACHE_CONTROL,
+    'dashboard_data': os.environ.get(
+        'API_DASHBOARD_CACHE_CONTROL', 'public, max-age=60, s-maxage=3600, stale-while-revalidate=86400'
+    ),
+    # Toujours revalidé (304 tant que les données n'ont pas changé) : c'est lui qui
+    # signale au cache IndexedDB du navigateur les entrées à re-télécharger
+    'data_manifest': 'no-cache',
+}
+
 # django-allauth configuration
 SITE_ID = 1
 
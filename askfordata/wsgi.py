@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'askfordata.settings')
 
 application = get_wsgi_application()
+
+# Corrélations entre séries : relues en arrière-plan dès le démarrage du serveur depuis
+# l'instantané construit par `manage.py build_partitions`, jamais calculées ici
+# (voir api/correlation_service.py)
+from api.correlation_service import correlation_service  # noqa: E402
+
+correlation_service.start(build=False)
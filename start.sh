@@ -5,12 +5,24 @@ set -e
 
 PORT="${PORT:-3000}"
 
-echo "── Collecting static files..."
+echo "── Building responsive images..."
+python manage.py build_responsive_images
+
+echo "── Benchmarking spreadsheet readers..."
+python manage.py benchmark_spreadsheet_engines
+
+echo "── Building data partition snapshots..."
+python manage.py build_partitions
+
+echo "── Collecting static files (hashed names + gzip/brotli)..."
 python manage.py collectstatic --noinput
 
 echo "── Running migrations..."
 python manage.py migrate --noinput
 
+echo "── Recording data vintage..."
+python manage.py record_vintage
+
 echo "── Starting gunicorn on port $PORT..."
 exec gunicorn askfordata.wsgi \
     --bind "0.0.0.0:$PORT" \
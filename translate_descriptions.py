@@ -9,6 +9,8 @@ import os
 import time
 from deep_translator import GoogleTranslator
 
+from api.spreadsheet import read_frame
+
 EXCEL_PATH = os.path.join(os.path.dirname(__file__), 'data.xlsx')
 CACHE_PATH = os.path.join(os.path.dirname(__file__), 'descriptions_fr_cache.json')
 
@@ -42,7 +44,7 @@ def main():
         print(f"Cache existant: {len(cache)} traductions")
 
     # Load Excel
-    df = pd.read_excel(EXCEL_PATH, sheet_name='Data')
+    df = read_frame(EXCEL_PATH, sheet_name='Data')
     print(f"Indicateurs: {len(df)}")
 
     translator = GoogleTranslator(source='en', target='fr')